@@ -1,39 +1,60 @@
 import sys
 import os
-import random
-import json
+import threading
+import time
 from functools import partial
+
+# 启动计时从这里开始，使用 --profile-startup 启动时打印各阶段耗时
+from startup_profile import StartupProfile
+startup_profile = StartupProfile(enabled='--profile-startup' in sys.argv)
+
+if __name__ == "__main__":
+    # 命令行模式以及转发给已运行实例的命令不需要界面，在导入 PyQt5 之前处理
+    from launcher_cli import dispatch
+    exit_code = dispatch(sys.argv[1:])
+    if exit_code is not None:
+        sys.exit(exit_code)
+    startup_profile.mark("检查已运行实例")
+
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QListWidget, QListWidgetItem, QCheckBox, QLabel,
+    QPushButton, QLabel,
     QMenu, QAction, QFileDialog, QMessageBox, QFrame, QGroupBox,
-    QStyleFactory, QSystemTrayIcon, QMenu, QAction, QSpinBox
+    QStyleFactory, QSystemTrayIcon, QMenu, QAction, QSpinBox, QInputDialog, QProgressDialog, QComboBox,
+    QLineEdit, QToolButton
 )
-from PyQt5.QtCore import Qt, QPoint, QSize, QTimer, QPropertyAnimation, QEasingCurve
-from PyQt5.QtGui import QIcon, QColor, QFont, QPainter, QBrush, QPixmap, QPen, QPalette
+from PyQt5.QtCore import Qt, QPoint, QTimer, QPropertyAnimation, QEasingCurve, pyqtSignal
+from PyQt5.QtGui import QIcon, QFont, QPainter, QBrush, QPixmap, QPen
+startup_profile.mark("导入 PyQt5")
+
+from sampler import NO_LAUNCH, EMPTY, FORCED
+from program_registry import ProgramRegistry, ALL_PROGRAMS
+from program_list import ProgramListModel, ProgramItemDelegate, ProgramListView, PathRole
+from settings_menu import SettingsMenu
+from storage import ConfigWriter, open_backend
+from launch_backend import ProcessLauncher
+from path_health import PathHealthChecker
+from file_watcher import FileWatcher
+from prefetch import Prefetcher
+from icon_service import IconService
+from instance_server import InstanceServer
+from perf_panel import PerfPanel
+from odds_panel import LaunchOddsPanel
+from launch_history import LaunchHistory
+from recency import RecencyPolicy
+from folder_import import FolderScanner, normalize_path
+from search_index import SearchIndex, QueryError, parse_query
+import perf
+import theme
+startup_profile.mark("导入启动器模块")
 
 class AnimatedButton(QPushButton):
     """带动画效果的按钮"""
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
         self.setMinimumHeight(40)
-        self.setStyleSheet("""
-            QPushButton {
-                background-color: #4CAF50;
-                color: white;
-                border-radius: 8px;
-                font-size: 14px;
-                font-weight: bold;
-                padding: 8px 16px;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #45a049;
-            }
-            QPushButton:pressed {
-                background-color: #3d8b40;
-            }
-        """)
+        # 样式由主题按 variant 属性选择（见 theme.py）
+        self.setProperty('variant', 'primary')
         
     def mousePressEvent(self, event):
         # 创建按下动画
@@ -60,90 +81,39 @@ class SettingsButton(QPushButton):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setFixedSize(30, 30)
-        self.setStyleSheet("""
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                border-radius: 15px;
-                font-size: 16px;
-                font-weight: bold;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #1976D2;
-            }
-            QPushButton:pressed {
-                background-color: #1565C0;
-            }
-        """)
+        self.setObjectName('settingsButton')
         self.setText("⚙")
 
-class ProgramItemWidget(QWidget):
-    """程序项部件"""
-    def __init__(self, name, path, priority=1, parent=None):
-        super().__init__(parent)
-        self.name = name
-        self.path = path
-        self.priority = priority
-        
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(10, 5, 10, 5)
-        
-        self.checkbox = QCheckBox(self)
-        self.checkbox.setChecked(True)
-        
-        self.name_label = QLabel(name)
-        self.name_label.setStyleSheet("font-size: 12px; color: #333;")
-        self.name_label.setFixedWidth(150)
-        
-        self.path_label = QLabel(path)
-        self.path_label.setStyleSheet("font-size: 10px; color: #666;")
-        self.path_label.setWordWrap(True)
-        
-        remove_btn = QPushButton("×")
-        remove_btn.setFixedSize(24, 24)
-        remove_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #f44336;
-                color: white;
-                border-radius: 12px;
-                font-size: 14px;
-                font-weight: bold;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #d32f2f;
-            }
-        """)
-        remove_btn.clicked.connect(self.on_remove)
-        
-        layout.addWidget(self.checkbox)
-        layout.addWidget(self.name_label)
-        layout.addWidget(self.path_label, 1)
-        layout.addWidget(remove_btn)
-        
-        self.setStyleSheet("background-color: #f5f5f5; border-radius: 4px;")
-        
-
-    
-
-    
-
-    
-
-    
-    def on_remove(self):
-        # 改进的移除方法，直接通过信号机制或查找主窗口实例
-        # 向上查找RandomAppLauncher实例
-        window = self.window()
-        if isinstance(window, RandomAppLauncher):
-            window.remove_program(self.path)
-    
-    def is_checked(self):
-        return self.checkbox.isChecked()
-
 class RandomAppLauncher(QMainWindow):
     """随机应用启动器主窗口"""
+    # 后台写入失败时从写入线程发出，排队到界面线程处理
+    save_failed = pyqtSignal(str)
+    # 启动结果和进程退出从后台线程发出，参数为 LaunchResult
+    launch_finished = pyqtSignal(object)
+    process_exited = pyqtSignal(object)
+    # 路径检查结果从后台线程分批发出：[(path, status), ...]
+    health_checked = pyqtSignal(list)
+    # 后台线程读到的配置：(元信息, 第一页程序)
+    config_loaded = pyqtSignal(object, object)
+    # 配置被其他程序修改后重新读取到的完整状态
+    config_reloaded = pyqtSignal(object)
+    # 路径检查发现被修改、替换或删除的程序文件
+    programs_modified = pyqtSignal(list)
+    # 导入文件夹：进度（已扫描目录数, 已找到数）和扫描结果
+    import_progress = pyqtSignal(int, int)
+    import_finished = pyqtSignal(object)
+    # 分页加载时每页的程序数量
+    LOAD_PAGE_SIZE = 2000
+    # 抽取策略的参数
+    NO_REPEAT_WINDOW = 3
+    LAUNCH_DECAY = 0.25
+    # 启动预读：注册表变化后等待这么久再预测，备选程序的数量
+    PREDRAW_DELAY_MS = 300
+    PREFETCH_TOP_K = 3
+    # 筛选框停止输入这么久后才筛选；空闲时每次为这么多个程序建立搜索索引
+    FILTER_DELAY_MS = 150
+    SEARCH_INDEX_CHUNK = 128
+    
     def __init__(self):
         super().__init__()
         # 设置窗口属性，使用更合理的初始大小
@@ -151,48 +121,225 @@ class RandomAppLauncher(QMainWindow):
         self.setGeometry(100, 100, 800, 500)  # 减小初始窗口大小以加快显示
         
         # 快速初始化基本属性
-        self.random_seed = 0
-        self.next_program = None
         self.no_launch_probability = 10
-        # 先初始化空的programs列表，避免在init_ui中调用update_programs_list时出错
-        self.programs = []
-        
-        # 设置最小化的全局样式以加快启动
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #f0f0f0;
-            }
-        """)
+        # 程序注册表是程序数据的唯一来源，界面通过订阅其信号刷新
+        self.registry = ProgramRegistry()
+        self.settings_menu = None
+        self.perf_panel = None
+        self.odds_panel = None
+        self.file_watcher = None
+        self.config_reloading = False
+        self.config_reload_requested = False
+        # 启动预读（见 prefetch.py），开启后才创建
+        self.prefetcher = None
+        self.prefetch_top_k = 0
+        self.predraw_version = None
+        self.predicted_path = None
+        # 配置加载完成前禁用会修改注册表的操作，避免被随后的加载覆盖
+        self.loading_started = False
+        self.programs_loaded = False
+        
+        # 注册表的每次修改以一条操作追加到配置日志，由后台线程合并写入
+        self.config_writer = ConfigWriter(open_backend(), on_error=lambda e: self.save_failed.emit(str(e)))
+        self.save_failed.connect(self.on_save_failed)
+        self.registry.operation.connect(self.config_writer.append)
+        
+        # 启动历史：每次启动追加一条记录，统计显示在列表的每一行
+        self.launch_history = LaunchHistory()
+        self.registry.removed.connect(lambda row, record: self.launch_history.forget(record.path))
+        
+        # 在线程池中异步启动程序，不阻塞事件循环
+        self.process_launcher = ProcessLauncher(
+            on_started=self.on_launch_started, on_exited=self.process_exited.emit
+        )
+        self.launch_finished.connect(self.on_launch_finished)
+        self.process_exited.connect(self.on_process_exited)
         
-        # 快速创建UI框架
+        # 新加入的程序（包括分页加载的）在后台检查路径，界面线程不做文件系统调用
+        self.health_checker = PathHealthChecker(
+            on_result=self.health_checked.emit, on_modified=self.programs_modified.emit
+        )
+        self.health_checked.connect(self.on_health_checked)
+        self.programs_modified.connect(self.on_programs_modified)
+        self.registry.removed.connect(lambda row, record: self.health_checker.forget(record.path))
+        self.registry.added.connect(
+            lambda first, records: self.health_checker.check(r.path for r in records)
+        )
+        self.registry.reset.connect(self.check_program_paths)
+        self.config_loaded.connect(self.on_config_loaded)
+        self.config_reloaded.connect(self.on_config_reloaded)
+        self.folder_scanner = None
+        self.import_dialog = None
+        self.import_progress.connect(self.on_import_progress)
+        self.import_finished.connect(self.on_import_finished)
+        self.registry.groups_changed.connect(self.refresh_group_selector)
+        # 名称和路径的搜索索引，随注册表增量更新；新加入的程序在空闲时分批建立索引
+        self.search_index = SearchIndex(self.registry)
+        self.index_timer = QTimer(self)
+        self.index_timer.setInterval(0)
+        self.index_timer.timeout.connect(self.build_search_index)
+        self.registry.reset.connect(self.index_timer.start)
+        self.registry.added.connect(lambda first, records: self.index_timer.start())
+        # 注册表变化后重新预测下一次启动的程序，连续变化只预测一次
+        self.predraw_timer = QTimer(self)
+        self.predraw_timer.setSingleShot(True)
+        self.predraw_timer.setInterval(self.PREDRAW_DELAY_MS)
+        self.predraw_timer.timeout.connect(self.predraw)
+        for signal in (self.registry.added, self.registry.removed, self.registry.updated,
+                       self.registry.reset, self.registry.operation):
+            signal.connect(lambda *args: self.schedule_predraw())
+        
+        # 样式来自应用级主题样式表（见 theme.py），控件不单独设置样式表
+        
+        # 快速创建UI框架；窗口显示后再分阶段加载：
+        # 首帧 → 后台线程读取配置 → 填充列表 → 托盘 → 文件监视
         self.init_ui()
-        
-        # 然后异步加载程序列表和设置其他属性
-        # 这样可以先显示窗口，然后再加载数据
-        QTimer.singleShot(100, self.post_init)
-    
-    def post_init(self):
-        """初始化后的异步操作"""
-        # 加载程序列表
-        self.programs = self.load_programs()
-        # 更新UI显示
-        self.update_programs_list()
-        # 设置系统托盘
+        startup_profile.mark("创建窗口")
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.loading_started:
+            self.loading_started = True
+            # 排在首帧绘制之后执行
+            QTimer.singleShot(0, self.start_loading)
+    
+    def start_loading(self):
+        """首帧显示后在后台线程读取配置"""
+        startup_profile.mark("首帧")
+        threading.Thread(target=self.load_config, name='config-load', daemon=True).start()
+    
+    def load_config(self):
+        """（工作线程）读取配置元信息和第一页程序，通过 config_loaded 信号交给界面线程"""
+        start = time.perf_counter()
+        try:
+            with perf.span('config.load'):
+                meta = self.config_writer.load_meta()
+                first_page = self.config_writer.load_page(0, self.LOAD_PAGE_SIZE)
+                self.launch_history.open()
+        except Exception as e:
+            print(f"加载配置失败: {e}")
+            # 如果加载失败，使用空列表但不影响程序启动
+            meta, first_page = {'next_program': None, 'count': 0}, []
+        startup_profile.record("读取配置", start, time.perf_counter())
+        self.config_loaded.emit(meta, first_page)
+    
+    def on_config_loaded(self, meta, first_page):
+        """填充第一页程序，其余页在之后的事件循环中追加"""
+        startup_profile.mark("等待配置")
+        settings = meta.get('settings') or {}
+        self.registry.set_policy(RecencyPolicy.from_settings(settings.get('sampling_policy')))
+        self.apply_theme_setting(settings)
+        self.apply_prefetch_setting(settings)
+        with perf.span('list.populate'):
+            self.registry.load(first_page, meta['next_program'], settings)
+        if meta['count'] > len(first_page):
+            QTimer.singleShot(0, partial(self.load_next_page, len(first_page), meta['next_program']))
+        self.programs_loaded = True
+        for widget in self.loading_widgets:
+            widget.setEnabled(True)
+        startup_profile.mark("填充列表")
+        QTimer.singleShot(0, self.finish_startup)
+    
+    def finish_startup(self):
+        """最后创建托盘图标，并开始监视配置文件和程序目录"""
         self.setup_tray_icon()
-        # 应用完整样式
-        self.apply_full_style()
-    
-    def apply_full_style(self):
-        """应用完整的样式设置"""
-        # 完整的样式表
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #f0f0f0;
-            }
-            QLabel {
-                font-family: 'Microsoft YaHei', sans-serif;
-            }
-        """)
+        startup_profile.mark("托盘")
+        self.file_watcher = FileWatcher(self.registry, self.config_writer, self)
+        self.file_watcher.config_changed.connect(self.reload_config)
+        self.file_watcher.programs_changed.connect(self.health_checker.check)
+        startup_profile.mark("文件监视")
+        startup_profile.report()
+    
+    def reload_config(self):
+        """配置文件被其他程序修改：在后台线程重新读取，同一时间只读取一次"""
+        if self.config_reloading:
+            self.config_reload_requested = True
+            return
+        self.config_reloading = True
+        threading.Thread(target=self.read_changed_config, name='config-reload', daemon=True).start()
+    
+    def read_changed_config(self):
+        """（工作线程）写出本进程待写的修改后重新读取配置"""
+        try:
+            with perf.span('config.reload'):
+                state = self.config_writer.reload()
+        except Exception as e:
+            print(f"重新加载配置失败: {e}")
+            state = None
+        self.config_reloaded.emit(state)
+    
+    def on_config_reloaded(self, state):
+        """只把与当前注册表不同的部分应用到注册表"""
+        self.config_reloading = False
+        if state is not None:
+            settings = state.get('settings') or {}
+            policy_settings = self.registry.settings.get('sampling_policy')
+            with perf.span('config.sync'):
+                added, removed, changed = self.registry.sync(state['programs'], state['next_program'], settings)
+            if settings.get('sampling_policy') != policy_settings:
+                self.registry.set_policy(RecencyPolicy.from_settings(settings.get('sampling_policy')))
+            self.apply_theme_setting(settings)
+            self.apply_prefetch_setting(settings)
+            if added or removed or changed:
+                self.statusBar().showMessage(
+                    f"配置已被其他程序修改：新增 {added} 个，移除 {removed} 个，更新 {changed} 个程序", 5000
+                )
+        if self.config_reload_requested:
+            self.config_reload_requested = False
+            self.reload_config()
+    
+    def apply_theme_setting(self, settings):
+        """应用配置中保存的主题"""
+        if settings.get('theme', theme.DEFAULT_THEME) != theme.current():
+            theme.apply_theme(QApplication.instance(), settings.get('theme', theme.DEFAULT_THEME))
+    
+    def set_theme(self, name):
+        """切换主题并随配置保存，整个界面只重新 polish 一次"""
+        name = theme.apply_theme(QApplication.instance(), name)
+        self.registry.set_setting('theme', None if name == theme.DEFAULT_THEME else name)
+    
+    def set_prefetch(self, top_k):
+        """开启启动预读（top_k 为同时预读的备选程序数量），None 表示关闭；设置随配置保存"""
+        self.registry.set_setting('prefetch', None if top_k is None else {'top_k': top_k})
+        self.apply_prefetch_setting(self.registry.settings)
+    
+    def apply_prefetch_setting(self, settings):
+        prefetch = settings.get('prefetch')
+        if prefetch is None:
+            if self.prefetcher is not None:
+                self.prefetcher.shutdown(wait=False)
+                self.prefetcher = None
+            return
+        if self.prefetcher is None:
+            self.prefetcher = Prefetcher()
+        self.prefetch_top_k = int(prefetch.get('top_k', 0))
+        self.predraw_version = None
+        self.schedule_predraw()
+    
+    def schedule_predraw(self):
+        if self.prefetcher is not None:
+            self.predraw_timer.start()
+    
+    def predraw(self):
+        """预测下一次随机启动的程序，在后台把它和最可能的备选程序读入系统缓存
+
+        预测不改变注册表；点击时仍按当时的注册表抽取，注册表在此之后变化也不会启动过期的结果。
+        """
+        if self.prefetcher is None or not self.programs_loaded:
+            return
+        version = self.registry.version
+        if version == self.predraw_version:
+            return
+        with perf.span('launch.predraw'):
+            status, program = self.registry.predict(self.no_launch_probability / 100)
+            paths = [program.path] if program is not None else []
+            if self.prefetch_top_k and status != FORCED:
+                likely = self.registry.likely(self.prefetch_top_k + 1)
+                paths.extend([r.path for r in likely if r.path not in paths][:self.prefetch_top_k])
+        self.predraw_version = version
+        self.predicted_path = program.path if program is not None else None
+        if paths:
+            self.prefetcher.prefetch(paths)
     
     def init_ui(self):
         # 创建中心部件
@@ -212,55 +359,69 @@ class RandomAppLauncher(QMainWindow):
         
         # 标题标签
         title_label = QLabel("随机应用启动器")
-        title_label.setStyleSheet("""
-            font-size: 24px;
-            font-weight: bold;
-            color: #333;
-        """)
+        title_label.setObjectName('titleLabel')
         title_label.setAlignment(Qt.AlignCenter)
         
-        # 占位标签
-        placeholder_label = QLabel()
-        placeholder_label.setFixedWidth(30)
+        # 分组选择：随机启动只从当前分组中抽取
+        self.group_selector = QComboBox()
+        self.group_selector.setToolTip("随机启动的分组")
+        self.group_selector.addItem("全部程序", ALL_PROGRAMS)
+        self.group_selector.activated.connect(self.on_group_selected)
         
         top_layout.addWidget(self.settings_btn)
         top_layout.addWidget(title_label, 1)
-        top_layout.addWidget(placeholder_label)
+        top_layout.addWidget(self.group_selector)
         
         # 程序列表组
         programs_group = QGroupBox("已添加程序")
-        programs_group.setStyleSheet("""
-            QGroupBox {
-                border: 2px solid #ddd;
-                border-radius: 8px;
-                margin-top: 10px;
-                padding: 10px;
-            }
-            QGroupBox::title {
-                subcontrol-origin: margin;
-                left: 10px;
-                padding: 0 5px 0 5px;
-                font-weight: bold;
-                color: #333;
-            }
-        """)
+        programs_group.setObjectName('programsGroup')
         
         programs_layout = QVBoxLayout(programs_group)
         
-        # 程序列表
-        self.programs_list = QListWidget()
-        self.programs_list.setStyleSheet("""
-            QListWidget {
-                background-color: white;
-                border-radius: 4px;
-                border: 1px solid #ddd;
-            }
-            QListWidget::item {
-                height: 60px;
-                margin: 2px;
-            }
-        """)
-        self.update_programs_list()
+        # 筛选框和对筛选结果的批量操作，查询语法见 search_index.py
+        filter_layout = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("筛选：名称或路径，可加 group:分组 is:enabled priority:>=5 …")
+        self.filter_edit.setClearButtonEnabled(True)
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(self.FILTER_DELAY_MS)
+        self.filter_timer.timeout.connect(lambda: self.apply_filter(self.filter_edit.text()))
+        self.filter_edit.textChanged.connect(self.filter_timer.start)
+        self.filter_edit.returnPressed.connect(self.filter_timer.timeout.emit)
+        
+        self.bulk_btn = QToolButton()
+        self.bulk_btn.setText("批量操作")
+        self.bulk_btn.setPopupMode(QToolButton.InstantPopup)
+        bulk_menu = QMenu(self.bulk_btn)
+        bulk_menu.addAction("启用列表中的程序", lambda: self.bulk_set_enabled(True))
+        bulk_menu.addAction("禁用列表中的程序", lambda: self.bulk_set_enabled(False))
+        bulk_menu.addAction("设置列表中程序的优先级...", self.bulk_set_priority)
+        bulk_menu.addSeparator()
+        bulk_menu.addAction("从列表中随机启动", self.launch_from_filter)
+        self.bulk_btn.setMenu(bulk_menu)
+        
+        filter_layout.addWidget(self.filter_edit, 1)
+        filter_layout.addWidget(self.bulk_btn)
+        programs_layout.addLayout(filter_layout)
+        
+        # 程序列表：模型直接订阅注册表，委托按需绘制可见行
+        self.programs_model = ProgramListModel(
+            self.registry, self, history=self.launch_history, search_index=self.search_index
+        )
+        # 设置菜单中的程序选择控件使用不受筛选影响的模型
+        self.all_programs_model = ProgramListModel(self.registry, self)
+        self.icon_service = IconService(icon_size=ProgramItemDelegate.ICON_SIZE, parent=self)
+        self.icon_service.icon_ready.connect(self.programs_model.refresh_path)
+        self.programs_delegate = ProgramItemDelegate(self.icon_service, self)
+        # 排队执行删除，避免在委托处理鼠标事件的过程中修改模型
+        self.programs_delegate.remove_requested.connect(self.remove_program, Qt.QueuedConnection)
+        self.programs_list = ProgramListView()
+        self.programs_list.setModel(self.programs_model)
+        self.programs_list.setItemDelegate(self.programs_delegate)
+        self.programs_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.programs_list.customContextMenuRequested.connect(self.show_list_context_menu)
+        self.programs_list.setObjectName('programsList')
         
         programs_layout.addWidget(self.programs_list)
         
@@ -275,46 +436,20 @@ class RandomAppLauncher(QMainWindow):
         # 随机启动按钮（更大、更醒目）
         random_btn = AnimatedButton("🎲 随机启动")
         random_btn.setMinimumHeight(50)
-        random_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #FF9800;
-                color: white;
-                border-radius: 10px;
-                font-size: 16px;
-                font-weight: bold;
-                padding: 12px 24px;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #F57C00;
-            }
-            QPushButton:pressed {
-                background-color: #E65100;
-            }
-        """)
-        random_btn.clicked.connect(self.random_launch)
+        random_btn.setProperty('variant', 'accent')
+        random_btn.clicked.connect(lambda: self.random_launch())
         
         # 退出按钮
         exit_btn = AnimatedButton("退出")
-        exit_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #f44336;
-                color: white;
-                border-radius: 8px;
-                font-size: 14px;
-                font-weight: bold;
-                padding: 8px 16px;
-                border: none;
-            }
-            QPushButton:hover {
-                background-color: #d32f2f;
-            }
-            QPushButton:pressed {
-                background-color: #c62828;
-            }
-        """)
+        exit_btn.setProperty('variant', 'danger')
         exit_btn.clicked.connect(self.close)
         
+        # 配置加载完成后启用
+        self.loading_widgets = [self.settings_btn, add_btn, random_btn, self.group_selector,
+                                self.filter_edit, self.bulk_btn]
+        for widget in self.loading_widgets:
+            widget.setEnabled(False)
+        
         buttons_layout.addWidget(add_btn, 1)
         buttons_layout.addWidget(random_btn, 2)
         buttons_layout.addWidget(exit_btn, 1)
@@ -335,10 +470,15 @@ class RandomAppLauncher(QMainWindow):
         show_action = QAction("显示窗口", self)
         show_action.triggered.connect(self.show)
         
+        # 分组在展开时按当前注册表构建
+        self.tray_group_menu = QMenu("从分组启动", tray_menu)
+        self.tray_group_menu.aboutToShow.connect(self.fill_tray_group_menu)
+        
         exit_action = QAction("退出", self)
         exit_action.triggered.connect(self.close)
         
         tray_menu.addAction(show_action)
+        tray_menu.addMenu(self.tray_group_menu)
         tray_menu.addAction(exit_action)
         
         self.tray_icon.setContextMenu(tray_menu)
@@ -346,81 +486,21 @@ class RandomAppLauncher(QMainWindow):
         
     def show_settings_menu(self):
         """显示设置菜单"""
-        menu = QMenu(self)
-        
-        add_program_action = QAction("添加程序", self)
-        add_program_action.triggered.connect(self.add_program)
-        menu.addAction(add_program_action)
-        
-        # 应用优先级子菜单
-        priority_menu = QMenu("应用优先级", self)
-        
-        # 添加下一次必中子菜单项
-        next_program_menu = QMenu("下次必中", self)
-        
-        # 获取当前启用的程序列表
-        enabled_programs = [p for p in self.programs if p.get('enabled', True)]
-        
-        if not enabled_programs:
-            # 如果没有启用的程序，添加一个禁用的菜单项
-            no_programs_action = QAction("无可用程序", self)
-            no_programs_action.setEnabled(False)
-            next_program_menu.addAction(no_programs_action)
-        else:
-            # 为每个启用的程序添加菜单项
-            for program in enabled_programs:
-                program_action = QAction(program['name'], self)
-                # 使用functools.partial替代lambda以确保正确捕获变量
-                program_action.triggered.connect(lambda checked, path=program['path']: self.set_next_program(path))
-                next_program_menu.addAction(program_action)
-        
-        # 调整优先级子菜单
-        adjust_priority_menu = QMenu("调整优先级", self)
-        
-        # 为每个程序添加调整优先级的菜单项
-        if not self.programs:
-            no_programs_action = QAction("无可用程序", self)
-            no_programs_action.setEnabled(False)
-            adjust_priority_menu.addAction(no_programs_action)
-        else:
-            # 为每个程序创建子菜单
-            for program in self.programs:
-                # 为每个程序创建子菜单
-                program_menu = QMenu(f"{program['name']} (当前: {program['priority']})")
-                
-                # 添加设置不同优先级的菜单项
-                for p in range(1, 11):
-                    priority_action = QAction(f"设置为 {p}", self)
-                    # 使用functools.partial确保正确捕获每个循环迭代的变量值
-                    priority_action.triggered.connect(partial(self.set_program_priority, program['path'], p))
-                    program_menu.addAction(priority_action)
-                
-                # 将菜单添加到调整优先级菜单中
-                adjust_priority_menu.addMenu(program_menu)
-        
-        # 重置优先级菜单项
-        reset_priorities_action = QAction("重置优先级", self)
-        reset_priorities_action.triggered.connect(self.reset_priorities)
-        
-        # 将子菜单项添加到优先级子菜单
-        priority_menu.addMenu(next_program_menu)
-        priority_menu.addSeparator()
-        priority_menu.addMenu(adjust_priority_menu)
-        priority_menu.addSeparator()
-        priority_menu.addAction(reset_priorities_action)
-        
-        # 将优先级菜单添加到主菜单
-        menu.addMenu(priority_menu)
-        
-        # 添加退出动作
-        menu.addSeparator()
-        exit_action = QAction("退出应用", self)
-        exit_action.triggered.connect(self.close)
-        menu.addAction(exit_action)
+        # 菜单只在第一次点击时创建，之后复用；子菜单在展开时按需构建
+        if self.settings_menu is None:
+            with perf.span('settings_menu.create'):
+                self.settings_menu = SettingsMenu(self, self)
         
         # 在设置按钮下方显示菜单
         pos = self.settings_btn.mapToGlobal(QPoint(0, self.settings_btn.height()))
-        menu.exec_(pos)
+        self.settings_menu.exec_(pos)
+    
+    def show_perf_panel(self):
+        """显示性能面板"""
+        if self.perf_panel is None:
+            self.perf_panel = PerfPanel(self)
+        self.perf_panel.show()
+        self.perf_panel.raise_()
     
     def add_program(self):
         """添加程序"""
@@ -428,243 +508,413 @@ class RandomAppLauncher(QMainWindow):
             self, "选择程序", "", "可执行文件 (*.exe);;所有文件 (*)"
         )
         
-        for file_path in file_paths:
-            if file_path and os.path.exists(file_path):
-                name = os.path.basename(file_path)
-                # 检查是否已存在
-                if not any(p['path'] == file_path for p in self.programs):
-                    self.programs.append({
-                        'name': name,
-                        'path': file_path,
-                        'enabled': True,
-                        'priority': 1  # 默认优先级为1
-                    })
-                else:
-                    QMessageBox.information(self, "提示", f"程序 {name} 已存在")
-        
-        self.save_programs()
-        self.update_programs_list()
+        if not file_paths:
+            return
+        # 注册表按路径索引，重复检查为O(1)；路径是否有效由后台检查
+        added = self.registry.add_many(file_paths)
+        skipped = len(file_paths) - len(added)
+        if skipped == 1 and len(file_paths) == 1:
+            QMessageBox.information(self, "提示", f"程序 {os.path.basename(file_paths[0])} 已存在")
+        elif skipped:
+            QMessageBox.information(self, "提示", f"已添加 {len(added)} 个程序，{skipped} 个已存在")
+    
+    def import_folder(self):
+        """选择文件夹，在后台扫描其中的程序后一次性添加"""
+        if self.folder_scanner is not None:
+            return
+        folder = QFileDialog.getExistingDirectory(self, "选择要导入的文件夹")
+        if not folder:
+            return
+        # 已有程序的规范化路径，扫描时用于去重
+        known = {normalize_path(program.path) for program in self.registry}
+        scanner = self.folder_scanner = FolderScanner(on_progress=self.import_progress.emit)
+        self.import_dialog = QProgressDialog("正在扫描文件夹...", "取消", 0, 0, self)
+        self.import_dialog.setWindowTitle("导入文件夹")
+        self.import_dialog.setMinimumDuration(300)
+        self.import_dialog.canceled.connect(scanner.cancel)
+        threading.Thread(
+            target=lambda: self.import_finished.emit(scanner.scan([folder], known)),
+            name='folder-import', daemon=True
+        ).start()
+    
+    def on_import_progress(self, dirs_scanned, found):
+        if self.import_dialog is not None:
+            self.import_dialog.setLabelText(f"已扫描 {dirs_scanned} 个文件夹，找到 {found} 个程序")
+    
+    def on_import_finished(self, result):
+        """扫描完成：一次插入所有新程序（一次列表更新、一次保存）"""
+        self.folder_scanner = None
+        if self.import_dialog is not None:
+            self.import_dialog.close()
+            self.import_dialog = None
+        if result.cancelled:
+            self.statusBar().showMessage("已取消导入", 5000)
+            return
+        with perf.span('import.add_many'):
+            added = self.registry.add_many(result.paths)
+        message = f"已导入 {len(added)} 个程序"
+        if result.duplicates:
+            message += f"，跳过已存在的 {result.duplicates} 个"
+        if result.errors:
+            message += f"，{result.errors} 个文件夹无法读取"
+        self.statusBar().showMessage(message, 10000)
     
     def remove_program(self, path):
         """移除程序"""
         # 优化移除逻辑，添加异常处理
         try:
-            # 使用更高效的列表推导式
-            self.programs = [p for p in self.programs if p['path'] != path]
-            # 立即更新UI，但延迟保存以避免频繁IO操作
-            self.update_programs_list()
-            # 异步保存，避免阻塞UI
-            QTimer.singleShot(0, self.save_programs)
+            self.registry.remove(path)
         except Exception as e:
             QMessageBox.warning(self, "警告", f"删除程序失败: {str(e)}")
     
     def reset_priorities(self):
         """重置所有程序的优先级"""
-        for program in self.programs:
-            program['priority'] = 1
-        self.save_programs()
-        self.update_programs_list()
+        self.registry.reset_priorities(1)
         QMessageBox.information(self, "成功", "所有程序优先级已重置为1！")
     
-
-    
     def set_program_priority(self, path, priority):
         """设置单个程序的优先级"""
-        for program in self.programs:
-            if program['path'] == path:
-                program['priority'] = priority
-                self.save_programs()
-                self.update_programs_list()
-                QMessageBox.information(self, "成功", f"已将 {program['name']} 的优先级设置为 {priority}！")
-                break
+        program = self.registry.set_priority(path, priority)
+        if program is not None:
+            QMessageBox.information(self, "成功", f"已将 {program.name} 的优先级设置为 {priority}！")
     
     def set_next_program(self, path):
         """设置下一次必中的程序"""
-        for program in self.programs:
-            if program['path'] == path:
-                self.next_program = path
-                QMessageBox.information(self, "设置成功", 
-                    f"下一次将必中: {program['name']}")
-                break
-    
-    def random_launch(self):
-        """随机启动选中的程序（基于优先级）"""
-        # 10%概率不启动任何程序
-        if random.random() < 0.1:
-            QMessageBox.information(self, "提示", "你不许启动")
+        program = self.registry.set_next(path)
+        if program is not None:
+            QMessageBox.information(self, "设置成功", 
+                f"下一次将必中: {program.name}")
+    
+    def fill_tray_group_menu(self):
+        """托盘菜单：从指定分组随机启动"""
+        self.tray_group_menu.clear()
+        for name in [ALL_PROGRAMS] + self.registry.groups():
+            action = self.tray_group_menu.addAction(name or "全部程序")
+            action.triggered.connect(lambda checked=False, group=name: self.random_launch(group))
+    
+    def refresh_group_selector(self):
+        """分组增减后更新分组选择框"""
+        active = self.registry.active_group or ALL_PROGRAMS
+        names = self.registry.groups()
+        if active and active not in names:
+            # 保留当前分组（其中的程序可能只是暂时被移除）
+            names = sorted(names + [active])
+        self.group_selector.blockSignals(True)
+        self.group_selector.clear()
+        self.group_selector.addItem("全部程序", ALL_PROGRAMS)
+        for name in names:
+            self.group_selector.addItem(name, name)
+        self.group_selector.setCurrentIndex(max(0, self.group_selector.findData(active)))
+        self.group_selector.blockSignals(False)
+    
+    def on_group_selected(self, index):
+        """切换当前分组，只更换使用的抽样器"""
+        self.registry.set_active_group(self.group_selector.itemData(index))
+    
+    def show_list_context_menu(self, pos):
+        """列表右键菜单：设置选中程序的分组"""
+        if not self.programs_loaded:
             return
-            
-        # 创建路径到程序信息的映射
-        path_to_program = {}
-        for program in self.programs:
-            path_to_program[program['path']] = {
-                'priority': program.get('priority', 1),
-                'name': program['name'],
-                'enabled': program.get('enabled', True)
-            }
-            
-        # 获取当前选中的程序及其优先级
-        weighted_programs = []
-        
-        # 确保使用同步的程序列表和UI状态
-        # 直接从self.programs获取数据，而不是通过UI组件获取
-        for program in self.programs:
-            # 查找对应的UI项以检查是否被选中
-            is_checked = False
-            for i in range(self.programs_list.count()):
-                item_widget = self.programs_list.itemWidget(self.programs_list.item(i))
-                if item_widget and item_widget.path == program['path']:
-                    is_checked = item_widget.is_checked()
-                    break
-            
-            if is_checked and program.get('enabled', True):
-                priority = program.get('priority', 1)
-                # 根据优先级添加多个实例，确保高优先级程序有更高的选中概率
-                weighted_programs.extend([program['path']] * priority)
-        
-        if not weighted_programs:
-            QMessageBox.warning(self, "警告", "请至少选择一个程序")
+        paths = [index.data(PathRole) for index in self.programs_list.selectionModel().selectedIndexes()]
+        if not paths:
+            index = self.programs_list.indexAt(pos)
+            if not index.isValid():
+                return
+            paths = [index.data(PathRole)]
+        menu = QMenu(self)
+        menu.addAction("设置分组...", lambda: self.edit_groups(paths))
+        menu.exec_(self.programs_list.viewport().mapToGlobal(pos))
+    
+    def edit_groups(self, paths):
+        """以逗号分隔的分组名设置程序所属的分组"""
+        first = self.registry.get(paths[0])
+        current = ", ".join(first.groups) if first is not None else ""
+        hint = f"{len(paths)} 个程序" if len(paths) > 1 else (first.name if first else paths[0])
+        text, ok = QInputDialog.getText(
+            self, "设置分组", f"{hint}的分组（多个分组用逗号分隔，留空表示不分组）：", text=current
+        )
+        if not ok:
             return
-        
-        # 验证weighted_programs的长度和内容
-        if len(weighted_programs) == 1:
-            # 如果只有一个程序，仍然使用随机选择以保持一致性
-            selected_path = random.choice(weighted_programs)
+        groups = [name for name in text.replace('，', ',').split(',')]
+        for path in paths:
+            self.registry.set_groups(path, groups)
+    
+    def apply_filter(self, text):
+        """按筛选框的查询只显示匹配的程序"""
+        try:
+            query = parse_query(text)
+        except QueryError as e:
+            self.statusBar().showMessage(str(e), 3000)
+            return
+        self.filter_timer.stop()
+        with perf.span('search.filter'):
+            self.programs_model.set_filter(query)
+        if not query:
+            self.statusBar().clearMessage()
+        elif self.programs_model.complete:
+            self.statusBar().showMessage(f"筛选出 {self.programs_model.rowCount()} 个程序", 3000)
         else:
-            # 检查是否有下一次必中的程序
-            if self.next_program and self.next_program in path_to_program and path_to_program[self.next_program]['enabled']:
-                # 确保必中程序在当前选中的程序列表中
-                if self.next_program in weighted_programs:
-                    selected_path = self.next_program
-                    self.next_program = None  # 重置下一次必中
-                else:
-                    # 如果必中程序不在选中列表中，则随机选择
-                    selected_path = random.choice(weighted_programs)
-            else:
-                # 基于权重随机选择一个程序
-                selected_path = random.choice(weighted_programs)
+            self.statusBar().showMessage(f"已显示前 {self.programs_model.rowCount()} 个匹配的程序，滚动到末尾时继续显示", 3000)
+    
+    def build_search_index(self):
+        """空闲时分批建立搜索索引，第一次筛选不需要等待"""
+        with perf.span('search.index'):
+            done = self.search_index.build(self.SEARCH_INDEX_CHUNK)
+        if done:
+            self.index_timer.stop()
+    
+    def bulk_set_enabled(self, enabled):
+        """启用或禁用列表中当前显示的程序"""
+        records = self.programs_model.visible_records()
+        changed = 0
+        for record in records:
+            if record.enabled != enabled:
+                self.registry.set_enabled(record.path, enabled)
+                changed += 1
+        self.statusBar().showMessage(f"已{'启用' if enabled else '禁用'} {changed} 个程序", 5000)
+    
+    def bulk_set_priority(self):
+        """把列表中当前显示的程序设为同一优先级"""
+        records = self.programs_model.visible_records()
+        if not records:
+            return
+        priority, ok = QInputDialog.getInt(
+            self, "设置优先级", f"为 {len(records)} 个程序设置优先级（1-10）：", 5, 1, 10
+        )
+        if not ok:
+            return
+        for record in records:
+            self.registry.set_priority(record.path, priority)
+        self.statusBar().showMessage(f"已将 {len(records)} 个程序的优先级设置为 {priority}", 5000)
+    
+    def launch_from_filter(self):
+        """只从列表中当前显示的程序中随机启动"""
+        if self.programs_model.filtered:
+            status, program = self.draw_and_launch(subset=self.programs_model.visible_records())
+        else:
+            status, program = self.draw_and_launch(ALL_PROGRAMS)
+        if status == NO_LAUNCH:
+            QMessageBox.information(self, "提示", "你不许启动")
+        elif status == EMPTY:
+            QMessageBox.warning(self, "警告", "列表中没有可启动的程序")
+    
+    def random_launch(self, group=None):
+        """随机启动选中的程序（基于优先级）；group 为None时从当前分组中抽取"""
+        status, program = self.draw_and_launch(group)
         
-        # 启动选中的程序
+        if status == NO_LAUNCH:
+            QMessageBox.information(self, "提示", "你不许启动")
+        elif status == EMPTY and self.registry.sampler_for(group) is not self.registry.sampler:
+            QMessageBox.warning(self, "警告", "该分组中没有可启动的程序")
+        elif status == EMPTY:
+            QMessageBox.warning(self, "警告", "请至少选择一个程序")
+    
+    def set_sampling_policy(self, **changes):
+        """修改抽取策略（见 recency.RecencyPolicy），设置随配置保存"""
+        settings = dict(self.registry.settings.get('sampling_policy') or {})
+        settings.update(changes)
+        policy = RecencyPolicy.from_settings(settings)
+        self.registry.set_setting('sampling_policy', policy.to_settings() if policy else None)
+        self.registry.set_policy(policy)
+    
+    def set_random_seed(self):
+        """设置随机种子，相同的种子和配置会得到相同的抽取顺序"""
+        seed = self.registry.settings.get('random_seed')
+        text, ok = QInputDialog.getText(
+            self, "随机种子", "整数种子（留空表示每次都不同）：", text='' if seed is None else str(seed)
+        )
+        if not ok:
+            return
+        text = text.strip()
+        try:
+            seed = int(text) if text else None
+        except ValueError:
+            QMessageBox.warning(self, "警告", f"种子必须是整数: {text}")
+            return
+        self.registry.set_seed(seed)
+    
+    def show_odds_panel(self):
+        """显示概率预览"""
+        if self.odds_panel is None:
+            self.odds_panel = LaunchOddsPanel(self, self)
+        self.odds_panel.show()
+        self.odds_panel.raise_()
+    
+    def set_launch_guarantee(self, checked):
+        """开启时询问每个程序最多间隔多少次启动"""
+        if not checked:
+            self.set_sampling_policy(guarantee=0)
+            return
+        enabled = sum(1 for program in self.registry if program.enabled)
+        guarantee, ok = QInputDialog.getInt(
+            self, "保证轮到", "每个程序至少每多少次启动出现一次：",
+            max(10, enabled * 2), max(2, enabled), 100000
+        )
+        if ok:
+            self.set_sampling_policy(guarantee=guarantee)
+    
+    def draw_and_launch(self, group=None, subset=None):
+        """抽取一个程序并在后台启动，返回 (状态, 程序)"""
+        predicted = group is None and subset is None and self.registry.version == self.predraw_version
+        with perf.span('launch.draw'):
+            status, program = self.registry.draw(self.no_launch_probability / 100, group=group, subset=subset)
+        perf.count(f'launch.draw.{status}')
+        if predicted:
+            hit = (program.path if program is not None else None) == self.predicted_path
+            perf.count('launch.predraw.hit' if hit else 'launch.predraw.miss')
+        self.schedule_predraw()
+        if program is not None:
+            # 启动结果通过 launch_finished 信号返回
+            self.process_launcher.launch(program.path, program.name)
+            self.statusBar().showMessage(f"正在启动: {program.name}")
+        return status, program
+    
+    def show_window(self):
+        """显示并激活窗口（包括从托盘和最小化状态恢复）"""
+        self.showNormal()
+        self.raise_()
+        self.activateWindow()
+    
+    def handle_instance_command(self, message):
+        """处理其他调用转发来的命令，返回回复（协议见 instance_ipc.py）"""
+        cmd = message.get('cmd')
+        if cmd == 'show':
+            self.show_window()
+            return {'ok': True}
+        if not self.programs_loaded:
+            return {'ok': False, 'error': "启动器正在加载配置，请稍后重试"}
+        if cmd == 'launch':
+            # 不弹出对话框，结果由调用方输出
+            group = message.get('group')
+            if group and group not in self.registry.groups():
+                return {'ok': False, 'error': f"分组不存在: {group}"}
+            subset = None
+            if message.get('filter'):
+                try:
+                    subset = self.search_index.search(message['filter'])
+                except QueryError as e:
+                    return {'ok': False, 'error': str(e)}
+            status, program = self.draw_and_launch(group, subset)
+            return {'ok': True, 'status': status,
+                    'path': program.path if program else None, 'name': program.name if program else None}
+        if cmd == 'add':
+            added = [path for path in message.get('paths', []) if self.registry.add(path) is not None]
+            return {'ok': True, 'added': len(added)}
+        if cmd == 'bulk':
+            # 对查询结果批量启用、禁用或设置优先级
+            try:
+                records = self.search_index.search(message.get('filter', ''))
+            except QueryError as e:
+                return {'ok': False, 'error': str(e)}
+            action, priority = message.get('action'), int(message.get('priority', 0))
+            if action == 'priority' and not 1 <= priority <= 10:
+                return {'ok': False, 'error': f"优先级必须是 1-10: {priority}"}
+            for record in records:
+                if action == 'priority':
+                    self.registry.set_priority(record.path, priority)
+                elif action in ('enable', 'disable'):
+                    self.registry.set_enabled(record.path, action == 'enable')
+                else:
+                    return {'ok': False, 'error': f"未知操作: {action}"}
+            return {'ok': True, 'matched': len(records)}
+        if cmd == 'set_priority':
+            path, priority = message.get('path'), int(message.get('priority', 0))
+            if not 1 <= priority <= 10:
+                return {'ok': False, 'error': f"优先级必须是 1-10: {priority}"}
+            if self.registry.set_priority(path, priority) is None:
+                return {'ok': False, 'error': f"程序不存在: {path}"}
+            return {'ok': True}
+        return {'ok': False, 'error': f"未知命令: {cmd}"}
+    
+    def check_program_paths(self):
+        """在后台重新检查所有程序路径，被修改、替换或删除的文件另外通知"""
+        self.health_checker.check([p.path for p in self.registry])
+    
+    def on_health_checked(self, results):
+        """应用一批路径检查结果，不可用的程序不会被抽中"""
+        for path, status in results:
+            self.registry.set_status(path, status)
+    
+    def on_programs_modified(self, paths):
+        """程序文件被更新或替换后丢弃旧图标，重绘时重新加载"""
+        for path in paths:
+            self.icon_service.invalidate(path)
+            self.programs_model.refresh_path(path)
+    
+    def on_launch_started(self, result):
+        """（启动线程）记录启动历史，再把结果交给界面线程"""
         try:
-            os.startfile(selected_path)  # Windows 平台
-            
-            # 获取程序名称
-            program_name = path_to_program.get(selected_path, {}).get('name', os.path.basename(selected_path))
-            
-            # 显示启动信息
-            QMessageBox.information(
-                self, "启动成功", f"正在启动: {program_name}"
+            self.launch_history.record(result.path, result.ok, result.spawn_latency, result.started_at)
+        except OSError as e:
+            print(f"记录启动历史失败: {e}")
+        self.launch_finished.emit(result)
+    
+    def on_launch_finished(self, result):
+        """后台启动完成"""
+        self.programs_model.refresh_path(result.path)
+        if result.ok:
+            self.statusBar().showMessage(
+                f"已启动: {result.name}（耗时 {result.spawn_latency * 1000:.0f} ms）", 5000
             )
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"启动程序时出错: {str(e)}")
-    
-    def update_programs_list(self):
-        """更新程序列表显示 - 优化版"""
-        # 使用QApplication.processEvents()确保UI响应
-        QApplication.processEvents()
-        
-        # 清空列表但保留一些性能优化
-        self.programs_list.clear()
-        
-        # 批量添加项目以提高性能
-        batch_size = 10  # 每批处理的项目数
-        for i in range(0, len(self.programs), batch_size):
-            batch = self.programs[i:i+batch_size]
-            for program in batch:
-                item = QListWidgetItem()
-                item.setSizeHint(QSize(0, 70))
-                self.programs_list.addItem(item)
-                
-                item_widget = ProgramItemWidget(
-                    program['name'], 
-                    program['path'],
-                    program.get('priority', 1)
-                )
-                item_widget.checkbox.setChecked(program.get('enabled', True))
-                self.programs_list.setItemWidget(item, item_widget)
-            
-            # 每处理一批就更新一次UI，避免长时间无响应
-            QApplication.processEvents()
-    
-    def save_programs(self):
-        """保存程序列表到文件 - 优化版本"""
-        # 快速更新启用状态，避免不必要的UI操作
-        updated_programs = []
-        for i, program in enumerate(self.programs):
-            # 创建程序副本以避免直接修改原始数据
-            program_copy = program.copy()
-            
-            if i < self.programs_list.count():
-                item_widget = self.programs_list.itemWidget(self.programs_list.item(i))
-                if item_widget:
-                    program_copy['enabled'] = item_widget.is_checked()
-                    # 如果ProgramItemWidget中还有get_priority方法则使用
-                    if hasattr(item_widget, 'get_priority'):
-                        program_copy['priority'] = item_widget.get_priority()
-            
-            updated_programs.append(program_copy)
-        
-        # 使用快速文件IO操作保存配置
+        else:
+            self.statusBar().clearMessage()
+            QMessageBox.critical(self, "错误", f"启动程序时出错: {result.error}")
+    
+    def on_process_exited(self, result):
+        """已启动的程序退出"""
+        self.statusBar().showMessage(f"{result.name} 已退出，退出码 {result.exit_status}", 5000)
+    
+    def on_save_failed(self, message):
+        """后台保存失败时提示用户"""
+        QMessageBox.warning(self, "警告", f"保存配置失败: {message}")
+    
+    def load_next_page(self, offset, next_program):
+        """追加下一页程序"""
         try:
-            config_path = os.path.join(os.path.expanduser("~"), ".random_app_launcher.json")
-            # 不使用缩进以减少文件大小和写入时间
-            with open(config_path, 'w', encoding='utf-8', buffering=1024*1024) as f:
-                json.dump(updated_programs, f, ensure_ascii=False)
+            page = self.config_writer.load_page(offset, self.LOAD_PAGE_SIZE)
         except Exception as e:
-            # 简化错误处理，避免过多日志记录
-            pass
-    
-    def load_programs(self):
-        """从文件加载程序列表 - 快速版"""
-        # 先返回空列表以加快启动速度，然后异步加载实际数据
-        # 创建一个临时空列表
-        programs = []
-        
-        # 快速检查配置文件是否存在
-        config_path = os.path.join(os.path.expanduser("~"), ".random_app_launcher.json")
-        if os.path.exists(config_path):
-            try:
-                # 使用二进制模式和快速读取
-                with open(config_path, 'rb') as f:
-                    # 快速读取整个文件
-                    content = f.read().decode('utf-8')
-                    # 解析JSON
-                    programs = json.loads(content)
-                    # 并行处理每个程序的优先级检查
-                    for program in programs:
-                        if 'priority' not in program:
-                            program['priority'] = 1
-            except Exception as e:
-                print(f"加载配置失败: {e}")
-                # 如果加载失败，返回空列表但不影响程序启动
-                programs = []
-        
-        return programs
+            print(f"加载配置失败: {e}")
+            return
+        with perf.span('list.append_page'):
+            self.registry.extend(page, next_program)
+        if len(page) == self.LOAD_PAGE_SIZE:
+            QTimer.singleShot(0, partial(self.load_next_page, offset + len(page), next_program))
     
     def closeEvent(self, event):
-        """关闭事件处理 - 优化版本"""
-        # 立即接受事件，不阻塞UI
+        """关闭事件处理：确保配置已写入磁盘"""
+        self.process_launcher.shutdown(wait=False)
+        self.health_checker.shutdown(wait=False)
+        self.icon_service.shutdown(wait=False)
+        if self.prefetcher is not None:
+            self.prefetcher.shutdown(wait=False)
+        self.launch_history.close()
+        done = self.config_writer.flush(timeout=5)
+        if self.config_writer.last_error is not None:
+            QMessageBox.warning(self, "警告", f"保存配置失败，部分修改没有保存: {self.config_writer.last_error}")
+        elif not done:
+            QMessageBox.warning(self, "警告", "保存配置超时，部分修改可能没有保存")
         event.accept()
-        
-        # 然后异步保存配置，不影响窗口关闭速度
-        try:
-            self.save_programs()
-        except Exception:
-            # 静默失败，避免在关闭过程中弹出错误
-            pass
 
 if __name__ == "__main__":
     # 设置应用样式
     app = QApplication(sys.argv)
     app.setStyle(QStyleFactory.create("Fusion"))
     
-    # 设置全局调色板
-    palette = QPalette()
-    palette.setColor(QPalette.Window, QColor(240, 240, 240))
-    palette.setColor(QPalette.WindowText, QColor(50, 50, 50))
-    app.setPalette(palette)
+    # 在创建窗口之前设置调色板和应用级样式表，控件创建时只 polish 一次
+    theme.apply_theme(app, theme.DEFAULT_THEME)
+    
+    # 先监听单实例套接字再创建窗口：之后的调用会把命令转发到这里；
+    # 同时启动的另一个实例已经在监听时，把"显示窗口"交给它，本进程不再打开窗口和写配置
+    instance_server = InstanceServer(None)
+    if not instance_server.listen():
+        if instance_server.forwarded:
+            sys.exit(0)
+        print("无法监听单实例套接字，其他调用将启动新的窗口")
     
     # 启动应用
     window = RandomAppLauncher()
+    # 事件循环开始之前不会处理连接，这里设置的处理函数对所有转发的命令生效
+    instance_server.handler = window.handle_instance_command
+    instance_server.setParent(window)
     window.show()
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,290 @@
+"""启动器热点路径基准测试
+
+在 QT_QPA_PLATFORM=offscreen 下运行，不会真正启动任何程序（启动后端被替换为空实现），
+配置读写使用临时目录，不会碰到用户自己的配置。程序路径指向临时目录中真实存在的
+可执行空文件，路径检查不会把它们标记为不可用，抽取测量的是按权重抽取而不是"没有可启动的程序"。
+
+测量项目（每个程序数量分别测量）：
+- registry_load       注册表整体加载（抽样树重建）
+- draw                按权重抽取，每秒次数
+- predraw             启动预读的预测：下一次结果和最可能的 3 个备选
+- search_build        第一次搜索时建立名称/路径索引
+- search              在索引中查询（选择性高和低的查询各一次）
+- json_round_trip     JSON 快照写入后重新加载
+- sqlite_round_trip   SQLite 写入后重新加载
+- list_rebuild        界面列表整体重置并绘制（需要 PyQt5）
+- settings_menu       设置菜单创建并构建子菜单（需要 PyQt5）
+- random_launch       界面抽取并提交启动，每秒次数（需要 PyQt5）
+
+用法：
+    python benchmarks/bench_launcher.py                          运行并输出结果
+    python benchmarks/bench_launcher.py --save-baseline base.json 保存为基线
+    python benchmarks/bench_launcher.py --baseline base.json      与基线比较，变慢超过阈值时返回 1
+
+基线与机器有关，请在同一台机器上保存和比较。benchmarks/baseline.json 是一份参考基线
+（只含无界面项目），用来查看数量级，比较前请在自己的机器上重新保存。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+# 必须在导入 storage 之前设置：配置路径在导入时根据主目录确定
+_TMP_HOME = tempfile.mkdtemp(prefix='bench_launcher_')
+os.environ['HOME'] = os.environ['USERPROFILE'] = _TMP_HOME
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from program_registry import ProgramRegistry
+from search_index import SearchIndex
+from storage import JsonBackend, SqliteBackend
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+DEFAULT_THRESHOLD = 0.25
+DRAWS = 10000
+# 吞吐量类的项目数值越大越好，比较时取倒数
+THROUGHPUT = ('draw', 'random_launch')
+
+
+_CATALOG_DIR = os.path.join(_TMP_HOME, 'bench')
+_catalog_files = 0  # 已创建的程序文件数
+
+
+def make_catalog(size):
+    """size 个程序，路径指向真实存在的可执行文件（各数量共用同一批文件）"""
+    global _catalog_files
+    os.makedirs(_CATALOG_DIR, exist_ok=True)
+    for i in range(_catalog_files, size):
+        path = os.path.join(_CATALOG_DIR, f'app{i}.exe')
+        open(path, 'wb').close()
+        os.chmod(path, 0o755)
+    _catalog_files = max(_catalog_files, size)
+    return [
+        {'name': f'app{i}', 'path': os.path.join(_CATALOG_DIR, f'app{i}.exe'),
+         'enabled': i % 7 != 0, 'priority': 1 + i % 10}
+        for i in range(size)
+    ]
+
+
+def measure(func, repeat):
+    """运行 repeat 次，返回每次耗时（秒）"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summarize(times, per=None):
+    best = min(times)
+    result = {'min': best, 'median': statistics.median(times)}
+    if per is not None:
+        result['per_second'] = per / best
+    return result
+
+
+# ---- 无界面项目 ----
+
+def bench_headless(size, repeat, results):
+    catalog = make_catalog(size)
+    registry = ProgramRegistry()
+    results[f'registry_load[{size}]'] = summarize(measure(lambda: registry.load(catalog), repeat))
+
+    rng = random.Random(0)
+    registry.load(catalog)
+    results[f'draw[{size}]'] = summarize(
+        measure(lambda: [registry.draw(0.1, rng) for _ in range(DRAWS)], repeat), DRAWS)
+    results[f'predraw[{size}]'] = summarize(
+        measure(lambda: (registry.predict(0.1), registry.likely(4)), repeat))
+
+    def search_build():
+        SearchIndex(registry).search('app1')
+    results[f'search_build[{size}]'] = summarize(measure(search_build, repeat))
+
+    index = SearchIndex(registry)
+    index.search('app1')
+    results[f'search[{size}]'] = summarize(
+        measure(lambda: (index.search(f'app{size // 2}'), index.search('bench is:enabled')), repeat))
+
+    state = {'programs': catalog, 'next_program': None}
+    workdir = tempfile.mkdtemp(dir=_TMP_HOME)
+    json_path = os.path.join(workdir, 'config.json')
+
+    def json_round_trip():
+        JsonBackend(json_path).write_snapshot(state)
+        JsonBackend(json_path).load()
+    results[f'json_round_trip[{size}]'] = summarize(measure(json_round_trip, repeat))
+
+    db_path = os.path.join(workdir, 'config.db')
+
+    def sqlite_round_trip():
+        backend = SqliteBackend(db_path, json_path=os.path.join(workdir, 'missing.json'))
+        backend.write_snapshot(state)
+        backend.close()
+        backend = SqliteBackend(db_path, json_path=os.path.join(workdir, 'missing.json'))
+        backend.load()
+        backend.close()
+    results[f'sqlite_round_trip[{size}]'] = summarize(measure(sqlite_round_trip, repeat))
+    shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---- 界面项目 ----
+
+class _NullLaunchBackend:
+    """不启动任何程序"""
+
+    def spawn(self, path):
+        return None
+
+
+def create_window():
+    from PyQt5.QtWidgets import QApplication
+    import RandomAppLauncher as main_module
+    import theme
+
+    app = QApplication.instance() or QApplication([])
+    theme.apply_theme(app, theme.DEFAULT_THEME)
+    window = main_module.RandomAppLauncher()
+    window.process_launcher.backend = _NullLaunchBackend()
+    # 跳过后台加载配置，由基准测试直接填充
+    window.loading_started = True
+    window.show()
+    window.on_config_loaded({'next_program': None, 'count': 0}, [])
+    app.processEvents()
+    return app, window
+
+
+def bench_gui(app, window, size, repeat, results):
+    from settings_menu import SettingsMenu
+
+    catalog = make_catalog(size)
+
+    def list_rebuild():
+        window.registry.load(catalog)
+        window.programs_list.viewport().repaint()
+        app.processEvents()
+    results[f'list_rebuild[{size}]'] = summarize(measure(list_rebuild, repeat))
+
+    def settings_menu():
+        menu = SettingsMenu(window, window)
+        menu.next_program_menu.aboutToShow.emit()
+        menu.adjust_priority_menu.aboutToShow.emit()
+        menu.deleteLater()
+        app.processEvents()
+    results[f'settings_menu[{size}]'] = summarize(measure(settings_menu, repeat))
+
+    draws = min(DRAWS, 1000)
+    window.no_launch_probability = 0
+
+    def random_launch():
+        for _ in range(draws):
+            window.draw_and_launch()
+        window.process_launcher._executor.submit(lambda: None).result()
+        app.processEvents()
+    results[f'random_launch[{size}]'] = summarize(measure(random_launch, repeat), draws)
+
+
+# ---- 基线比较 ----
+
+def cost(name, entry):
+    """用于比较的数值，越大越慢"""
+    if name.split('[', 1)[0] in THROUGHPUT:
+        return 1.0 / entry['per_second']
+    return entry['min']
+
+
+def compare(results, baseline, threshold):
+    """返回变慢超过阈值的项目 [(名称, 比值)]"""
+    regressions = []
+    for name, entry in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        ratio = cost(name, entry) / cost(name, base)
+        if ratio > 1 + threshold:
+            regressions.append((name, ratio))
+    return regressions
+
+
+def format_results(results, baseline=None):
+    lines = [f"{'项目':<28}{'最小(ms)':>12}{'中位(ms)':>12}{'次/秒':>14}{'对比基线':>10}"]
+    for name, entry in results.items():
+        per_second = f"{entry['per_second']:.0f}" if 'per_second' in entry else ''
+        ratio = ''
+        if baseline and name in baseline:
+            ratio = f"{cost(name, entry) / cost(name, baseline[name]):.2f}x"
+        lines.append(f"{name:<28}{entry['min'] * 1000:>12.3f}{entry['median'] * 1000:>12.3f}"
+                     f"{per_second:>14}{ratio:>10}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="随机应用启动器基准测试")
+    parser.add_argument('--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help="程序数量，逗号分隔（默认 %(default)s）")
+    parser.add_argument('--repeat', type=int, default=5, help="每项重复次数（默认 %(default)s）")
+    parser.add_argument('--headless', action='store_true', help="只运行不需要 PyQt5 的项目")
+    parser.add_argument('--output', help="把结果写入 JSON 文件")
+    parser.add_argument('--save-baseline', metavar='PATH', help="把结果保存为基线")
+    parser.add_argument('--baseline', metavar='PATH', help="与基线比较")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="允许变慢的比例，超过时返回 1（默认 %(default)s）")
+    args = parser.parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+
+    gui = None
+    if not args.headless:
+        try:
+            gui = create_window()
+        except ImportError as e:
+            print(f"未安装 PyQt5，跳过界面项目: {e}", file=sys.stderr)
+
+    results = {}
+    try:
+        for size in sizes:
+            bench_headless(size, args.repeat, results)
+            if gui is not None:
+                bench_gui(*gui, size, args.repeat, results)
+    finally:
+        if gui is not None:
+            gui[1].close()
+        shutil.rmtree(_TMP_HOME, ignore_errors=True)
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        },
+        'results': results,
+    }
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+    print(format_results(results, baseline))
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, ratio in regressions:
+            print(f"变慢: {name} 为基线的 {ratio:.2f} 倍（阈值 {1 + args.threshold:.2f}）", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""配置文件与程序目录监视
+
+用 QFileSystemWatcher 监视两类路径：
+- 配置文件（及其所在目录，原子替换会让文件监视失效）：防抖后与 ConfigWriter 记录的签名
+  比较，本进程自己的写入被忽略，其他程序的修改才发出 config_changed()
+- 已注册程序所在的目录：随注册表增删增量维护，目录变化后防抖，
+  只发出该目录中已注册的程序 programs_changed([path, ...])，不重新检查全部路径
+目录数量超过 MAX_DIRS 时其余目录不再监视，其中的程序仍可通过"检查程序路径"手动检查。
+"""
+import os
+
+from PyQt5.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+
+class FileWatcher(QObject):
+    """监视配置文件和程序目录，变化经防抖后通过信号通知"""
+    config_changed = pyqtSignal()
+    programs_changed = pyqtSignal(list)
+
+    DEBOUNCE_MS = 500
+    MAX_DIRS = 4096
+
+    def __init__(self, registry, config_writer, parent=None):
+        super().__init__(parent)
+        self._registry = registry
+        self._writer = config_writer
+        self._config_files = [os.path.abspath(p) for p in config_writer.backend.watch_paths()]
+        self._config_dirs = {os.path.dirname(p) for p in self._config_files}
+        self._dirs = {}  # 目录 -> 其中已注册程序的路径集合
+        self._watched = set()  # 实际加入监视的程序目录（不含配置目录）
+        self._config_dirty = False
+        self._dirty_dirs = set()
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_file_changed)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS)
+        self._timer.timeout.connect(self._flush)
+
+        self._watch_config_files()
+        self._watcher.addPaths([d for d in self._config_dirs if os.path.isdir(d)])
+        self._on_reset()
+        registry.added.connect(self._on_added)
+        registry.removed.connect(self._on_removed)
+        registry.reset.connect(self._on_reset)
+
+    def _watch_config_files(self):
+        """（重新）监视存在的配置文件，被替换或重新创建的文件需要重新加入"""
+        watched = set(self._watcher.files())
+        paths = [p for p in self._config_files if p not in watched and os.path.exists(p)]
+        if paths:
+            self._watcher.addPaths(paths)
+
+    # ---- 程序目录 ----
+
+    def _watch_dirs(self, dirs):
+        room = self.MAX_DIRS - len(self._watched)
+        dirs = [d for d in dirs if d and d not in self._watched and d not in self._config_dirs
+                and os.path.isdir(d)][:max(0, room)]
+        if dirs:
+            failed = set(self._watcher.addPaths(dirs))
+            self._watched.update(d for d in dirs if d not in failed)
+
+    def _on_added(self, first, records):
+        new_dirs = []
+        for record in records:
+            directory = os.path.dirname(record.path)
+            paths = self._dirs.get(directory)
+            if paths is None:
+                paths = self._dirs[directory] = set()
+                new_dirs.append(directory)
+            paths.add(record.path)
+        self._watch_dirs(new_dirs)
+
+    def _on_removed(self, row, record):
+        directory = os.path.dirname(record.path)
+        paths = self._dirs.get(directory)
+        if paths is None:
+            return
+        paths.discard(record.path)
+        if not paths:
+            del self._dirs[directory]
+            # 超过 MAX_DIRS 或不存在的目录没有加入监视，不能移除
+            if directory in self._watched:
+                self._watched.discard(directory)
+                self._watcher.removePath(directory)
+
+    def _on_reset(self):
+        if self._watched:
+            self._watcher.removePaths(list(self._watched))
+            self._watched = set()
+        self._dirs = {}
+        for record in self._registry:
+            self._dirs.setdefault(os.path.dirname(record.path), set()).add(record.path)
+        self._watch_dirs(list(self._dirs))
+
+    # ---- 事件与防抖 ----
+
+    def _on_file_changed(self, path):
+        self._config_dirty = True
+        self._timer.start()
+
+    def _on_directory_changed(self, directory):
+        if directory in self._config_dirs:
+            self._config_dirty = True
+        if directory in self._dirs:
+            self._dirty_dirs.add(directory)
+        if directory in self._watched and not os.path.isdir(directory):
+            # 被删除的目录已由 QFileSystemWatcher 自动移出监视
+            self._watched.discard(directory)
+        self._timer.start()
+
+    def _flush(self):
+        if self._dirty_dirs:
+            paths = []
+            for directory in self._dirty_dirs:
+                paths.extend(self._dirs.get(directory, ()))
+            self._dirty_dirs.clear()
+            if paths:
+                self.programs_changed.emit(paths)
+        if self._config_dirty:
+            self._watch_config_files()
+            changed = self._writer.changed_externally()
+            if changed is None:
+                # 本进程正在写入，写完后再比较签名
+                self._timer.start()
+                return
+            self._config_dirty = False
+            if changed:
+                self.config_changed.emit()
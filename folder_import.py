@@ -0,0 +1,118 @@
+"""批量导入文件夹
+
+在线程池中并行遍历目录树（每个目录一个 os.scandir 任务），筛选出可启动的文件：
+Windows 上是 PATHEXT 中的可执行文件和 .lnk/.url 快捷方式，Linux/macOS 上是
+.desktop 文件、可执行文件和 .app 包。路径按规范化形式放入集合去重，
+已经添加过的程序通过 known 传入。进度通过 on_progress(已扫描目录数, 已找到数) 回调
+（在扫描线程中调用，最多每 PROGRESS_INTERVAL 秒一次）。
+"""
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from path_health import STATUS_OK, classify_path, windows_executable_exts
+
+# 有执行权限但不是程序的文件
+_SKIP_EXTS = ('.so', '.dylib', '.dll', '.a', '.o')
+
+
+def normalize_path(path):
+    """用于去重的规范化路径（绝对路径，Windows 上不区分大小写）"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+class ScanResult:
+    """一次扫描的结果"""
+    __slots__ = ('paths', 'duplicates', 'dirs_scanned', 'errors', 'cancelled', 'elapsed')
+
+    def __init__(self):
+        self.paths = []        # 新发现的程序路径，按发现顺序
+        self.duplicates = 0    # 已存在或重复发现的数量
+        self.dirs_scanned = 0
+        self.errors = 0        # 无法读取的目录数
+        self.cancelled = False
+        self.elapsed = 0.0
+
+
+class FolderScanner:
+    """并行目录扫描"""
+
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, max_workers=8, on_progress=None):
+        self.max_workers = max_workers
+        self.on_progress = on_progress
+        self._cancelled = threading.Event()
+        self._exec_exts = windows_executable_exts() if os.name == 'nt' else None
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def scan(self, roots, known=()):
+        """扫描若干目录，返回 ScanResult；known 为已有程序的规范化路径集合"""
+        start = time.perf_counter()
+        result = ScanResult()
+        seen = set(known)
+        last_progress = 0.0
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='folder-scan') as executor:
+            pending = {executor.submit(self._scan_dir, os.path.normpath(root)) for root in roots}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs, ok = future.result()
+                    result.dirs_scanned += 1
+                    if not ok:
+                        result.errors += 1
+                    for path in files:
+                        key = normalize_path(path)
+                        if key in seen:
+                            result.duplicates += 1
+                            continue
+                        seen.add(key)
+                        result.paths.append(path)
+                    if not self._cancelled.is_set():
+                        pending.update(executor.submit(self._scan_dir, subdir) for subdir in subdirs)
+                now = time.perf_counter()
+                if self.on_progress is not None and now - last_progress >= self.PROGRESS_INTERVAL:
+                    last_progress = now
+                    self.on_progress(result.dirs_scanned, len(result.paths))
+        result.cancelled = self._cancelled.is_set()
+        result.elapsed = time.perf_counter() - start
+        if self.on_progress is not None:
+            self.on_progress(result.dirs_scanned, len(result.paths))
+        return result
+
+    def _scan_dir(self, directory):
+        """（工作线程）返回 (可启动文件, 子目录, 是否成功)"""
+        files, subdirs = [], []
+        if self._cancelled.is_set():
+            return files, subdirs, True
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            # .app 包本身就是程序，不再深入
+                            if entry.name.endswith('.app'):
+                                files.append(entry.path)
+                            else:
+                                subdirs.append(entry.path)
+                        elif entry.is_file() and self._launchable(entry):
+                            files.append(entry.path)
+                    except OSError:
+                        continue
+        except OSError:
+            return files, subdirs, False
+        return files, subdirs, True
+
+    def _launchable(self, entry):
+        name = entry.name.lower()
+        if name.endswith(_SKIP_EXTS) or '.so.' in name:
+            return False
+        if os.name == 'nt':
+            # 只看扩展名，不需要 stat
+            return name.endswith(self._exec_exts)
+        if name.endswith('.desktop'):
+            return True
+        return classify_path(entry.path, entry.stat(), self._exec_exts) == STATUS_OK
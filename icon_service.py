@@ -0,0 +1,207 @@
+"""程序图标服务
+
+图标在工作线程中提取为 QImage（.desktop 文件解析 Icon 并在图标主题目录中查找），
+缩放后以 PNG 保存到磁盘缓存（按路径、mtime 和大小命名，按最近使用时间淘汰）。
+界面线程只把 QImage 转为 QPixmap 放入容量有限的内存 LRU，并发出 icon_ready(path)。
+Windows 可执行文件的图标只能通过 QFileIconProvider 在界面线程提取，
+这部分每次只处理少量，结果同样写入磁盘缓存，下次启动直接读取。
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QObject, QFileInfo, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtWidgets import QFileIconProvider
+
+ICON_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "random_app_launcher", "icons")
+
+_ICON_DIRS = (
+    os.path.join(os.path.expanduser("~"), ".local", "share", "icons"),
+    os.path.join(os.path.expanduser("~"), ".icons"),
+    "/usr/local/share/icons",
+    "/usr/share/icons",
+)
+_ICON_SIZES = ('48x48', '64x64', '32x32', '128x128', '256x256', 'scalable')
+_ICON_EXTS = ('.png', '.svg', '.xpm')
+_NO_ICON = object()  # 内存缓存中"没有图标"的标记，避免重复提取
+
+
+def _find_theme_icon(name):
+    """在 hicolor 主题和 pixmaps 目录中查找图标文件"""
+    for base in _ICON_DIRS:
+        for size in _ICON_SIZES:
+            for ext in _ICON_EXTS:
+                candidate = os.path.join(base, 'hicolor', size, 'apps', name + ext)
+                if os.path.isfile(candidate):
+                    return candidate
+    for ext in _ICON_EXTS:
+        candidate = os.path.join('/usr/share/pixmaps', name + ext)
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _desktop_icon(path):
+    """从 .desktop 文件中解析图标文件路径"""
+    with open(path, encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if line.startswith('Icon='):
+                icon = line[len('Icon='):].strip()
+                if os.path.isabs(icon):
+                    return icon if os.path.isfile(icon) else None
+                return _find_theme_icon(icon)
+    return None
+
+
+class IconService(QObject):
+    """异步图标加载与缓存"""
+    icon_ready = pyqtSignal(str)
+    _image_loaded = pyqtSignal(str, object, str)  # 路径, QImage或None, 需要界面线程提取时的缓存文件
+
+    MAX_PENDING = 256     # 快速滚动时只保留最近请求的图标
+    NATIVE_PER_TICK = 4   # 每次在界面线程中提取的原生图标数量
+    MAX_DISK_ENTRIES = 5000
+
+    def __init__(self, icon_size=32, memory_size=512, cache_dir=ICON_CACHE_DIR, max_workers=4, parent=None):
+        super().__init__(parent)
+        self.icon_size = icon_size
+        self.memory_size = memory_size
+        self.cache_dir = cache_dir
+        self._memory = OrderedDict()  # path -> QPixmap 或 _NO_ICON
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()  # path -> None，工作线程开始前会确认仍在其中
+        self._native_queue = OrderedDict()  # path -> 磁盘缓存文件
+        self._native_timer = QTimer(self)
+        self._native_timer.setInterval(0)
+        self._native_timer.timeout.connect(self._extract_native_batch)
+        self._disk_writes = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='icon')
+        self._image_loaded.connect(self._on_image_loaded)
+        self._executor.submit(self._prune_disk_cache)
+
+    def icon(self, path):
+        """返回已缓存的图标；还没有时安排异步加载并返回None"""
+        pixmap = self._memory.get(path)
+        if pixmap is not None:
+            self._memory.move_to_end(path)
+            return None if pixmap is _NO_ICON else pixmap
+        with self._lock:
+            if path in self._pending:
+                self._pending.move_to_end(path)
+                return None
+            self._pending[path] = None
+            if len(self._pending) > self.MAX_PENDING:
+                self._pending.popitem(last=False)
+        self._executor.submit(self._load, path)
+        return None
+
+    def invalidate(self, path):
+        """文件变化后丢弃内存中的图标，下次绘制时重新加载"""
+        self._memory.pop(path, None)
+
+    def shutdown(self, wait=False):
+        self._native_timer.stop()
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    # ---- 工作线程 ----
+
+    def _cache_file(self, path, st):
+        key = f"{path}|{st.st_mtime_ns}|{st.st_size}|{self.icon_size}"
+        return os.path.join(self.cache_dir, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.png')
+
+    def _load(self, path):
+        with self._lock:
+            if path not in self._pending:
+                return  # 已被更新的请求挤掉
+        image, native_cache_file = None, ''
+        try:
+            st = os.stat(path)
+            cache_file = self._cache_file(path, st)
+            if os.path.exists(cache_file):
+                image = QImage(cache_file)
+                os.utime(cache_file)  # 更新使用时间，供淘汰参考
+            else:
+                image, need_native = self._extract(path)
+                if image is not None:
+                    self._save(cache_file, image)
+                elif need_native:
+                    native_cache_file = cache_file
+        except OSError:
+            image = None
+        if image is not None and image.isNull():
+            image = None
+        self._image_loaded.emit(path, image, native_cache_file)
+
+    def _extract(self, path):
+        lower = path.lower()
+        if lower.endswith('.desktop'):
+            icon_file = _desktop_icon(path)
+            if icon_file is None:
+                return None, False
+            image = QImage(icon_file)
+            if image.isNull():
+                return None, False
+            return image.scaled(self.icon_size, self.icon_size, Qt.KeepAspectRatio, Qt.SmoothTransformation), False
+        if os.name == 'nt' and lower.endswith(('.exe', '.lnk', '.bat', '.cmd', '.url')):
+            return None, True
+        return None, False
+
+    def _save(self, cache_file, image):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_file = cache_file + '.tmp'
+        if image.save(tmp_file, 'PNG'):
+            os.replace(tmp_file, cache_file)
+        with self._lock:
+            self._disk_writes += 1
+            prune = self._disk_writes % 500 == 0
+        if prune:
+            self._prune_disk_cache()
+
+    def _prune_disk_cache(self):
+        """磁盘缓存超过上限时删除最久未使用的文件"""
+        try:
+            entries = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.png')]
+        except OSError:
+            return
+        if len(entries) <= self.MAX_DISK_ENTRIES:
+            return
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[:len(entries) - self.MAX_DISK_ENTRIES]:
+            try:
+                os.unlink(entry.path)
+            except OSError:
+                pass
+
+    # ---- 界面线程 ----
+
+    def _on_image_loaded(self, path, image, native_cache_file):
+        with self._lock:
+            self._pending.pop(path, None)
+        if native_cache_file:
+            self._native_queue[path] = native_cache_file
+            self._native_timer.start()
+            return
+        self._store(path, QPixmap.fromImage(image) if image is not None else _NO_ICON)
+
+    def _extract_native_batch(self):
+        provider = QFileIconProvider()
+        for _ in range(min(self.NATIVE_PER_TICK, len(self._native_queue))):
+            path, cache_file = self._native_queue.popitem(last=False)
+            pixmap = provider.icon(QFileInfo(path)).pixmap(self.icon_size, self.icon_size)
+            if pixmap.isNull():
+                self._store(path, _NO_ICON)
+                continue
+            self._store(path, pixmap)
+            self._executor.submit(self._save, cache_file, pixmap.toImage())
+        if not self._native_queue:
+            self._native_timer.stop()
+
+    def _store(self, path, pixmap):
+        self._memory[path] = pixmap
+        self._memory.move_to_end(path)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+        self.icon_ready.emit(path)
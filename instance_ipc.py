@@ -0,0 +1,104 @@
+"""单实例通信协议与客户端
+
+已经有启动器在运行时，新的调用把命令转发给它后立即退出，配置只由一个进程写入。
+服务端使用 QLocalServer（见 instance_server.py），这里的客户端只依赖标准库，
+命令行模式不需要导入 PyQt5。
+
+- POSIX：Unix 域套接字，使用 $XDG_RUNTIME_DIR（没有时为临时目录）下的绝对路径
+- Windows：命名管道 \\\\.\\pipe\\<名称>
+
+每个连接发送一行 JSON 命令，收到一行 JSON 回复后关闭：
+    {"cmd": "show"}
+    {"cmd": "launch"}                     可选 "group": 分组名、"filter": 查询（见 search_index.py）
+    {"cmd": "add", "paths": ["/path/to/app", ...]}
+    {"cmd": "set_priority", "path": "/path/to/app", "priority": 5}
+    {"cmd": "bulk", "filter": "查询", "action": "enable" | "disable" | "priority", "priority": 5}
+回复为 {"ok": true, ...} 或 {"ok": false, "error": "..."}。
+"""
+import json
+import os
+import socket
+import tempfile
+import time
+
+SERVER_PREFIX = 'random_app_launcher'
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+
+def server_name():
+    """服务端名称：POSIX 上是套接字的绝对路径，Windows 上是管道名"""
+    user = os.environ.get('USER') or os.environ.get('USERNAME') or str(getattr(os, 'getuid', lambda: '')())
+    name = f"{SERVER_PREFIX}-{user}"
+    if os.name == 'nt':
+        return name
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR') or tempfile.gettempdir()
+    return os.path.join(runtime_dir, name + '.sock')
+
+
+def encode_message(message):
+    return json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def decode_message(line):
+    message = json.loads(line.decode('utf-8'))
+    if not isinstance(message, dict):
+        raise ValueError("消息必须是 JSON 对象")
+    return message
+
+
+def _read_line(read):
+    chunks, size = [], 0
+    while True:
+        chunk = read(4096)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        size += len(chunk)
+        if b'\n' in chunk or size > MAX_MESSAGE_SIZE:
+            break
+    return b''.join(chunks).split(b'\n', 1)[0]
+
+
+def _send_posix(name, data, timeout):
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        try:
+            sock.connect(name)
+        except (FileNotFoundError, ConnectionRefusedError):
+            return None  # 没有正在运行的实例（或套接字文件是残留的）
+        sock.sendall(data)
+        return _read_line(sock.recv)
+
+
+def _send_windows(name, data, timeout):
+    pipe = r'\\.\pipe' + '\\' + name
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            f = open(pipe, 'r+b', buffering=0)
+            break
+        except FileNotFoundError:
+            return None
+        except OSError:
+            # 管道忙（服务端正在处理其他连接），稍后重试
+            if time.monotonic() >= deadline:
+                raise
+            time.sleep(0.05)
+    with f:
+        f.write(data)
+        return _read_line(f.read)
+
+
+def send_command(message, timeout=2.0, name=None):
+    """把命令发给正在运行的实例，返回回复；没有实例在运行时返回None"""
+    name = name or server_name()
+    data = encode_message(message)
+    if os.name == 'nt':
+        line = _send_windows(name, data, timeout)
+    else:
+        line = _send_posix(name, data, timeout)
+    if line is None:
+        return None
+    if not line:
+        raise OSError("实例没有回复")
+    return decode_message(line)
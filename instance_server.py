@@ -0,0 +1,69 @@
+"""单实例服务端
+
+第一个启动的实例监听本地套接字（协议见 instance_ipc.py），之后的调用把命令
+转发过来。handler(message) 在界面线程中调用并返回回复字典。
+两个实例几乎同时启动时，后监听的一方发现名称被占用，确认对方在响应后
+把"显示窗口"转发给它并退出，不会删除对方的套接字。
+"""
+from functools import partial
+
+from PyQt5.QtCore import QObject
+from PyQt5.QtNetwork import QLocalServer
+
+from instance_ipc import MAX_MESSAGE_SIZE, decode_message, encode_message, send_command, server_name
+
+
+class InstanceServer(QObject):
+    """接收其他调用转发的命令"""
+
+    def __init__(self, handler, name=None, parent=None):
+        super().__init__(parent)
+        self.handler = handler
+        self.name = name or server_name()
+        # listen() 发现已有实例在响应时为 True，此时已把 show 命令转发给它
+        self.forwarded = False
+        self._server = QLocalServer(self)
+        self._server.setSocketOptions(QLocalServer.UserAccessOption)
+        self._server.newConnection.connect(self._on_new_connection)
+
+    def listen(self):
+        """开始监听，返回是否成功
+
+        名称被占用时再探测一次：没有实例响应才把套接字当作残留文件删除后重试；
+        有实例（可能刚刚启动）时不删除，转发 show 命令并设置 forwarded
+        """
+        if self._server.listen(self.name):
+            return True
+        try:
+            reply = send_command({'cmd': 'show'}, name=self.name)
+        except (OSError, ValueError):
+            # 连接成功但没有正确回复，仍然说明对方还在
+            reply = {}
+        if reply is not None:
+            self.forwarded = True
+            return False
+        QLocalServer.removeServer(self.name)
+        return self._server.listen(self.name)
+
+    def close(self):
+        self._server.close()
+
+    def _on_new_connection(self):
+        while self._server.hasPendingConnections():
+            sock = self._server.nextPendingConnection()
+            sock.disconnected.connect(sock.deleteLater)
+            sock.readyRead.connect(partial(self._on_ready_read, sock))
+
+    def _on_ready_read(self, sock):
+        if not sock.canReadLine():
+            if sock.bytesAvailable() > MAX_MESSAGE_SIZE:
+                sock.abort()
+            return
+        line = bytes(sock.readLine()).rstrip(b'\r\n')
+        try:
+            reply = self.handler(decode_message(line))
+        except Exception as e:
+            reply = {'ok': False, 'error': str(e)}
+        sock.write(encode_message(reply))
+        sock.flush()
+        sock.disconnectFromServer()
@@ -0,0 +1,194 @@
+"""程序启动后端
+
+- WindowsLaunchBackend：基于 os.startfile
+- PosixLaunchBackend：基于 subprocess（CPython 在条件允许时内部使用 posix_spawn），
+  可执行文件直接运行，.desktop 文件按 Exec 行启动，其他文件交给系统默认打开方式
+- ProcessLauncher：在线程池中异步启动，记录启动耗时，并在后台跟踪进程退出状态
+
+回调均在工作线程中调用，界面需要自行转到界面线程处理。
+"""
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import perf
+
+
+class LaunchResult:
+    """一次启动的结果"""
+    __slots__ = ('path', 'name', 'ok', 'error', 'pid', 'started_at',
+                 'spawn_latency', 'exit_status', 'ended_at')
+
+    def __init__(self, path, name=None):
+        self.path = path
+        self.name = name or os.path.basename(path)
+        self.ok = False
+        self.error = None
+        self.pid = None
+        self.started_at = time.time()
+        self.spawn_latency = None  # 秒
+        self.exit_status = None    # 进程退出码，无法跟踪或尚未退出时为None
+        self.ended_at = None
+
+    def __repr__(self):
+        return (f"LaunchResult({self.path!r}, ok={self.ok!r}, pid={self.pid!r}, "
+                f"spawn_latency={self.spawn_latency!r}, exit_status={self.exit_status!r})")
+
+
+class LaunchBackend:
+    """启动后端接口"""
+
+    def spawn(self, path):
+        """启动程序，返回可跟踪的 subprocess.Popen，无法跟踪时返回None"""
+        raise NotImplementedError
+
+
+class WindowsLaunchBackend(LaunchBackend):
+    """Windows：交给 shell 打开（支持 .exe、.lnk 以及关联的文件类型）"""
+
+    def spawn(self, path):
+        os.startfile(path)
+        return None
+
+
+class PosixLaunchBackend(LaunchBackend):
+    """Linux / macOS：用 subprocess 在新会话中启动，与启动器进程脱离"""
+
+    # .desktop 文件 Exec 行中需要去掉的字段代码
+    _FIELD_CODES = {'%f', '%F', '%u', '%U', '%d', '%D', '%n', '%N', '%i', '%c', '%k', '%v', '%m'}
+
+    def command_for(self, path):
+        """确定启动某个路径使用的命令行"""
+        if path.endswith('.desktop'):
+            return self._desktop_command(path)
+        if os.path.isfile(path) and os.access(path, os.X_OK):
+            return [path]
+        opener = 'open' if sys.platform == 'darwin' else 'xdg-open'
+        if shutil.which(opener) is None:
+            raise OSError(f"文件不可执行，且找不到 {opener}: {path}")
+        return [opener, path]
+
+    def _desktop_command(self, path):
+        exec_line = None
+        in_entry = False
+        with open(path, encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    in_entry = line == '[Desktop Entry]'
+                elif in_entry and line.startswith('Exec='):
+                    exec_line = line[len('Exec='):]
+                    break
+        if not exec_line:
+            raise OSError(f".desktop 文件缺少 Exec: {path}")
+        return [arg for arg in shlex.split(exec_line) if arg not in self._FIELD_CODES]
+
+    def spawn(self, path):
+        argv = self.command_for(path)
+        cwd = os.path.dirname(path) if argv[0] == path else None
+        return subprocess.Popen(
+            argv,
+            cwd=cwd or None,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+
+
+def default_backend():
+    """按当前平台选择启动后端"""
+    if os.name == 'nt':
+        return WindowsLaunchBackend()
+    return PosixLaunchBackend()
+
+
+class ProcessLauncher:
+    """异步启动器
+
+    launch() 立即返回 Future；启动完成后调用 on_started(result)，
+    可跟踪的进程退出后调用 on_exited(result)。最近的结果保存在 history 中。
+    """
+
+    POLL_INTERVAL = 0.5
+
+    def __init__(self, backend=None, max_workers=2, on_started=None, on_exited=None, history_size=200):
+        self.backend = backend if backend is not None else default_backend()
+        self.on_started = on_started
+        self.on_exited = on_exited
+        self.history = deque(maxlen=history_size)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='launch')
+        self._lock = threading.Lock()
+        self._running = []  # [(Popen, LaunchResult)]
+        self._reaper = None
+        self._stopped = threading.Event()
+
+    def launch(self, path, name=None):
+        return self._executor.submit(self._spawn, path, name)
+
+    def running(self):
+        """当前仍在运行的已跟踪进程"""
+        with self._lock:
+            return [result for _, result in self._running]
+
+    def shutdown(self, wait=False):
+        self._stopped.set()
+        self._executor.shutdown(wait=wait)
+
+    def _spawn(self, path, name):
+        result = LaunchResult(path, name)
+        start = time.perf_counter()
+        process = None
+        try:
+            process = self.backend.spawn(path)
+            result.ok = True
+            result.pid = getattr(process, 'pid', None)
+        except Exception as e:
+            result.error = e
+            perf.count('launch.failed')
+        result.spawn_latency = time.perf_counter() - start
+        perf.observe('launch.spawn', result.spawn_latency, start)
+        self.history.append(result)
+        if process is not None:
+            self._track(process, result)
+        if self.on_started is not None:
+            self.on_started(result)
+        return result
+
+    def _track(self, process, result):
+        with self._lock:
+            self._running.append((process, result))
+            if self._reaper is None or not self._reaper.is_alive():
+                self._reaper = threading.Thread(target=self._reap, name='launch-reaper', daemon=True)
+                self._reaper.start()
+
+    def _reap(self):
+        """轮询已启动的进程，记录退出状态；没有需要跟踪的进程时退出"""
+        while not self._stopped.wait(self.POLL_INTERVAL):
+            exited = []
+            with self._lock:
+                still_running = []
+                for process, result in self._running:
+                    code = process.poll()
+                    if code is None:
+                        still_running.append((process, result))
+                    else:
+                        result.exit_status = code
+                        result.ended_at = time.time()
+                        exited.append(result)
+                self._running = still_running
+                done = not still_running
+                if done:
+                    # 在锁内清空，之后的 _track 会启动新的轮询线程
+                    self._reaper = None
+            for result in exited:
+                if self.on_exited is not None:
+                    self.on_exited(result)
+            if done:
+                return
@@ -0,0 +1,260 @@
+"""启动历史
+
+每次启动追加一条定长记录到二进制日志（时间、路径哈希、启动耗时、结果），
+内存中只保留最近的若干条（环形缓冲区）和每个程序的累计统计：
+启动次数、失败次数、上次启动时间、按半衰期衰减的启动频率（EWMA）。
+统计随每条记录增量更新，并定期保存快照，启动时只需重放快照之后的记录。
+日志超过上限时只保留最近的记录（统计不受影响），因此文件和内存都不会无限增长。
+"""
+import hashlib
+import json
+import math
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+from storage import atomic_write_bytes, atomic_write_json
+
+HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".random_app_launcher.history")
+STATS_SUFFIX = '.stats.json'
+
+# 文件头：魔数、版本、保留、代数（每次截断日志后加一）
+HEADER = struct.Struct('<4sHHQ')
+MAGIC = b'RALH'
+VERSION = 1
+# 记录：时间戳、路径哈希、启动耗时（秒，未知为NaN）、结果
+RECORD = struct.Struct('<dQfi')
+
+LAUNCH_OK = 0
+LAUNCH_FAILED = 1
+
+# 启动频率的半衰期
+FREQUENCY_HALF_LIFE = 7 * 86400
+
+
+def path_hash(path):
+    """64位路径哈希（跨进程稳定，不使用内置 hash）"""
+    digest = hashlib.blake2b(path.encode('utf-8', 'surrogatepass'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+class LaunchStats:
+    """单个程序的累计统计"""
+    __slots__ = ('count', 'failures', 'last_launched', 'score', 'score_time')
+
+    def __init__(self, count=0, failures=0, last_launched=0.0, score=0.0, score_time=0.0):
+        self.count = count
+        self.failures = failures
+        self.last_launched = last_launched
+        self.score = score            # 衰减后的启动次数
+        self.score_time = score_time  # score 对应的时间
+
+    def add(self, ts, status):
+        self.count += 1
+        if status != LAUNCH_OK:
+            self.failures += 1
+        self.last_launched = max(self.last_launched, ts)
+        self.score = self._decayed(ts) + 1.0
+        self.score_time = max(self.score_time, ts)
+
+    def _decayed(self, now):
+        if self.score_time <= 0:
+            return self.score
+        return self.score * math.pow(0.5, max(0.0, now - self.score_time) / FREQUENCY_HALF_LIFE)
+
+    def frequency(self, now=None):
+        """近期平均每天启动次数"""
+        now = time.time() if now is None else now
+        return self._decayed(now) * math.log(2) / FREQUENCY_HALF_LIFE * 86400
+
+    @property
+    def failure_rate(self):
+        return self.failures / self.count if self.count else 0.0
+
+    def to_list(self):
+        return [self.count, self.failures, self.last_launched, self.score, self.score_time]
+
+
+def format_stats(stats, now=None):
+    """列表中显示的一行统计"""
+    if stats is None or not stats.count:
+        return None
+    now = time.time() if now is None else now
+    parts = [f"启动 {stats.count} 次", f"上次 {_format_ago(now - stats.last_launched)}"]
+    if stats.failures:
+        parts.append(f"失败 {stats.failure_rate:.0%}")
+    return " · ".join(parts)
+
+
+def _format_ago(seconds):
+    if seconds < 60:
+        return "刚刚"
+    if seconds < 3600:
+        return f"{int(seconds // 60)} 分钟前"
+    if seconds < 86400:
+        return f"{int(seconds // 3600)} 小时前"
+    return f"{int(seconds // 86400)} 天前"
+
+
+class LaunchHistory:
+    """启动日志与增量统计，可在任意线程中调用"""
+
+    RING_SIZE = 500           # 内存中保留的最近记录数
+    MAX_RECORDS = 200000      # 日志超过该记录数时截断
+    KEEP_RECORDS = 50000      # 截断后保留的记录数
+    SNAPSHOT_EVERY = 50       # 每追加这么多条保存一次统计快照
+
+    def __init__(self, path=HISTORY_PATH, stats_path=None):
+        self.path = path
+        self.stats_path = stats_path or path + STATS_SUFFIX
+        self.recent = deque(maxlen=self.RING_SIZE)  # [(ts, 路径哈希, 耗时, 结果)]
+        self._stats = {}  # 路径哈希 -> LaunchStats
+        self._lock = threading.Lock()
+        self._opened = False
+        self._generation = 0
+        self._records = 0
+        self._unsaved = 0
+        self._file = None
+
+    # ---- 查询 ----
+
+    def stats_for(self, path):
+        with self._lock:
+            self._open()
+            return self._stats.get(path_hash(path))
+
+    def total_launches(self):
+        with self._lock:
+            self._open()
+            return sum(stats.count for stats in self._stats.values())
+
+    def recent_paths(self, paths):
+        """最近的启动记录中属于 paths 的程序路径，从旧到新"""
+        by_hash = {path_hash(path): path for path in paths}
+        with self._lock:
+            self._open()
+            return [by_hash[entry[1]] for entry in self.recent if entry[1] in by_hash]
+
+    # ---- 修改 ----
+
+    def open(self):
+        """读取快照并重放之后的日志（可以提前在后台线程调用）"""
+        with self._lock:
+            self._open()
+
+    def record(self, path, ok, latency=None, ts=None):
+        """追加一次启动记录并更新统计"""
+        ts = time.time() if ts is None else ts
+        status = LAUNCH_OK if ok else LAUNCH_FAILED
+        entry = (ts, path_hash(path), float('nan') if latency is None else latency, status)
+        with self._lock:
+            self._open()
+            if self._file is None:
+                self._file = open(self.path, 'ab')
+            self._file.write(RECORD.pack(*entry))
+            self._file.flush()
+            self._records += 1
+            self.recent.append(entry)
+            self._apply(entry)
+            self._unsaved += 1
+            if self._records > self.MAX_RECORDS:
+                self._truncate()
+            elif self._unsaved >= self.SNAPSHOT_EVERY:
+                self._save_snapshot()
+
+    def forget(self, path):
+        """程序被移除后丢弃它的统计（日志中的记录随截断淘汰）"""
+        with self._lock:
+            self._open()
+            if self._stats.pop(path_hash(path), None) is not None:
+                self._unsaved += 1
+
+    def close(self):
+        with self._lock:
+            if self._opened and self._unsaved:
+                self._save_snapshot()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    # ---- 内部 ----
+
+    def _apply(self, entry):
+        stats = self._stats.get(entry[1])
+        if stats is None:
+            stats = self._stats[entry[1]] = LaunchStats()
+        stats.add(entry[0], entry[3])
+
+    def _open(self):
+        if self._opened:
+            return
+        self._opened = True
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            data = b''
+        if len(data) < HEADER.size or HEADER.unpack_from(data)[0] != MAGIC:
+            # 新文件或无法识别的文件，重新开始；代数取当前时间，使残留的快照失效
+            self._generation = time.time_ns()
+            atomic_write_bytes(self.path, HEADER.pack(MAGIC, VERSION, 0, self._generation))
+            body = b''
+        else:
+            self._generation = HEADER.unpack_from(data)[3]
+            body = data[HEADER.size:]
+        # 截掉崩溃留下的不完整记录
+        usable = len(body) - len(body) % RECORD.size
+        if usable != len(body):
+            with open(self.path, 'r+b') as f:
+                f.truncate(HEADER.size + usable)
+            body = body[:usable]
+        self._records = usable // RECORD.size
+
+        start = self._load_snapshot()
+        if start is None:
+            self._stats = {}
+            start = 0
+        for entry in RECORD.iter_unpack(body[start * RECORD.size:]):
+            self._apply(entry)
+        tail = max(0, self._records - self.RING_SIZE)
+        self.recent.extend(RECORD.iter_unpack(body[tail * RECORD.size:]))
+        self._unsaved = self._records - start
+
+    def _load_snapshot(self):
+        """返回快照已包含的记录数；快照不存在或与日志不匹配时返回None"""
+        try:
+            with open(self.stats_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if snapshot.get('generation') != self._generation or snapshot.get('records', -1) > self._records:
+            return None
+        self._stats = {int(key): LaunchStats(*values) for key, values in snapshot['stats'].items()}
+        return snapshot['records']
+
+    def _save_snapshot(self):
+        try:
+            atomic_write_json(self.stats_path, {
+                'version': VERSION,
+                'generation': self._generation,
+                'records': self._records,
+                'stats': {str(key): stats.to_list() for key, stats in self._stats.items()},
+            })
+            self._unsaved = 0
+        except OSError:
+            pass  # 快照只是加速启动，失败时下次重放完整日志
+
+    def _truncate(self):
+        """只保留最近的记录，代数加一使旧快照失效，然后保存新快照"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        with open(self.path, 'rb') as f:
+            f.seek(HEADER.size + (self._records - self.KEEP_RECORDS) * RECORD.size)
+            body = f.read()
+        self._generation += 1
+        atomic_write_bytes(self.path, HEADER.pack(MAGIC, VERSION, 0, self._generation) + body)
+        self._records = len(body) // RECORD.size
+        self._save_snapshot()
@@ -0,0 +1,231 @@
+"""启动概率预览与抽样验证
+
+launch_odds() 按与 draw_launch 相同的规则计算下一次随机启动时每个程序的精确概率：
+先是"你不许启动"，再是"下次必中"，其余按抽样器中的权重（优先级、启用状态、
+路径检查结果和最近启动策略的系数）分配。"保证轮到"到期的程序会优先启动，预览不包含这一项。
+
+verify_sampler() 对抽样器做大量模拟抽取，与期望概率比较：
+- 安装了 NumPy 时按批生成随机数，在抽样器自己的树状数组上向量化执行同样的查找，
+  几百万次抽取通常在一秒内完成。这条路径是查找逻辑的重新实现，检验的是树状数组
+  中的权重，并不调用 WeightedSampler 本身的代码
+- 没有 NumPy 时直接调用 draw_launch 逐次抽取（次数上限为 PYTHON_MAX_DRAWS）
+每个程序的抽中次数按二项分布计算精确的双侧尾概率，低于 FALSE_ALARM 除以
+比较项数（Bonferroni 校正）的被标出，期望次数很小时也不会误报；
+同时给出整体卡方检验的近似 z 值，超过 Z_LIMIT 时判为异常。
+NumPy 只在模拟时才导入，命令行的其他命令不需要为它付出导入时间。
+"""
+import importlib.util
+import math
+import random
+import time
+
+from sampler import draw_launch, NO_LAUNCH, RANDOM
+
+DEFAULT_DRAWS = 2000000
+BATCH_SIZE = 1 << 18
+PYTHON_MAX_DRAWS = 200000
+# 整体卡方检验的阈值
+Z_LIMIT = 5.0
+# 抽样正确时仍有程序被标出的概率上限
+FALSE_ALARM = 1e-6
+# 偏差不超过该值个标准差时尾概率远大于阈值，不必精确计算
+Z_SKIP = 3.0
+# 卡方检验只统计期望次数不少于该值的程序
+MIN_EXPECTED = 5.0
+
+
+def have_numpy():
+    """是否安装了 NumPy（只查找，不导入）"""
+    return importlib.util.find_spec('numpy') is not None
+
+
+class LaunchOdds:
+    """一次随机启动的结果概率"""
+    __slots__ = ('no_launch', 'empty', 'forced', 'rows')
+
+    def __init__(self, no_launch, empty, forced, rows):
+        self.no_launch = no_launch  # 命中"你不许启动"的概率
+        self.empty = empty          # 没有可启动程序的概率
+        self.forced = forced        # 生效的"下次必中"程序记录，没有时为None
+        self.rows = rows            # [(记录, 权重, 概率)]，按概率从高到低
+
+
+def launch_odds(registry, no_launch_probability, group=None):
+    """计算从分组 group（None 为当前分组）随机启动时各程序的精确概率"""
+    sampler = registry.sampler_for(group)
+    items = sampler.items() if sampler is not None else []
+    total = sum(weight for _, weight in items)
+    launch = 1.0 - no_launch_probability
+    forced = None
+    if sampler is not None and registry.next_program is not None and sampler.weight(registry.next_program) > 0:
+        forced = registry.get(registry.next_program)
+
+    rows = []
+    for path, weight in items:
+        if total <= 0:
+            probability = 0.0
+        elif forced is not None:
+            probability = launch if path == forced.path else 0.0
+        else:
+            probability = launch * weight / total
+        rows.append((registry.get(path), weight, probability))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return LaunchOdds(no_launch_probability, launch if total <= 0 else 0.0, forced, rows)
+
+
+class VerifyResult:
+    """模拟抽取与期望概率的比较结果"""
+    __slots__ = ('method', 'draws', 'elapsed', 'no_launch', 'expected_no_launch',
+                 'counts', 'expected', 'flagged', 'chi2_z', 'misses')
+
+    def __init__(self, method, draws):
+        self.method = method      # 'numpy' 或 'python'
+        self.draws = draws
+        self.elapsed = 0.0
+        self.no_launch = 0
+        self.expected_no_launch = 0.0
+        self.counts = {}          # 键 -> 抽中次数
+        self.expected = {}        # 键 -> 期望次数
+        self.flagged = []         # [(键, 抽中次数, 期望次数, z)]，按偏差从大到小
+        self.chi2_z = 0.0         # 整体卡方统计量换算的 z 值
+        self.misses = 0           # 落到权重为0的槽位的次数（浮点误差，正常应为0）
+
+    @property
+    def ok(self):
+        return not self.flagged and self.chi2_z < Z_LIMIT and not self.misses
+
+
+def verify_sampler(sampler, no_launch_probability=0.1, draws=DEFAULT_DRAWS, seed=None, use_numpy=None):
+    """模拟 draws 次抽取并与期望比较，返回 VerifyResult"""
+    if use_numpy is None:
+        use_numpy = have_numpy()
+    start = time.perf_counter()
+    if use_numpy:
+        result = _simulate_numpy(sampler, no_launch_probability, draws, seed)
+    else:
+        result = _simulate_python(sampler, no_launch_probability, min(draws, PYTHON_MAX_DRAWS), seed)
+    result.elapsed = time.perf_counter() - start
+    _compare(result, sampler, no_launch_probability)
+    return result
+
+
+def _simulate_python(sampler, no_launch_probability, draws, seed):
+    result = VerifyResult('python', draws)
+    rng = random.Random(seed)
+    counts = result.counts
+    for _ in range(draws):
+        status, key = draw_launch(sampler, None, no_launch_probability, rng)
+        if status == RANDOM:
+            counts[key] = counts.get(key, 0) + 1
+        elif status == NO_LAUNCH:
+            result.no_launch += 1
+        else:
+            result.misses += 1
+    return result
+
+
+def _simulate_numpy(sampler, no_launch_probability, draws, seed):
+    """在抽样器的树状数组上按批执行与 WeightedSampler._find 相同的查找"""
+    import numpy
+    result = VerifyResult('numpy', draws)
+    keys, weights, tree = sampler.arrays()
+    size = len(weights)
+    rng = numpy.random.default_rng(seed)
+    # 树状数组补齐到2的幂，超出部分为无穷大，查找时不需要判断越界
+    padded = numpy.full((1 << size.bit_length()) + 1, numpy.inf)
+    padded[:len(tree)] = tree
+    weights = numpy.asarray(weights, dtype=numpy.float64)
+    total = sampler.total
+    counts = numpy.zeros(size, dtype=numpy.int64)
+    remaining = draws
+    while remaining > 0:
+        batch = min(BATCH_SIZE, remaining)
+        remaining -= batch
+        launched = rng.random(batch) >= no_launch_probability
+        result.no_launch += batch - int(launched.sum())
+        if total <= 0 or not size:
+            result.misses += int(launched.sum())
+            continue
+        target = rng.random(int(launched.sum())) * total
+        pos = numpy.zeros(len(target), dtype=numpy.int64)
+        step = 1 << (size.bit_length() - 1)
+        while step:
+            values = padded[pos + step]
+            take = values <= target
+            pos += take * step
+            target -= numpy.where(take, values, 0.0)
+            step >>= 1
+        valid = pos < size
+        valid[valid] = weights[pos[valid]] > 0
+        result.misses += int(len(pos) - valid.sum())
+        counts += numpy.bincount(pos[valid], minlength=size)
+    for slot in numpy.flatnonzero(counts):
+        result.counts[keys[slot]] = int(counts[slot])
+    return result
+
+
+def _compare(result, sampler, no_launch_probability):
+    n = result.draws
+    total = sampler.total
+    launch = 1.0 - no_launch_probability
+    result.expected_no_launch = n * no_launch_probability
+    expected = result.expected
+    if total > 0:
+        for key, weight in sampler.items():
+            expected[key] = n * launch * weight / total
+
+    chi2 = 0.0
+    categories = 0
+    flagged = []
+    cells = [(None, result.no_launch, result.expected_no_launch)]
+    cells.extend((key, result.counts.get(key, 0), e) for key, e in expected.items())
+    # 期望为0却被抽中的键（例如已移除或权重为0）
+    cells.extend((key, count, 0.0) for key, count in result.counts.items() if key not in expected)
+    alpha = FALSE_ALARM / len(cells)
+    for key, observed, e in cells:
+        if e <= 0:
+            if observed:
+                flagged.append((key, observed, e, math.inf))
+            continue
+        q = min(1.0, e / n)
+        sd = math.sqrt(e * (1.0 - q))
+        z = (observed - e) / sd if sd > 0 else (0.0 if observed == e else math.inf)
+        if abs(z) > Z_SKIP and 2.0 * _binomial_tail(observed, n, q) < alpha:
+            flagged.append((key, observed, e, z))
+        if e >= MIN_EXPECTED:
+            chi2 += (observed - e) ** 2 / e
+            categories += 1
+    flagged.sort(key=lambda row: abs(row[3]), reverse=True)
+    result.flagged = flagged
+    result.chi2_z = _chi2_z(chi2, categories - 1)
+
+
+def _binomial_tail(k, n, q):
+    """X ~ B(n, q) 时 k 所在一侧的精确尾概率：k 高于期望为 P(X >= k)，否则为 P(X <= k)"""
+    if q >= 1.0:
+        return 1.0 if k == n else 0.0
+    log_pk = (math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+              + k * math.log(q) + (n - k) * math.log1p(-q))
+    # 从 k 向远离期望的方向累加，各项相对 P(X = k) 单调减小，小到可以忽略时停止
+    odds = q / (1.0 - q)
+    term = tail = 1.0
+    i = k
+    if k > n * q:
+        while i < n and term > 1e-17 * tail:
+            term *= (n - i) / (i + 1) * odds
+            tail += term
+            i += 1
+    else:
+        while i > 0 and term > 1e-17 * tail:
+            term *= i / (n - i + 1) / odds
+            tail += term
+            i -= 1
+    return min(1.0, math.exp(log_pk) * tail)
+
+
+def _chi2_z(chi2, df):
+    """卡方统计量的 Wilson–Hilferty 正态近似"""
+    if df <= 0:
+        return 0.0
+    a = 2.0 / (9.0 * df)
+    return ((chi2 / df) ** (1.0 / 3.0) - (1.0 - a)) / math.sqrt(a)
@@ -0,0 +1,327 @@
+"""命令行启动模式
+
+只导入注册表、存储和抽样模块，不导入 PyQt5：读取配置，按与界面相同的
+优先级、启用状态、"下次必中"和"你不许启动"规则抽取一个程序，启动后立即退出。
+适合绑定到全局快捷键。
+
+已经有启动器窗口在运行时，命令转发给它执行（见 instance_ipc.py），配置只由一个进程写入。
+
+用法：
+    python RandomAppLauncher.py                      显示已运行的窗口，没有时启动界面
+    python RandomAppLauncher.py --launch             抽取并启动
+    python RandomAppLauncher.py --pick               只输出抽中的程序，不启动，也不消耗"下次必中"
+    python RandomAppLauncher.py --launch --group 游戏 从指定分组中抽取（默认为界面中选择的分组）
+    python RandomAppLauncher.py --add PATH [PATH...]  添加程序
+    python RandomAppLauncher.py --set-priority PATH N 设置优先级
+    python RandomAppLauncher.py --stats              显示启动统计（实际启动占比与优先级占比）
+    python RandomAppLauncher.py --list --filter Q    列出满足查询的程序（查询语法见 search_index.py）
+    python RandomAppLauncher.py --disable --filter Q 禁用满足查询的程序（还有 --enable、--prioritize N）
+    python RandomAppLauncher.py --launch --filter Q  只从满足查询的程序中抽取
+    python RandomAppLauncher.py --odds               输出下一次随机启动时各程序的精确概率
+    python RandomAppLauncher.py --verify             模拟大量抽取，检查抽样是否符合期望概率
+"""
+import argparse
+import os
+import sys
+import time
+
+from instance_ipc import send_command
+from launch_history import LaunchHistory
+from program_registry import ProgramRegistry
+from recency import RecencyPolicy
+from search_index import SearchIndex, QueryError, parse_query
+from path_health import STATUS_OK, check_path
+from sampler import NO_LAUNCH, EMPTY
+import storage
+
+# 退出码
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_NO_LAUNCH = 2
+
+# 抽中的文件不可用时最多重抽的次数
+MAX_REDRAWS = 16
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='RandomAppLauncher', description="随机应用启动器命令行模式")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--show', action='store_true', help="显示启动器窗口（默认）")
+    mode.add_argument('--launch', action='store_true', help="抽取并启动一个程序")
+    mode.add_argument('--pick', action='store_true', help="只输出抽中的程序路径，不启动")
+    mode.add_argument('--add', nargs='+', metavar='PATH', help="添加程序")
+    mode.add_argument('--set-priority', nargs=2, metavar=('PATH', 'N'), help="设置程序的优先级（1-10）")
+    mode.add_argument('--stats', action='store_true', help="显示启动统计")
+    mode.add_argument('--list', action='store_true', help="列出程序（可用 --filter 筛选）")
+    mode.add_argument('--enable', action='store_true', help="启用 --filter 筛选出的程序")
+    mode.add_argument('--disable', action='store_true', help="禁用 --filter 筛选出的程序")
+    mode.add_argument('--prioritize', metavar='N', help="把 --filter 筛选出的程序设为优先级 N")
+    mode.add_argument('--odds', action='store_true', help="输出各程序被启动的精确概率")
+    mode.add_argument('--verify', action='store_true', help="模拟抽取并与期望概率比较，有偏差时返回 1")
+    parser.add_argument('--draws', type=int,
+                        help="--verify 模拟的次数（默认 2000000）")
+    parser.add_argument('--seed', type=int,
+                        help="本次使用的随机种子（默认每次不同，不使用设置中保存的种子）")
+    parser.add_argument('--filter', metavar='QUERY',
+                        help="查询条件，如 'chrome is:enabled priority:>=5'，用于 --launch/--pick/--list 和批量操作")
+    parser.add_argument('--group', metavar='NAME',
+                        help="从指定分组中抽取（默认为界面中选择的分组，空字符串表示全部程序）")
+    parser.add_argument('--storage', choices=('json', 'sqlite'), help="存储后端（默认按环境变量或自动选择）")
+    parser.add_argument('--no-launch-probability', type=float, default=0.1,
+                        help="不启动任何程序的概率（默认 %(default)s）")
+    parser.add_argument('--profile-startup', action='store_true', help="打印界面启动各阶段的耗时")
+    return parser
+
+
+def draw_available(registry, no_launch_probability, group=None, subset=None):
+    """抽取一个程序；抽中的文件不存在或不可执行时标记后重抽"""
+    for _ in range(MAX_REDRAWS):
+        status, program = registry.draw(no_launch_probability, group=group, subset=subset)
+        if program is None:
+            return status, None
+        program_status = check_path(program.path)
+        if program_status == STATUS_OK:
+            return status, program
+        registry.set_status(program.path, program_status)
+        # 重抽时不再判断"你不许启动"
+        no_launch_probability = 0.0
+    return EMPTY, None
+
+
+def command_message(args):
+    """转发给已运行实例的命令；--pick 只读配置，不转发"""
+    if args.launch:
+        message = {'cmd': 'launch'}
+        if args.group is not None:
+            message['group'] = args.group
+        if args.filter:
+            message['filter'] = args.filter
+        return message
+    if args.enable or args.disable or args.prioritize:
+        if not args.filter:
+            raise SystemExit("批量操作需要用 --filter 指定查询条件")
+        check_query(args.filter)
+        if args.prioritize:
+            return {'cmd': 'bulk', 'filter': args.filter, 'action': 'priority',
+                    'priority': parse_priority(args.prioritize)}
+        return {'cmd': 'bulk', 'filter': args.filter, 'action': 'enable' if args.enable else 'disable'}
+    if args.add:
+        return {'cmd': 'add', 'paths': [os.path.abspath(path) for path in args.add]}
+    if args.set_priority:
+        path, priority = args.set_priority
+        return {'cmd': 'set_priority', 'path': os.path.abspath(path), 'priority': parse_priority(priority)}
+    if args.pick or args.stats or args.list or args.odds or args.verify:
+        return None
+    return {'cmd': 'show'}
+
+
+def parse_priority(value):
+    try:
+        priority = int(value)
+    except ValueError:
+        priority = 0
+    if not 1 <= priority <= 10:
+        raise SystemExit(f"优先级必须是 1-10 的整数: {value}")
+    return priority
+
+
+def check_query(text):
+    try:
+        parse_query(text)
+    except QueryError as e:
+        raise SystemExit(str(e))
+
+
+def report_launch(status, name):
+    if status == NO_LAUNCH:
+        print("你不许启动")
+        return EXIT_NO_LAUNCH
+    if name is None:
+        print("没有可启动的程序", file=sys.stderr)
+        return EXIT_ERROR
+    print(f"正在启动: {name}")
+    return EXIT_OK
+
+
+def report_reply(message, reply):
+    if not reply.get('ok'):
+        print(f"启动器返回错误: {reply.get('error')}", file=sys.stderr)
+        return EXIT_ERROR
+    if message['cmd'] == 'launch':
+        return report_launch(reply.get('status'), reply.get('name'))
+    if message['cmd'] == 'add':
+        print(f"已添加 {reply.get('added', 0)} 个程序")
+    if message['cmd'] == 'bulk':
+        print(f"已修改 {reply.get('matched', 0)} 个程序")
+    return EXIT_OK
+
+
+def dispatch(argv):
+    """处理命令行参数；需要启动界面时返回None，否则返回退出码"""
+    args, _ = build_parser().parse_known_args(argv)
+    message = command_message(args)
+    if message is not None:
+        try:
+            reply = send_command(message)
+        except (OSError, ValueError) as e:
+            print(f"无法与正在运行的启动器通信: {e}", file=sys.stderr)
+            return EXIT_ERROR
+        if reply is not None:
+            return report_reply(message, reply)
+        if message['cmd'] == 'show':
+            return None
+    return run_local(args)
+
+
+def run_local(args):
+    """没有实例在运行时直接读写配置"""
+    backend = storage.open_backend(args.storage)
+    history = LaunchHistory()
+    try:
+        state = backend.load()
+        registry = ProgramRegistry()
+        registry.load(state['programs'], state['next_program'], state.get('settings'))
+        # 设置中保存的种子只用于界面：命令行每次都是重新加载，沿用它会每次抽中同一个程序
+        registry.rng.seed(args.seed)
+        policy = RecencyPolicy.from_settings(registry.settings.get('sampling_policy'))
+        if policy is not None:
+            # 策略状态不随配置保存，按启动历史重建，与界面中连续启动的结果一致
+            registry.set_policy(policy, history.recent_paths(record.path for record in registry))
+        ops = []
+        registry.operation.connect(ops.append)
+
+        if args.add:
+            added = [path for path in args.add if registry.add(os.path.abspath(path)) is not None]
+            backend.apply(ops)
+            print(f"已添加 {len(added)} 个程序")
+            return EXIT_OK
+        if args.set_priority:
+            path, priority = args.set_priority
+            if registry.set_priority(os.path.abspath(path), parse_priority(priority)) is None:
+                print(f"程序不存在: {path}", file=sys.stderr)
+                return EXIT_ERROR
+            backend.apply(ops)
+            return EXIT_OK
+
+        if args.stats:
+            print_stats(registry, history)
+            return EXIT_OK
+        if args.odds:
+            # 导入放在这里，其他命令不需要加载概率模块
+            from launch_odds import launch_odds
+            print_odds(launch_odds(registry, args.no_launch_probability, args.group))
+            return EXIT_OK
+        if args.verify:
+            return run_verify(registry, args)
+
+        subset = None
+        if args.filter:
+            check_query(args.filter)
+            subset = SearchIndex(registry).search(args.filter)
+        if args.list:
+            for program in (subset if subset is not None else registry):
+                print(program.path)
+            return EXIT_OK
+        if args.enable or args.disable or args.prioritize:
+            priority = parse_priority(args.prioritize) if args.prioritize else None
+            for program in subset:
+                if priority is not None:
+                    registry.set_priority(program.path, priority)
+                else:
+                    registry.set_enabled(program.path, bool(args.enable))
+            backend.apply(ops)
+            print(f"已修改 {len(subset)} 个程序")
+            return EXIT_OK
+
+        if args.group and args.group not in registry.groups():
+            print(f"分组不存在: {args.group}", file=sys.stderr)
+            return EXIT_ERROR
+        status, program = draw_available(registry, args.no_launch_probability, args.group, subset)
+        if program is None or args.pick:
+            if program is not None:
+                print(program.path)
+                return EXIT_OK
+            return report_launch(status, None)
+
+        # 导入放在这里，--pick 不需要进程相关模块
+        from launch_backend import default_backend
+        start = time.perf_counter()
+        try:
+            default_backend().spawn(program.path)
+        except Exception as e:
+            history.record(program.path, False, time.perf_counter() - start)
+            print(f"启动程序时出错: {e}", file=sys.stderr)
+            return EXIT_ERROR
+        history.record(program.path, True, time.perf_counter() - start)
+        # 命中"下次必中"后需要清除，与界面的行为一致
+        if ops:
+            backend.apply(ops)
+        return report_launch(status, program.name)
+    finally:
+        history.close()
+        backend.close()
+
+
+def print_stats(registry, history):
+    """按程序输出启动次数、实际启动占比与按优先级计算的期望占比"""
+    rows = [(record, history.stats_for(record.path)) for record in registry]
+    launched = sum(stats.count for _, stats in rows if stats is not None)
+    total_weight = registry.sampler.total
+    print(f"{'名称':<24}{'优先级':>6}{'期望占比':>10}{'实际占比':>10}{'次数':>8}{'失败率':>8}{'次/天':>8}  上次启动")
+    for record, stats in rows:
+        expected = record.weight / total_weight if total_weight else 0.0
+        count = stats.count if stats else 0
+        observed = count / launched if launched else 0.0
+        failure_rate = f"{stats.failure_rate:.0%}" if stats else '-'
+        frequency = f"{stats.frequency():.2f}" if stats else '-'
+        last = time.strftime('%Y-%m-%d %H:%M', time.localtime(stats.last_launched)) if stats else '-'
+        print(f"{record.name:<24}{record.priority:>6}{expected:>10.1%}{observed:>10.1%}"
+              f"{count:>8}{failure_rate:>8}{frequency:>8}  {last}")
+    print(f"共启动 {launched} 次")
+
+
+def print_odds(odds):
+    """输出下一次随机启动的结果概率"""
+    print(f"你不许启动: {odds.no_launch:.2%}")
+    if odds.forced is not None:
+        print(f"下次必中: {odds.forced.name}")
+    if odds.empty:
+        print(f"没有可启动的程序: {odds.empty:.2%}")
+    print(f"{'名称':<24}{'优先级':>6}{'权重':>8}{'概率':>10}")
+    for record, weight, probability in odds.rows:
+        print(f"{record.name:<24}{record.priority:>6}{weight:>8g}{probability:>10.3%}")
+
+
+def run_verify(registry, args):
+    """模拟抽取当前分组，检查各程序的抽中比例是否符合期望"""
+    from launch_odds import DEFAULT_DRAWS, verify_sampler
+    sampler = registry.sampler_for(args.group)
+    if sampler is None or sampler.total <= 0:
+        print("没有可启动的程序", file=sys.stderr)
+        return EXIT_ERROR
+    draws = args.draws if args.draws is not None else DEFAULT_DRAWS
+    result = verify_sampler(sampler, args.no_launch_probability, draws, args.seed)
+    method = "NumPy" if result.method == 'numpy' else "逐次抽取（未安装 NumPy）"
+    print(f"{method}模拟 {result.draws} 次，用时 {result.elapsed * 1000:.0f} ms")
+    print(f"你不许启动: {result.no_launch / result.draws:.3%}（期望 {result.expected_no_launch / result.draws:.3%}）")
+    print(f"整体卡方 z = {result.chi2_z:.2f}")
+    for key, observed, expected, z in result.flagged:
+        record = registry.get(key) if key is not None else None
+        name = "你不许启动" if key is None else (record.name if record else key)
+        print(f"偏差过大: {name} 抽中 {observed} 次，期望 {expected:.1f} 次（z = {z:+.1f}）")
+    if result.misses:
+        print(f"{result.misses} 次落到权重为0的位置")
+    print("抽样与期望概率一致" if result.ok else "发现异常")
+    return EXIT_OK if result.ok else EXIT_ERROR
+
+
+def main(argv=None):
+    exit_code = dispatch(sys.argv[1:] if argv is None else argv)
+    if exit_code is None:
+        print("启动器没有在运行", file=sys.stderr)
+        return EXIT_ERROR
+    return exit_code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
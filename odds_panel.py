@@ -0,0 +1,175 @@
+"""启动概率预览
+
+显示当前分组中每个程序下一次被随机启动的精确概率（见 launch_odds.py），
+并可以在后台线程中模拟大量抽取，验证实际抽样与期望概率是否一致。
+"""
+import threading
+
+from PyQt5.QtCore import pyqtSignal
+from PyQt5.QtWidgets import (
+    QDialog, QHBoxLayout, QHeaderView, QLabel, QLineEdit, QPushButton, QSpinBox,
+    QTableWidget, QTableWidgetItem, QVBoxLayout
+)
+
+import theme
+from launch_odds import DEFAULT_DRAWS, PYTHON_MAX_DRAWS, Z_LIMIT, have_numpy, launch_odds, verify_sampler
+
+
+class LaunchOddsPanel(QDialog):
+    """概率预览面板"""
+    verified = pyqtSignal(object)
+
+    COLUMNS = ("程序", "优先级", "状态", "概率", "模拟", "偏差(σ)")
+    # 程序很多时只列出概率最高的这些行
+    MAX_ROWS = 500
+
+    def __init__(self, launcher, parent=None):
+        super().__init__(parent)
+        self._launcher = launcher
+        self._rows = {}  # path -> 表格行号
+        self._verifying = False
+        self.setWindowTitle("概率预览")
+        self.resize(720, 480)
+
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        refresh_btn = QPushButton("刷新")
+        refresh_btn.clicked.connect(self.refresh)
+
+        self.draws_spin = QSpinBox()
+        self.draws_spin.setRange(1, 100)
+        self.draws_spin.setSuffix(" 百万次")
+        self.draws_spin.setValue(max(1, DEFAULT_DRAWS // 1000000))
+        self.seed_edit = QLineEdit()
+        self.seed_edit.setPlaceholderText("种子（留空为随机）")
+        self.seed_edit.setMaximumWidth(140)
+        self.verify_btn = QPushButton("模拟验证")
+        self.verify_btn.clicked.connect(self.start_verify)
+        self.verify_label = QLabel()
+        self.verify_label.setWordWrap(True)
+        if not have_numpy():
+            self.draws_spin.setEnabled(False)
+            self.verify_label.setText(f"未安装 NumPy，模拟次数限制为 {PYTHON_MAX_DRAWS} 次")
+
+        controls = QHBoxLayout()
+        controls.addWidget(refresh_btn)
+        controls.addStretch(1)
+        controls.addWidget(self.draws_spin)
+        controls.addWidget(self.seed_edit)
+        controls.addWidget(self.verify_btn)
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(self.summary_label)
+        layout.addWidget(self.table, 1)
+        layout.addLayout(controls)
+        layout.addWidget(self.verify_label)
+
+        self.verified.connect(self.on_verified)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+
+    def refresh(self):
+        """按注册表的当前状态重新计算概率"""
+        registry = self._launcher.registry
+        odds = launch_odds(registry, self._launcher.no_launch_probability / 100)
+        group = registry.active_group or "全部程序"
+        parts = [f"分组: {group}", f"你不许启动: {odds.no_launch:.1%}"]
+        if odds.forced is not None:
+            parts.append(f"下次必中: {odds.forced.name}")
+        if odds.empty:
+            parts.append(f"没有可启动的程序: {odds.empty:.1%}")
+        if len(odds.rows) > self.MAX_ROWS:
+            rest = sum(row[2] for row in odds.rows[self.MAX_ROWS:])
+            parts.append(f"只显示概率最高的 {self.MAX_ROWS} 个，其余 {len(odds.rows) - self.MAX_ROWS} 个合计 {rest:.2%}")
+        self.summary_label.setText("；".join(parts))
+
+        rows = odds.rows[:self.MAX_ROWS]
+        self._rows = {}
+        self.table.setRowCount(len(rows))
+        for row, (record, weight, probability) in enumerate(rows):
+            self._rows[record.path] = row
+            if not record.enabled:
+                state = "未启用"
+            elif not record.available:
+                state = "不可用"
+            else:
+                state = "可启动"
+            name_item = QTableWidgetItem(record.name)
+            name_item.setToolTip(record.path)
+            self.table.setItem(row, 0, name_item)
+            self.table.setItem(row, 1, QTableWidgetItem(str(record.priority)))
+            self.table.setItem(row, 2, QTableWidgetItem(state))
+            self.table.setItem(row, 3, QTableWidgetItem(f"{probability:.4%}"))
+            self.table.setItem(row, 4, QTableWidgetItem(''))
+            self.table.setItem(row, 5, QTableWidgetItem(''))
+        self.verify_btn.setEnabled(not self._verifying and odds.forced is None and not odds.empty)
+
+    def start_verify(self):
+        """在后台线程中模拟抽取"""
+        seed_text = self.seed_edit.text().strip()
+        try:
+            seed = int(seed_text) if seed_text else None
+        except ValueError:
+            self.verify_label.setText(f"种子必须是整数: {seed_text}")
+            return
+        registry = self._launcher.registry
+        sampler = registry.sampler_for(None)
+        if sampler is None:
+            return
+        # 抽样器会继续被界面线程修改，验证使用副本（保留树状数组的当前状态）
+        snapshot = sampler.copy()
+        draws = self.draws_spin.value() * 1000000
+        no_launch = self._launcher.no_launch_probability / 100
+        self._verifying = True
+        self.verify_btn.setEnabled(False)
+        self.verify_label.setText("正在模拟…")
+        threading.Thread(
+            target=lambda: self.verified.emit(verify_sampler(snapshot, no_launch, draws, seed)),
+            name='odds-verify', daemon=True
+        ).start()
+
+    def on_verified(self, result):
+        self._verifying = False
+        self.refresh()
+        for path, row in self._rows.items():
+            observed = result.counts.get(path, 0)
+            expected = result.expected.get(path, 0.0)
+            self.table.item(row, 4).setText(f"{observed / result.draws:.4%}")
+            if expected > 0:
+                sd = (expected * (1 - expected / result.draws)) ** 0.5
+                self.table.item(row, 5).setText(f"{(observed - expected) / sd:+.2f}" if sd else "0")
+        for key, observed, expected, z in result.flagged:
+            row = self._rows.get(key)
+            if row is not None:
+                for column in range(len(self.COLUMNS)):
+                    self.table.item(row, column).setBackground(theme.color('highlight_error'))
+
+        method = "NumPy" if result.method == 'numpy' else "逐次抽取"
+        text = (f"{method}模拟 {result.draws} 次，用时 {result.elapsed * 1000:.0f} ms；"
+                f"你不许启动 {result.no_launch / result.draws:.2%}（期望 {result.expected_no_launch / result.draws:.2%}）；"
+                f"整体卡方 z = {result.chi2_z:.2f}。")
+        if result.ok:
+            text += "抽样与期望概率一致。"
+        else:
+            problems = []
+            if result.flagged:
+                names = []
+                for key, _, _, _ in result.flagged[:5]:
+                    record = self._launcher.registry.get(key) if key is not None else None
+                    names.append("你不许启动" if key is None else (record.name if record else key))
+                problems.append(f"{len(result.flagged)} 项偏差过大（{', '.join(names)}）")
+            if result.misses:
+                problems.append(f"{result.misses} 次落到权重为0的位置")
+            if result.chi2_z >= Z_LIMIT:
+                problems.append("整体分布偏离期望")
+            text += "发现异常：" + "；".join(problems)
+        self.verify_label.setText(text)
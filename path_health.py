@@ -0,0 +1,112 @@
+"""程序路径健康检查
+
+在线程池中对已注册的路径执行 stat，判断文件是否存在、能否启动。
+每次检查都重新判断状态（主要开销是 stat 本身，缓存状态省不下什么）；
+每个路径只记住上次检查时的 (mtime, 大小)，用来发现文件的变化。
+结果分批通过 on_result([(path, status), ...]) 回调（在工作线程中调用）；
+与上次检查相比被修改、替换或删除的文件另外通过 on_modified([path, ...]) 回调。
+"""
+import os
+import stat
+import threading
+
+STATUS_OK = 'ok'
+STATUS_MISSING = 'missing'
+STATUS_NOT_EXECUTABLE = 'not_executable'
+
+STATUS_LABELS = {
+    STATUS_MISSING: "文件不存在",
+    STATUS_NOT_EXECUTABLE: "不可执行",
+}
+
+# Windows 下除 PATHEXT 外也能直接打开的快捷方式类型
+_WINDOWS_SHORTCUT_EXTS = ('.lnk', '.url', '.appref-ms')
+
+
+def windows_executable_exts():
+    pathext = os.environ.get('PATHEXT', '.COM;.EXE;.BAT;.CMD')
+    return tuple(ext.lower() for ext in pathext.split(';') if ext) + _WINDOWS_SHORTCUT_EXTS
+
+
+def classify_path(path, st, exec_exts=None):
+    """根据 stat 结果判断路径能否启动"""
+    if stat.S_ISDIR(st.st_mode):
+        # macOS 的 .app 包是目录
+        return STATUS_OK if path.endswith('.app') else STATUS_NOT_EXECUTABLE
+    if not stat.S_ISREG(st.st_mode):
+        return STATUS_NOT_EXECUTABLE
+    if os.name == 'nt':
+        exec_exts = exec_exts or windows_executable_exts()
+        return STATUS_OK if path.lower().endswith(exec_exts) else STATUS_NOT_EXECUTABLE
+    if path.endswith('.desktop') or os.access(path, os.X_OK):
+        return STATUS_OK
+    return STATUS_NOT_EXECUTABLE
+
+
+def check_path(path):
+    """同步检查单个路径"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return STATUS_MISSING
+    return classify_path(path, st)
+
+
+class PathHealthChecker:
+    """后台路径检查器"""
+
+    BATCH_SIZE = 256
+
+    def __init__(self, max_workers=8, on_result=None, on_modified=None):
+        self.on_result = on_result
+        self.on_modified = on_modified
+        # 命令行只用 check_path，线程池模块在这里才导入
+        from concurrent.futures import ThreadPoolExecutor
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='path-health')
+        self._lock = threading.Lock()
+        self._signatures = {}  # path -> 上次检查时的 (mtime_ns, size)
+        self._exec_exts = windows_executable_exts() if os.name == 'nt' else None
+
+    def check(self, paths):
+        """分批提交检查任务，立即返回 Future 列表"""
+        paths = list(paths)
+        return [
+            self._executor.submit(self._check_batch, paths[i:i + self.BATCH_SIZE])
+            for i in range(0, len(paths), self.BATCH_SIZE)
+        ]
+
+    def forget(self, path):
+        """程序被移除后丢弃它上次检查时的状态"""
+        with self._lock:
+            self._signatures.pop(path, None)
+
+    def shutdown(self, wait=False):
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _check_batch(self, paths):
+        results = []
+        modified = []
+        for path in paths:
+            status, changed = self._check_one(path)
+            results.append((path, status))
+            if changed:
+                modified.append(path)
+        if self.on_result is not None:
+            self.on_result(results)
+        if modified and self.on_modified is not None:
+            self.on_modified(modified)
+        return results
+
+    def _check_one(self, path):
+        """返回 (状态, 文件是否在上次检查之后变化)"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                previous = self._signatures.pop(path, None)
+            return STATUS_MISSING, previous is not None
+        signature = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            previous = self._signatures.get(path)
+            self._signatures[path] = signature
+        return classify_path(path, st, self._exec_exts), previous not in (None, signature)
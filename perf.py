@@ -0,0 +1,187 @@
+"""性能统计
+
+在热点路径上用 span(name) 计时、count(name) 计数。默认关闭，关闭时 span() 返回
+共享的空对象，只多一次全局变量判断。开启后（设置环境变量
+RANDOM_APP_LAUNCHER_PERF=1，或在设置菜单的性能面板中勾选）记录：
+- 计数器
+- 耗时直方图（按 2 的幂微秒分桶，可估算分位数）
+- 最近的计时事件，可导出为 Chrome trace 格式（chrome://tracing 或 Perfetto 打开）
+
+可以在任意线程中调用。
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+PERF_ENV = 'RANDOM_APP_LAUNCHER_PERF'
+MAX_EVENTS = 20000
+
+_enabled = os.environ.get(PERF_ENV, '') not in ('', '0')
+_lock = threading.Lock()
+_origin = time.perf_counter()
+_counters = {}
+_histograms = {}
+_events = deque(maxlen=MAX_EVENTS)  # (名称, 开始微秒, 耗时微秒, 线程id)
+_thread_names = {}
+
+
+class Histogram:
+    """耗时直方图，第 i 个桶统计 [2^(i-1), 2^i) 微秒"""
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+        self.buckets = []
+
+    def add(self, micros):
+        self.count += 1
+        self.total += micros
+        if self.min is None or micros < self.min:
+            self.min = micros
+        if micros > self.max:
+            self.max = micros
+        index = int(micros).bit_length()
+        if index >= len(self.buckets):
+            self.buckets.extend([0] * (index + 1 - len(self.buckets)))
+        self.buckets[index] += 1
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        """估算分位数（返回所在桶的上界，不超过最大值）"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return min(float(1 << index), self.max)
+        return self.max
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start, self.start)
+        return False
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(on):
+    global _enabled
+    _enabled = bool(on)
+
+
+def span(name):
+    """计时上下文：with perf.span('launch.draw'): ..."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+def count(name, n=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def observe(name, seconds, start=None):
+    """记录一次耗时；start 为 time.perf_counter() 的开始时间，用于导出事件"""
+    if not _enabled:
+        return
+    micros = seconds * 1e6
+    thread = threading.current_thread()
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = Histogram()
+        histogram.add(micros)
+        if start is None:
+            start = time.perf_counter() - seconds
+        _events.append((name, (start - _origin) * 1e6, micros, thread.ident))
+        _thread_names[thread.ident] = thread.name
+
+
+def reset():
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _events.clear()
+
+
+def snapshot():
+    """返回当前统计：{'counters': {名称: 次数}, 'timings': {名称: {count, mean, p50, p95, max}}}（微秒）"""
+    with _lock:
+        counters = dict(_counters)
+        timings = {
+            name: {
+                'count': h.count,
+                'mean': h.mean,
+                'p50': h.percentile(0.5),
+                'p95': h.percentile(0.95),
+                'max': h.max,
+            }
+            for name, h in _histograms.items()
+        }
+    return {'counters': counters, 'timings': timings}
+
+
+def chrome_trace():
+    """生成 Chrome trace-event 格式的数据"""
+    pid = os.getpid()
+    with _lock:
+        events = list(_events)
+        thread_names = dict(_thread_names)
+        counters = dict(_counters)
+    trace = [
+        {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+        for tid, name in thread_names.items()
+    ]
+    trace.extend(
+        {'name': name, 'ph': 'X', 'ts': ts, 'dur': dur, 'pid': pid, 'tid': tid}
+        for name, ts, dur, tid in events
+    )
+    now = (time.perf_counter() - _origin) * 1e6
+    trace.extend(
+        {'name': name, 'ph': 'C', 'ts': now, 'pid': pid, 'args': {'value': value}}
+        for name, value in counters.items()
+    )
+    return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+
+def export_chrome_trace(path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(chrome_trace(), f, ensure_ascii=False)
@@ -0,0 +1,92 @@
+"""性能面板
+
+显示 perf 模块收集的计数器和耗时分布，可开关统计、清空数据和导出 Chrome trace。
+"""
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import (
+    QCheckBox, QDialog, QFileDialog, QHBoxLayout, QHeaderView, QMessageBox,
+    QPushButton, QTableWidget, QTableWidgetItem, QVBoxLayout
+)
+
+import perf
+
+
+class PerfPanel(QDialog):
+    """性能统计面板"""
+
+    COLUMNS = ("名称", "次数", "平均(ms)", "P50(ms)", "P95(ms)", "最大(ms)")
+    REFRESH_INTERVAL = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("性能面板")
+        self.resize(640, 400)
+
+        self.enabled_check = QCheckBox("启用统计")
+        self.enabled_check.setChecked(perf.enabled())
+        self.enabled_check.toggled.connect(perf.set_enabled)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        reset_btn = QPushButton("清空")
+        reset_btn.clicked.connect(self._reset)
+        export_btn = QPushButton("导出 Chrome trace")
+        export_btn.clicked.connect(self._export)
+
+        buttons = QHBoxLayout()
+        buttons.addWidget(self.enabled_check)
+        buttons.addStretch(1)
+        buttons.addWidget(reset_btn)
+        buttons.addWidget(export_btn)
+
+        layout = QVBoxLayout(self)
+        layout.addLayout(buttons)
+        layout.addWidget(self.table)
+
+        # 只在面板可见时刷新
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.enabled_check.setChecked(perf.enabled())
+        self.refresh()
+        self._timer.start()
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def refresh(self):
+        data = perf.snapshot()
+        rows = [
+            (name, t['count'], t['mean'], t['p50'], t['p95'], t['max'])
+            for name, t in sorted(data['timings'].items())
+        ]
+        rows.extend((name, value, None, None, None, None) for name, value in sorted(data['counters'].items()))
+        self.table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            name, count = values[:2]
+            self.table.setItem(row, 0, QTableWidgetItem(name))
+            self.table.setItem(row, 1, QTableWidgetItem(str(count)))
+            for column, micros in enumerate(values[2:], 2):
+                text = '' if micros is None else f"{micros / 1000:.3f}"
+                self.table.setItem(row, column, QTableWidgetItem(text))
+
+    def _reset(self):
+        perf.reset()
+        self.refresh()
+
+    def _export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "导出 Chrome trace", "launcher_trace.json", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            perf.export_chrome_trace(path)
+        except OSError as e:
+            QMessageBox.warning(self, "警告", f"导出失败: {e}")
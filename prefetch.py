@@ -0,0 +1,131 @@
+"""启动预读
+
+冷启动大型程序的时间主要花在读盘上。开启预读后，启动器提前预测下一次随机启动的程序
+（ProgramRegistry.predict，规则与实际抽取相同），在后台把它要读取的文件放进系统的页缓存：
+- 有 posix_fadvise 的系统（Linux）用 POSIX_FADV_WILLNEED 让内核异步预读，调用本身立即返回
+- 其他系统按块顺序读一遍文件
+.desktop 文件预读 Exec 指向的程序，macOS 的 .app 包预读 Contents/MacOS 中的文件。
+
+预读在一个单独的低优先级线程中执行（Linux 下把该线程的 nice 值调到最低，
+I/O 优先级随之降低）；新的预测会取消尚未执行的旧预测。
+同一文件在 REFRESH_INTERVAL 内且没有变化时不重复预读。
+"""
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import perf
+from launch_backend import PosixLaunchBackend
+
+# 每个文件最多预读的字节数
+MAX_PREFETCH_BYTES = 512 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+REFRESH_INTERVAL = 600.0
+
+
+def launch_files(path):
+    """启动 path 时需要读取的主要文件"""
+    if path.endswith('.app') and os.path.isdir(path):
+        macos_dir = os.path.join(path, 'Contents', 'MacOS')
+        try:
+            return [entry.path for entry in os.scandir(macos_dir) if entry.is_file()]
+        except OSError:
+            return []
+    if path.endswith('.desktop') and os.name != 'nt':
+        try:
+            argv = PosixLaunchBackend().command_for(path)
+        except (OSError, ValueError):
+            return []
+        program = shutil.which(argv[0]) if argv else None
+        return [program] if program else []
+    return [path]
+
+
+def prefetch_file(path, max_bytes=MAX_PREFETCH_BYTES, cancelled=None):
+    """把文件的前 max_bytes 字节读入页缓存，返回处理的字节数"""
+    fd = os.open(path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        length = min(os.fstat(fd).st_size, max_bytes)
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, length, os.POSIX_FADV_WILLNEED)
+            return length
+        done = 0
+        while done < length:
+            if cancelled is not None and cancelled():
+                break
+            n = len(os.read(fd, CHUNK_SIZE))
+            if not n:
+                break
+            done += n
+        return done
+    finally:
+        os.close(fd)
+
+
+def _lower_priority():
+    """（预读线程）降低本线程的调度优先级"""
+    if sys.platform.startswith('linux'):
+        try:
+            # Linux 的 nice 值按线程生效，PRIO_PROCESS 配合线程号只影响当前线程
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except OSError:
+            pass
+
+
+class Prefetcher:
+    """在后台低优先级线程中预读程序文件"""
+
+    def __init__(self, max_bytes=MAX_PREFETCH_BYTES, refresh_interval=REFRESH_INTERVAL):
+        self.max_bytes = max_bytes
+        self.refresh_interval = refresh_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='prefetch',
+                                            initializer=_lower_priority)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._recent = {}  # 文件 -> (mtime_ns, 大小, 预读时间)
+
+    def prefetch(self, paths):
+        """按顺序预读这些程序，取消之前尚未完成的预读"""
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        self._executor.submit(self._run, list(paths), generation)
+
+    def shutdown(self, wait=False):
+        with self._lock:
+            self._generation += 1
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _cancelled(self, generation):
+        return generation != self._generation
+
+    def _run(self, paths, generation):
+        for path in paths:
+            for file in launch_files(path):
+                if self._cancelled(generation):
+                    return
+                self._prefetch_one(file, generation)
+
+    def _prefetch_one(self, file, generation):
+        try:
+            st = os.stat(file)
+        except OSError:
+            return
+        now = time.monotonic()
+        recent = self._recent.get(file)
+        if recent is not None and recent[:2] == (st.st_mtime_ns, st.st_size) \
+                and now - recent[2] < self.refresh_interval:
+            perf.count('prefetch.skipped')
+            return
+        try:
+            with perf.span('prefetch.file'):
+                done = prefetch_file(file, self.max_bytes, lambda: self._cancelled(generation))
+        except OSError:
+            perf.count('prefetch.errors')
+            return
+        perf.count('prefetch.bytes', done)
+        if not self._cancelled(generation):
+            self._recent[file] = (st.st_mtime_ns, st.st_size, now)
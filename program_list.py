@@ -0,0 +1,394 @@
+"""程序列表的模型/视图实现
+
+用 QAbstractListModel + 自绘委托代替每行一个 ProgramItemWidget：
+行只在可见时才绘制，复选框和删除按钮通过命中测试处理，
+即使有数万个程序，列表也能立即打开并流畅滚动。
+"""
+import time
+from collections import namedtuple
+
+from path_health import STATUS_LABELS
+from launch_history import format_stats
+import theme
+
+from PyQt5.QtWidgets import (
+    QApplication, QListView, QStyledItemDelegate, QStyle, QStyleOptionButton,
+    QAbstractItemView
+)
+from PyQt5.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QSize, QEvent, pyqtSignal
+from PyQt5.QtGui import QFont, QPainter, QPen
+
+# 自定义数据角色
+PathRole = Qt.UserRole + 1
+PriorityRole = Qt.UserRole + 2
+RecordRole = Qt.UserRole + 3
+StatusRole = Qt.UserRole + 4
+StatsRole = Qt.UserRole + 5
+
+RowRects = namedtuple('RowRects', 'background check icon name path remove')
+
+
+class ProgramListModel(QAbstractListModel):
+    """把 ProgramRegistry 暴露为Qt列表模型
+
+    设置筛选条件后只显示 search_index 的搜索结果；筛选期间新增的程序
+    满足条件时追加到末尾，已显示的程序修改后不满足条件也保留到下次筛选。
+    筛选结果按页取出（每次至多 FETCH_ROWS 行、FETCH_SECONDS 秒），
+    视图滚动到末尾时通过 canFetchMore/fetchMore 继续取，一次筛选不会阻塞界面。
+    """
+
+    FETCH_ROWS = 500
+    FETCH_SECONDS = 0.008
+
+    def __init__(self, registry, parent=None, history=None, search_index=None):
+        super().__init__(parent)
+        self._registry = registry
+        # 启动历史（LaunchHistory），用于在行内显示启动统计
+        self.history = history
+        self.search_index = search_index
+        self._query = None      # 当前筛选条件（search_index.Query），None 表示显示全部
+        self._visible = None    # 筛选结果的记录列表
+        self._positions = None  # path -> 筛选结果中的行号，按需重建
+        self._pending = None    # 尚未取出的筛选结果（search_index.iter_search），取完为None
+        self._seen = set()      # 已在筛选结果中的路径
+        # 注册表的每次变化只影响相关的行，视图的滚动位置和选择得以保留
+        registry.about_to_add.connect(self._on_about_to_add)
+        registry.added.connect(self._on_added)
+        registry.about_to_remove.connect(self._on_about_to_remove)
+        registry.removed.connect(self._on_removed)
+        registry.updated.connect(self._on_updated)
+        registry.about_to_reset.connect(self.beginResetModel)
+        registry.reset.connect(self._on_reset)
+
+    @property
+    def filtered(self):
+        return self._query is not None
+
+    def set_filter(self, query):
+        """按 search_index.Query 筛选，None 或空条件时显示全部"""
+        self.beginResetModel()
+        self._query = query if query else None
+        self._refilter()
+        self.endResetModel()
+
+    @property
+    def complete(self):
+        """筛选结果已经全部取出"""
+        return self._pending is None
+
+    def visible_records(self):
+        """当前显示的程序（全部筛选结果或全部程序），尚未取出的筛选结果会先取完"""
+        if self._visible is None:
+            return list(self._registry)
+        self._fetch()
+        return list(self._visible)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._pending is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not parent.isValid():
+            self._fetch(self.FETCH_ROWS, self.FETCH_SECONDS)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._registry) if self._visible is None else len(self._visible)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        record = self._record_at(index.row())
+        if record is None:
+            return None
+        if role == Qt.DisplayRole:
+            return record.name
+        if role == Qt.ToolTipRole or role == PathRole:
+            return record.path
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if record.enabled else Qt.Unchecked
+        if role == PriorityRole:
+            return record.priority
+        if role == RecordRole:
+            return record
+        if role == StatusRole:
+            return record.status
+        if role == StatsRole:
+            stats = format_stats(self.history.stats_for(record.path)) if self.history is not None else None
+            if record.groups:
+                groups = "分组: " + ", ".join(record.groups)
+                return f"{groups} · {stats}" if stats else groups
+            return stats
+        return None
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.CheckStateRole:
+            return False
+        record = self._record_at(index.row())
+        if record is None:
+            return False
+        # 注册表发出updated信号后由 _on_updated 通知视图
+        self._registry.set_enabled(record.path, value == Qt.Checked)
+        return True
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def index_of(self, path):
+        if self._visible is None:
+            row = self._registry.row_of(path)
+        else:
+            if self._positions is None:
+                self._positions = {record.path: row for row, record in enumerate(self._visible)}
+            row = self._positions.get(path, -1)
+        return self.index(row) if row >= 0 else QModelIndex()
+
+    def refresh_path(self, path):
+        """通知视图重绘某个程序所在的行（如图标加载完成）"""
+        index = self.index_of(path)
+        if index.isValid():
+            self.dataChanged.emit(index, index)
+
+    def _record_at(self, row):
+        # 注册表已变化、视图还没有更新的行
+        if not 0 <= row < self.rowCount():
+            return None
+        if self._visible is None:
+            return self._registry.at(row)
+        record = self._visible[row]
+        # 已从注册表移除、正在删除的行
+        return record if record.path in self._registry else None
+
+    def _refilter(self):
+        self._positions = None
+        self._seen = set()
+        if self._query is None or self.search_index is None:
+            self._visible = None
+            self._pending = None
+        else:
+            self._visible = []
+            self._pending = self.search_index.iter_search(self._query)
+            self._visible.extend(self._take(self.FETCH_ROWS, self.FETCH_SECONDS))
+
+    def _take(self, rows=None, seconds=None):
+        """从尚未取出的筛选结果中取至多 rows 个，超过 seconds 秒时提前返回"""
+        records = []
+        deadline = None if seconds is None else time.perf_counter() + seconds
+        for record in self._pending:
+            if record is None:
+                if deadline is not None and time.perf_counter() > deadline:
+                    return records
+            elif record.path not in self._seen:
+                self._seen.add(record.path)
+                records.append(record)
+                if rows is not None and len(records) >= rows:
+                    return records
+        self._pending = None
+        return records
+
+    def _fetch(self, rows=None, seconds=None):
+        """取出更多筛选结果并追加到末尾"""
+        if self._pending is None:
+            return
+        records = self._take(rows, seconds)
+        if records:
+            first = len(self._visible)
+            self.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+            self._visible.extend(records)
+            self._positions = None
+            self.endInsertRows()
+
+    def _on_reset(self):
+        self._refilter()
+        self.endResetModel()
+
+    def _on_about_to_add(self, first, last):
+        if self._visible is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+
+    def _on_added(self, first, records):
+        if self._visible is None:
+            self.endInsertRows()
+            return
+        matched = [record for record in records
+                   if record.path not in self._seen and self._query.matches(record)]
+        self._seen.update(record.path for record in matched)
+        if matched:
+            first = len(self._visible)
+            self.beginInsertRows(QModelIndex(), first, first + len(matched) - 1)
+            self._visible.extend(matched)
+            self._positions = None
+            self.endInsertRows()
+
+    def _on_about_to_remove(self, row):
+        if self._visible is None:
+            self.beginRemoveRows(QModelIndex(), row, row)
+
+    def _on_removed(self, row, record):
+        if self._visible is None:
+            self.endRemoveRows()
+            return
+        index = self.index_of(record.path)
+        if index.isValid():
+            self.beginRemoveRows(QModelIndex(), index.row(), index.row())
+            del self._visible[index.row()]
+            self._seen.discard(record.path)
+            self._positions = None
+            self.endRemoveRows()
+
+    def _on_updated(self, row, record):
+        index = self.index(row) if self._visible is None else self.index_of(record.path)
+        if index.isValid():
+            self.dataChanged.emit(index, index)
+
+
+class ProgramItemDelegate(QStyledItemDelegate):
+    """按需绘制程序行，并对复选框和删除按钮做命中测试"""
+    remove_requested = pyqtSignal(str)
+
+    ROW_HEIGHT = 70
+    NAME_WIDTH = 150
+    CHECK_SIZE = 16
+    ICON_SIZE = 32
+    REMOVE_SIZE = 24
+
+    def __init__(self, icon_service=None, parent=None):
+        super().__init__(parent)
+        # 只有可见行会被绘制，因此图标也只为可见行加载
+        self.icon_service = icon_service
+        self._name_font = QFont()
+        self._name_font.setPixelSize(12)
+        self._path_font = QFont()
+        self._path_font.setPixelSize(10)
+        self._unavailable_font = QFont(self._name_font)
+        self._unavailable_font.setStrikeOut(True)
+        self._remove_font = QFont()
+        self._remove_font.setPixelSize(14)
+        self._remove_font.setBold(True)
+
+    def sizeHint(self, option, index):
+        return QSize(0, self.ROW_HEIGHT)
+
+    def row_rects(self, rect):
+        """计算一行内各部分的位置，绘制和命中测试共用"""
+        background = rect.adjusted(2, 2, -2, -2)
+        content = background.adjusted(10, 5, -10, -5)
+        center_y = content.center().y()
+        check = QRect(content.left(), center_y - self.CHECK_SIZE // 2,
+                      self.CHECK_SIZE, self.CHECK_SIZE)
+        remove = QRect(content.right() - self.REMOVE_SIZE + 1, center_y - self.REMOVE_SIZE // 2,
+                       self.REMOVE_SIZE, self.REMOVE_SIZE)
+        icon = QRect(check.right() + 10, center_y - self.ICON_SIZE // 2, self.ICON_SIZE, self.ICON_SIZE)
+        name = QRect(icon.right() + 10, content.top(), self.NAME_WIDTH, content.height())
+        path_left = name.right() + 10
+        path = QRect(path_left, content.top(), max(0, remove.left() - 10 - path_left), content.height())
+        return RowRects(background, check, icon, name, path, remove)
+
+    def paint(self, painter, option, index):
+        record = index.data(RecordRole)
+        if record is None:
+            return
+        rects = self.row_rects(option.rect)
+        widget = option.widget
+        style = widget.style() if widget is not None else QApplication.style()
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing, True)
+
+        # 背景
+        painter.setPen(Qt.NoPen)
+        if option.state & QStyle.State_Selected:
+            painter.setBrush(theme.color('row_selected'))
+        else:
+            painter.setBrush(theme.color('row'))
+        painter.drawRoundedRect(rects.background, 4, 4)
+
+        # 复选框
+        check_option = QStyleOptionButton()
+        check_option.rect = rects.check
+        check_option.state = QStyle.State_Enabled | (
+            QStyle.State_On if record.enabled else QStyle.State_Off
+        )
+        style.drawPrimitive(QStyle.PE_IndicatorCheckBox, check_option, painter, widget)
+
+        # 图标：尚未加载时留空，加载完成后该行会收到 dataChanged 重绘
+        if self.icon_service is not None:
+            pixmap = self.icon_service.icon(record.path)
+            if pixmap is not None:
+                painter.drawPixmap(rects.icon, pixmap)
+
+        # 名称和路径；路径不可用的程序划掉名称并在路径前标注原因
+        available = record.available
+        painter.setPen(theme.color('name' if available else 'name_unavailable'))
+        painter.setFont(self._name_font if available else self._unavailable_font)
+        name = painter.fontMetrics().elidedText(record.name, Qt.ElideRight, rects.name.width())
+        painter.drawText(rects.name, Qt.AlignVCenter | Qt.AlignLeft, name)
+
+        painter.setPen(theme.color('path' if available else 'path_unavailable'))
+        painter.setFont(self._path_font)
+        path_text = record.path if available else f"[{STATUS_LABELS[record.status]}] {record.path}"
+        path = painter.fontMetrics().elidedText(path_text, Qt.ElideMiddle, rects.path.width())
+        stats_text = index.data(StatsRole)
+        if stats_text:
+            # 有分组或启动记录时路径在上、统计在下
+            path_rect = rects.path.adjusted(0, 0, 0, -rects.path.height() // 2)
+            stats_rect = rects.path.adjusted(0, rects.path.height() // 2, 0, 0)
+            painter.drawText(path_rect, Qt.AlignBottom | Qt.AlignLeft, path)
+            painter.setPen(theme.color('stats'))
+            stats_text = painter.fontMetrics().elidedText(stats_text, Qt.ElideRight, stats_rect.width())
+            painter.drawText(stats_rect, Qt.AlignTop | Qt.AlignLeft, stats_text)
+        else:
+            painter.drawText(rects.path, Qt.AlignVCenter | Qt.AlignLeft, path)
+
+        # 删除按钮
+        painter.setPen(Qt.NoPen)
+        hovered = bool(option.state & QStyle.State_MouseOver)
+        painter.setBrush(theme.color('danger_hover' if hovered else 'danger'))
+        painter.drawEllipse(rects.remove)
+        painter.setPen(QPen(theme.color('button_text')))
+        painter.setFont(self._remove_font)
+        painter.drawText(rects.remove, Qt.AlignCenter, "×")
+
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        event_type = event.type()
+        if event_type in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease,
+                          QEvent.MouseButtonDblClick):
+            if event.button() != Qt.LeftButton:
+                return False
+            rects = self.row_rects(option.rect)
+            pos = event.pos()
+            on_remove = rects.remove.contains(pos)
+            on_check = rects.check.adjusted(-4, -4, 4, 4).contains(pos)
+            if not (on_remove or on_check):
+                return super().editorEvent(event, model, option, index)
+            if event_type == QEvent.MouseButtonRelease:
+                if on_remove:
+                    self.remove_requested.emit(index.data(PathRole))
+                else:
+                    self._toggle(model, index)
+            # 吞掉按下/双击事件，避免同时触发选择
+            return True
+        if event_type == QEvent.KeyPress and event.key() in (Qt.Key_Space, Qt.Key_Select):
+            self._toggle(model, index)
+            return True
+        return super().editorEvent(event, model, option, index)
+
+    @staticmethod
+    def _toggle(model, index):
+        checked = index.data(Qt.CheckStateRole) == Qt.Checked
+        model.setData(index, Qt.Unchecked if checked else Qt.Checked, Qt.CheckStateRole)
+
+
+class ProgramListView(QListView):
+    """程序列表视图，所有行高度相同，滚动只计算可见行"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setUniformItemSizes(True)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.setMouseTracking(True)
@@ -0,0 +1,568 @@
+"""程序注册表
+
+与界面无关的程序数据中心：按路径建立字典索引，所有查找和修改均为 O(1)，
+并在内部维护带权抽样器。界面通过订阅信号来刷新显示，无需Qt即可测试。
+"""
+import heapq
+import os
+import random
+
+from sampler import WeightedSampler, draw_launch, NO_LAUNCH, EMPTY, FORCED
+from path_health import STATUS_OK
+
+
+class Signal:
+    """轻量信号，用法与Qt信号类似（connect/disconnect/emit）"""
+
+    def __init__(self):
+        self._slots = []
+
+    def connect(self, slot):
+        self._slots.append(slot)
+
+    def disconnect(self, slot):
+        try:
+            self._slots.remove(slot)
+        except ValueError:
+            pass
+
+    def emit(self, *args):
+        for slot in list(self._slots):
+            slot(*args)
+
+
+# draw() 的 group 参数取该值时从全部程序中抽取，忽略当前分组
+ALL_PROGRAMS = ''
+
+
+def normalize_groups(groups):
+    """去掉空白和重复的分组名，排序后返回元组"""
+    return tuple(sorted({group.strip() for group in groups if group and group.strip()}))
+
+
+class ProgramRecord:
+    """单个程序的紧凑记录
+
+    status 是路径检查结果（见 path_health），不会被保存；None 表示尚未检查。
+    groups 是程序所属分组名的有序元组。
+    """
+    __slots__ = ('name', 'path', 'enabled', 'priority', 'status', 'groups')
+
+    def __init__(self, name, path, enabled=True, priority=1, groups=()):
+        self.name = name
+        self.path = path
+        self.enabled = enabled
+        self.priority = priority
+        self.status = None
+        self.groups = normalize_groups(groups)
+
+    @property
+    def available(self):
+        """路径检查未发现问题"""
+        return self.status is None or self.status == STATUS_OK
+
+    @property
+    def weight(self):
+        """在抽样器中的权重，未启用或路径不可用的程序权重为0"""
+        if not self.enabled or not self.available:
+            return 0.0
+        return max(0.0, float(self.priority))
+
+    @classmethod
+    def from_dict(cls, data):
+        path = data['path']
+        return cls(
+            data.get('name') or os.path.basename(path),
+            path,
+            bool(data.get('enabled', True)),
+            data.get('priority', 1),
+            data.get('groups', ()),
+        )
+
+    def to_dict(self):
+        data = {
+            'name': self.name,
+            'path': self.path,
+            'enabled': self.enabled,
+            'priority': self.priority,
+        }
+        if self.groups:
+            data['groups'] = list(self.groups)
+        return data
+
+    def __repr__(self):
+        return f"ProgramRecord({self.name!r}, {self.path!r}, {self.enabled!r}, {self.priority!r})"
+
+
+class ProgramRegistry:
+    """程序注册表，是程序列表的唯一数据来源
+
+    信号（成对的 about_to_* 在数据变化之前发出，便于Qt模型调用 begin*/end*）：
+    - about_to_add(first, last) / added(first, records)：在行 first..last 新增程序
+    - about_to_remove(row) / removed(row, record)：移除第 row 行
+    - updated(row, record)：启用状态、优先级或路径检查结果变化
+    - about_to_reset() / reset()：整体替换（如加载配置）
+    - operation(op)：每次修改后发出一条可回放的操作字典，供存储层写入日志
+    - groups_changed()：分组名集合发生变化
+
+    policy 为可选的最近启动策略（recency.RecencyPolicy），抽样器中的权重是
+    程序自身的权重乘以策略给出的系数。settings 保存界面设置（如抽样策略），随配置持久化。
+
+    每个分组有自己的抽样器，程序的权重变化只更新它所属分组的抽样器；
+    active_group 为当前分组（None 表示全部程序），切换分组不需要重建任何抽样器。
+
+    version 在任何可能改变下一次抽取结果的修改（权重、增删、下次必中、分组、
+    随机数流）后递增；version 不变时 predict() 的结果就是下一次 draw() 的结果。
+    """
+
+    # sync() 中被移除的程序超过该数量时改为整体重新加载
+    SYNC_RESET_LIMIT = 256
+
+    def __init__(self):
+        self._records = []  # 按显示顺序排列
+        self._index = {}    # path -> ProgramRecord
+        self._rows = {}     # path -> 行号
+        self.sampler = WeightedSampler()
+        self.next_program = None
+        self.settings = {}
+        self.policy = None
+        self.group_samplers = {}  # 分组名 -> WeightedSampler
+        self.active_group = None
+        self._groups_dirty = False
+        # 抽取使用的随机数流；设置 random_seed 后每次加载都从同一状态开始，可以复现
+        self.rng = random.Random()
+        self.version = 0
+
+        self.about_to_add = Signal()
+        self.added = Signal()
+        self.about_to_remove = Signal()
+        self.removed = Signal()
+        self.updated = Signal()
+        self.about_to_reset = Signal()
+        self.reset = Signal()
+        self.operation = Signal()
+        self.groups_changed = Signal()
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __contains__(self, path):
+        return path in self._index
+
+    def get(self, path):
+        return self._index.get(path)
+
+    def at(self, row):
+        """按显示顺序取第 row 个程序"""
+        return self._records[row]
+
+    def row_of(self, path):
+        """程序在显示顺序中的行号，不存在时返回-1"""
+        return self._rows.get(path, -1)
+
+    def load(self, programs, next_program=None, settings=None):
+        """用配置中的字典列表整体替换当前内容"""
+        self.about_to_reset.emit()
+        self._records = []
+        self._index = {}
+        self._rows = {}
+        for data in programs:
+            record = ProgramRecord.from_dict(data)
+            if record.path in self._index:
+                continue
+            self._rows[record.path] = len(self._records)
+            self._records.append(record)
+            self._index[record.path] = record
+        self.next_program = next_program if next_program in self._index else None
+        if settings is not None:
+            self._apply_settings(settings)
+            self.rng.seed(self.settings.get('random_seed'))
+        if self.policy is not None:
+            for record in self._records:
+                self.policy.on_add(record.path)
+        self._rebuild_samplers()
+        self.reset.emit()
+        self.groups_changed.emit()
+
+    def extend(self, programs, next_program=None):
+        """追加一批已持久化的程序（如分页加载），只发出一次行插入信号，不产生操作"""
+        records = []
+        seen = set()
+        for data in programs:
+            record = ProgramRecord.from_dict(data)
+            if record.path in self._index or record.path in seen:
+                continue
+            seen.add(record.path)
+            records.append(record)
+        if records:
+            self._append(records)
+            self._emit_groups_changed()
+        if next_program is not None and next_program in self._index and next_program != self.next_program:
+            self.next_program = next_program
+            self.version += 1
+        return records
+
+    def to_list(self):
+        """导出为可序列化的字典列表"""
+        return [record.to_dict() for record in self._records]
+
+    def state(self):
+        """导出完整状态，格式与 storage.load_state 的返回值一致"""
+        return {'programs': self.to_list(), 'next_program': self.next_program,
+                'settings': dict(self.settings)}
+
+    def add(self, path, name=None, enabled=True, priority=1):
+        """添加程序，已存在时返回None"""
+        if path in self._index:
+            return None
+        record = ProgramRecord(name or os.path.basename(path), path, enabled, priority)
+        row = len(self._records)
+        self.about_to_add.emit(row, row)
+        self._records.append(record)
+        self._index[path] = record
+        self._rows[path] = row
+        if self.policy is not None:
+            self.policy.on_add(path)
+        self._sync_weight(record)
+        self.added.emit(row, [record])
+        self.operation.emit({'op': 'add', 'program': record.to_dict()})
+        self._emit_groups_changed()
+        return record
+
+    def add_many(self, paths, enabled=True, priority=1):
+        """批量添加程序（如导入文件夹），已存在的路径会被跳过
+
+        只发出一次行插入信号和一条 add_many 操作，返回新增的记录。
+        """
+        records = []
+        seen = set()
+        for path in paths:
+            if path in self._index or path in seen:
+                continue
+            seen.add(path)
+            records.append(ProgramRecord(os.path.basename(path), path, enabled, priority))
+        if not records:
+            return records
+        self._append(records)
+        self.operation.emit({'op': 'add_many', 'programs': [record.to_dict() for record in records]})
+        return records
+
+    def remove(self, path):
+        """移除程序，不存在时返回None"""
+        record = self._remove(path)
+        if record is None:
+            return None
+        self.operation.emit({'op': 'remove', 'path': path})
+        self._emit_groups_changed()
+        return record
+
+    def _remove(self, path):
+        row = self._rows.get(path)
+        if row is None:
+            return None
+        self.about_to_remove.emit(row)
+        record = self._index.pop(path)
+        del self._rows[path]
+        del self._records[row]
+        # 只需修正被删行之后的行号
+        for i in range(row, len(self._records)):
+            self._rows[self._records[i].path] = i
+        self.sampler.remove(path)
+        self.version += 1
+        for group in record.groups:
+            sampler = self.group_samplers[group]
+            sampler.remove(path)
+            if not len(sampler):
+                del self.group_samplers[group]
+                self._groups_dirty = True
+        if self.policy is not None:
+            self.policy.on_remove(path)
+        if self.next_program == path:
+            self.next_program = None
+        self.removed.emit(row, record)
+        return record
+
+    def set_priority(self, path, priority):
+        record = self._index.get(path)
+        if record is None or record.priority == priority:
+            return record
+        record.priority = priority
+        self._sync_weight(record)
+        self.updated.emit(self._rows[path], record)
+        self.operation.emit({'op': 'set_priority', 'path': path, 'priority': priority})
+        return record
+
+    def set_enabled(self, path, enabled):
+        record = self._index.get(path)
+        if record is None or record.enabled == enabled:
+            return record
+        record.enabled = enabled
+        self._sync_weight(record)
+        self.updated.emit(self._rows[path], record)
+        self.operation.emit({'op': 'set_enabled', 'path': path, 'enabled': enabled})
+        return record
+
+    def set_status(self, path, status):
+        """记录路径检查结果；只影响抽样权重和显示，不产生操作"""
+        record = self._index.get(path)
+        if record is None or record.status == status:
+            return record
+        record.status = status
+        self._sync_weight(record)
+        self.updated.emit(self._rows[path], record)
+        return record
+
+    def reset_priorities(self, priority=1):
+        """把所有程序的优先级重置为同一值"""
+        for record in self._records:
+            self.set_priority(record.path, priority)
+
+    def set_next(self, path):
+        """设置下一次必中的程序，不存在时返回None"""
+        record = self._index.get(path)
+        if record is not None and self.next_program != path:
+            self.next_program = path
+            self.version += 1
+            self.operation.emit({'op': 'set_next', 'path': path})
+        return record
+
+    def set_setting(self, key, value):
+        """修改一项设置，value 为None时删除"""
+        if self.settings.get(key) == value:
+            return
+        if value is None:
+            self.settings.pop(key, None)
+        else:
+            self.settings[key] = value
+        self.operation.emit({'op': 'set_setting', 'key': key, 'value': value})
+
+    def sync(self, programs, next_program=None, settings=None):
+        """与被其他程序改写后的配置比较，只应用有变化的部分，不产生操作
+
+        已有程序保持原来的行号和路径检查结果，新程序追加到末尾；
+        被移除的程序很多时整体重新加载（比逐行移除更快）。返回 (新增数, 移除数, 修改数)。
+        """
+        incoming = {}
+        for data in programs:
+            incoming.setdefault(data['path'], data)
+        added = [ProgramRecord.from_dict(data) for path, data in incoming.items() if path not in self._index]
+        removed = [record.path for record in self._records if record.path not in incoming]
+        changed = []
+        for record in self._records:
+            data = incoming.get(record.path)
+            if data is None:
+                continue
+            other = ProgramRecord.from_dict(data)
+            if (other.name, other.enabled, other.priority, other.groups) != \
+                    (record.name, record.enabled, record.priority, record.groups):
+                changed.append((record, other))
+        if len(removed) > self.SYNC_RESET_LIMIT:
+            self.load(programs, next_program, settings)
+            return len(added), len(removed), len(changed)
+
+        for path in removed:
+            self._remove(path)
+        for record, other in changed:
+            record.name = other.name
+            record.enabled = other.enabled
+            record.priority = other.priority
+            self._move_groups(record, other.groups)
+            self._sync_weight(record)
+            self.updated.emit(self._rows[record.path], record)
+        if added:
+            self._append(added)
+        self.next_program = next_program if next_program in self._index else None
+        self.version += 1
+        if settings is not None:
+            seed = self.settings.get('random_seed')
+            active_group = self.active_group
+            self._apply_settings(settings)
+            # 种子不变时继续原来的随机数流，不重复已经抽过的序列
+            if self.settings.get('random_seed') != seed:
+                self.rng.seed(self.settings.get('random_seed'))
+            if self.active_group != active_group:
+                self._groups_dirty = True
+        self._emit_groups_changed()
+        return len(added), len(removed), len(changed)
+
+    def set_policy(self, policy, recent=()):
+        """更换最近启动策略（None 表示不使用），并按新系数重建抽样器
+
+        recent 为之前按顺序启动过的程序路径，用来重建策略状态（不在列表中的被忽略）
+        """
+        self.policy = policy
+        if policy is not None:
+            for record in self._records:
+                policy.on_add(record.path)
+            for path in recent:
+                if path in self._index:
+                    policy.on_launch(path)
+        self._rebuild_samplers()
+
+    def groups(self):
+        """当前至少包含一个程序的分组名"""
+        return sorted(self.group_samplers)
+
+    def set_groups(self, path, groups):
+        """设置程序所属的分组，只更新涉及的分组抽样器"""
+        record = self._index.get(path)
+        groups = normalize_groups(groups)
+        if record is None or record.groups == groups:
+            return record
+        self._move_groups(record, groups)
+        self._sync_weight(record)
+        self.updated.emit(self._rows[path], record)
+        self.operation.emit({'op': 'set_groups', 'path': path, 'groups': list(groups)})
+        self._emit_groups_changed()
+        return record
+
+    def set_seed(self, seed):
+        """设置随机种子（None 表示使用系统随机源），随配置保存，并从该种子重新开始"""
+        self.set_setting('random_seed', seed)
+        self.rng.seed(seed)
+        self.version += 1
+
+    def set_active_group(self, group):
+        """切换当前分组（None 表示全部程序），只切换使用的抽样器"""
+        group = group or None
+        if group == self.active_group:
+            return
+        self.active_group = group
+        self.version += 1
+        self.set_setting('active_group', group)
+
+    def sampler_for(self, group=None):
+        """分组对应的抽样器；group 为None时使用当前分组，不存在的分组返回None"""
+        if group is None:
+            group = self.active_group
+        if not group:
+            return self.sampler
+        return self.group_samplers.get(group)
+
+    def draw(self, no_launch_probability=0.1, rng=None, group=None, subset=None):
+        """按启动规则抽取一次，返回 (状态, 记录)
+
+        rng 为None时使用注册表自己的随机数流 self.rng。
+
+        group 为None时从当前分组抽取，为 ALL_PROGRAMS 时从全部程序抽取；
+        subset 为程序记录序列时只从其中抽取（如搜索结果，临时建立抽样器），忽略分组。
+        命中"下次必中"后会自动清除该设置（"下次必中"的程序不在抽取范围中时保留到下次）。
+        """
+        if rng is None:
+            rng = self.rng
+        if rng is self.rng:
+            self.version += 1
+        if subset is not None:
+            sampler = WeightedSampler((r.path, self.sampler.weight(r.path)) for r in subset)
+        else:
+            sampler = self.sampler_for(group)
+        if sampler is None:
+            return (NO_LAUNCH if rng.random() < no_launch_probability else EMPTY), None
+        status, path = draw_launch(sampler, self.next_program, no_launch_probability, rng, self.policy)
+        if status == EMPTY and self.policy is not None and self._relax_policy():
+            # 所有程序都被策略暂时排除时放宽策略再抽一次
+            status, path = draw_launch(sampler, self.next_program, 0.0, rng, self.policy)
+        if status == FORCED:
+            self.next_program = None
+            self.version += 1
+            self.operation.emit({'op': 'set_next', 'path': None})
+        if path is not None and self.policy is not None:
+            for changed in self.policy.on_launch(path):
+                record = self._index.get(changed)
+                if record is not None:
+                    self._sync_weight(record)
+        return status, self._index.get(path) if path is not None else None
+
+    def predict(self, no_launch_probability=0.1, group=None):
+        """预测下一次 draw() 的结果，返回 (状态, 记录)
+
+        在随机数流的副本上按与 draw() 相同的规则抽取，不消耗随机数流，也不清除"下次必中"；
+        version 不变时下一次 draw() 会得到同样的结果。
+        策略暂时排除了所有程序（需要放宽策略）时预测为 EMPTY。
+        """
+        rng = random.Random()
+        rng.setstate(self.rng.getstate())
+        sampler = self.sampler_for(group)
+        if sampler is None:
+            return (NO_LAUNCH if rng.random() < no_launch_probability else EMPTY), None
+        status, path = draw_launch(sampler, self.next_program, no_launch_probability, rng, self.policy)
+        return status, self._index.get(path) if path is not None else None
+
+    def likely(self, count, group=None):
+        """当前分组中被抽中概率最高的 count 个程序"""
+        sampler = self.sampler_for(group)
+        if sampler is None or count <= 0:
+            return []
+        items = heapq.nlargest(count, sampler.items(), key=lambda item: item[1])
+        return [self._index[path] for path, weight in items if weight > 0]
+
+    def _append(self, records):
+        """在末尾追加一批新记录，只发出一次行插入信号"""
+        first = len(self._records)
+        self.about_to_add.emit(first, first + len(records) - 1)
+        for record in records:
+            self._rows[record.path] = len(self._records)
+            self._records.append(record)
+            self._index[record.path] = record
+            if self.policy is not None:
+                self.policy.on_add(record.path)
+            self._sync_weight(record)
+        self.added.emit(first, records)
+
+    def _move_groups(self, record, groups):
+        """从不再所属的分组抽样器中移除程序，新分组的抽样器由 _sync_weight 补上"""
+        for group in set(record.groups) - set(groups):
+            sampler = self.group_samplers[group]
+            sampler.remove(record.path)
+            if not len(sampler):
+                del self.group_samplers[group]
+                self._groups_dirty = True
+        record.groups = groups
+
+    def _apply_settings(self, settings):
+        self.settings = dict(settings)
+        self.active_group = self.settings.get('active_group')
+
+    def _weight_of(self, record):
+        if self.policy is None:
+            return record.weight
+        return record.weight * self.policy.multiplier(record.path)
+
+    def _sync_weight(self, record):
+        self.version += 1
+        weight = self._weight_of(record)
+        self.sampler.set_weight(record.path, weight)
+        for group in record.groups:
+            sampler = self.group_samplers.get(group)
+            if sampler is None:
+                sampler = self.group_samplers[group] = WeightedSampler()
+                self._groups_dirty = True
+            sampler.set_weight(record.path, weight)
+
+    def _rebuild_samplers(self):
+        """按当前记录以 O(n) 重建全部抽样器"""
+        self.version += 1
+        weights = [(r, self._weight_of(r)) for r in self._records]
+        self.sampler.rebuild((r.path, w) for r, w in weights)
+        members = {}
+        for record, weight in weights:
+            for group in record.groups:
+                members.setdefault(group, []).append((record.path, weight))
+        self.group_samplers = {group: WeightedSampler(items) for group, items in members.items()}
+        self._groups_dirty = False
+
+    def _emit_groups_changed(self):
+        if self._groups_dirty:
+            self._groups_dirty = False
+            self.groups_changed.emit()
+
+    def _relax_policy(self):
+        changed = self.policy.relax()
+        for path in changed:
+            record = self._index.get(path)
+            if record is not None:
+                self._sync_weight(record)
+        return bool(changed)
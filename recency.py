@@ -0,0 +1,171 @@
+"""按最近启动情况调整抽样
+
+可选的三种策略，可以同时开启：
+- 不连续重复：最近 no_repeat 次启动过的程序暂时不参与抽取
+- 启动后降低权重：刚启动的程序权重乘以 decay，之后每次启动恢复一部分
+  （只跟踪最近被降低的至多 max_penalized 个程序）
+- 保证轮到：每个可启动的程序至少每 guarantee 次启动中出现一次。
+  每个程序占用一个互不相同的截止序号（不晚于上次启动后的第 guarantee 次），
+  到期的程序由最小堆找出，优先于随机抽取；程序数多于 guarantee 时尽量满足。
+  空闲序号保存在有序列表中，二分查找不晚于截止的最晚空闲序号，分配一次为 O(log K)
+
+策略只给出每个程序的权重系数，每次启动后返回系数发生变化的程序，
+由注册表只更新这些程序在抽样器中的权重，不需要重算全部权重。
+策略状态只保存在内存中，界面重新启动后从头开始；命令行模式每次运行时
+按启动历史中最近的记录（至多 LaunchHistory.RING_SIZE 条）重建。
+"""
+import bisect
+import heapq
+from collections import OrderedDict, deque
+
+# 系数恢复到与1相差不到该值时不再跟踪
+_RECOVERED = 0.01
+
+
+class RecencyPolicy:
+    """最近启动策略"""
+
+    def __init__(self, no_repeat=0, decay=None, recovery=0.5, max_penalized=64, guarantee=0):
+        self.no_repeat = max(0, int(no_repeat))
+        self.decay = decay            # 刚启动的程序的权重系数，None 表示不降低
+        self.recovery = recovery      # 每次启动后剩余降低量的保留比例
+        self.max_penalized = max_penalized
+        self.guarantee = max(0, int(guarantee))
+        self._recent = deque()        # 不连续重复窗口
+        self._blocked = {}            # path -> 在窗口中的次数
+        self._penalty = OrderedDict()  # path -> 降低量（1 - 系数），最近启动的在末尾
+        self._launches = 0
+        self._deadline = {}           # path -> 最迟需要启动的序号
+        self._slots = {}              # 截止序号 -> path，每个序号最多一个程序
+        self._free = []               # 不超过 _top 的空闲序号（升序），开头可能有已过去的序号
+        self._top = 0                 # _free 已覆盖到的最大序号
+        self._heap = []               # (deadline, path)，包含已过期的条目
+
+    @classmethod
+    def from_settings(cls, settings):
+        """由保存的设置创建，未开启任何策略时返回None"""
+        if not settings:
+            return None
+        policy = cls(
+            no_repeat=settings.get('no_repeat', 0),
+            decay=settings.get('decay'),
+            guarantee=settings.get('guarantee', 0),
+        )
+        return policy if policy.active else None
+
+    def to_settings(self):
+        return {'no_repeat': self.no_repeat, 'decay': self.decay, 'guarantee': self.guarantee}
+
+    @property
+    def active(self):
+        return bool(self.no_repeat or self.decay is not None or self.guarantee)
+
+    def multiplier(self, path):
+        """当前的权重系数"""
+        if path in self._blocked:
+            return 0.0
+        return 1.0 - self._penalty.get(path, 0.0)
+
+    def overdue(self, is_eligible):
+        """返回已经到期、必须本次启动的程序；is_eligible(path) 判断程序当前能否启动"""
+        if not self.guarantee:
+            return None
+        heap = self._heap
+        while heap:
+            deadline, path = heap[0]
+            if self._deadline.get(path) != deadline:
+                heapq.heappop(heap)  # 已被更新或移除的条目
+                continue
+            if deadline > self._launches + 1:
+                return None
+            if is_eligible(path):
+                return path
+            # 当前不能启动（未启用、路径不可用），从下一次启动起重新计时
+            self._set_deadline(path, self._launches + 1 + self.guarantee, self._launches + 2)
+        return None
+
+    def on_add(self, path):
+        if self.guarantee:
+            self._set_deadline(path)
+
+    def on_remove(self, path):
+        self._release_slot(path)
+        self._deadline.pop(path, None)
+        self._penalty.pop(path, None)
+
+    def on_launch(self, path):
+        """记录一次启动，返回系数发生变化的程序集合"""
+        changed = {path}
+        self._launches += 1
+
+        if self.no_repeat:
+            self._recent.append(path)
+            self._blocked[path] = self._blocked.get(path, 0) + 1
+            if len(self._recent) > self.no_repeat:
+                oldest = self._recent.popleft()
+                count = self._blocked[oldest] - 1
+                if count:
+                    self._blocked[oldest] = count
+                else:
+                    del self._blocked[oldest]
+                changed.add(oldest)
+
+        if self.decay is not None:
+            for other in list(self._penalty):
+                remaining = self._penalty[other] * self.recovery
+                if remaining < _RECOVERED:
+                    del self._penalty[other]
+                else:
+                    self._penalty[other] = remaining
+                changed.add(other)
+            self._penalty.pop(path, None)
+            self._penalty[path] = 1.0 - self.decay
+            while len(self._penalty) > self.max_penalized:
+                oldest, _ = self._penalty.popitem(last=False)
+                changed.add(oldest)
+
+        if self.guarantee:
+            self._set_deadline(path)
+            # 丢掉已经过去的空闲序号
+            start = bisect.bisect_left(self._free, self._launches + 1)
+            if start > 64:
+                del self._free[:start]
+            if len(self._heap) > 2 * len(self._deadline) + 64:
+                self._heap = [(d, p) for p, d in self._deadline.items()]
+                heapq.heapify(self._heap)
+        return changed
+
+    def relax(self):
+        """所有程序都被排除时清空窗口和降低量，返回系数发生变化的程序"""
+        changed = set(self._blocked) | set(self._penalty)
+        self._recent.clear()
+        self._blocked.clear()
+        self._penalty.clear()
+        return changed
+
+    def _set_deadline(self, path, deadline=None, earliest=None):
+        """分配 earliest 到 deadline 之间最晚的空闲序号，同时到期的程序因此不会挤在同一次启动"""
+        self._release_slot(path)
+        if deadline is None:
+            deadline = self._launches + self.guarantee
+        if earliest is None:
+            earliest = self._launches + 1
+        if deadline > self._top:
+            self._free.extend(s for s in range(self._top + 1, deadline + 1) if s not in self._slots)
+            self._top = deadline
+        free = self._free
+        i = bisect.bisect_right(free, deadline) - 1
+        if i < 0 or free[i] < earliest:
+            slot = deadline  # 没有空闲序号，只能尽量满足
+        else:
+            slot = free.pop(i)
+            self._slots[slot] = path
+        self._deadline[path] = slot
+        heapq.heappush(self._heap, (slot, path))
+
+    def _release_slot(self, path):
+        slot = self._deadline.get(path)
+        if slot is not None and self._slots.get(slot) == path:
+            del self._slots[slot]
+            if slot > self._launches:
+                bisect.insort(self._free, slot)
@@ -0,0 +1,227 @@
+"""带权随机抽样引擎
+
+使用树状数组（Fenwick tree）维护权重前缀和：
+- 抽样 O(log n)
+- 单项权重更新 O(log n)
+- 支持浮点权重，不再需要按优先级复制列表
+"""
+import math
+import random
+
+# 抽取结果状态
+NO_LAUNCH = 'no_launch'  # 命中"你不许启动"
+EMPTY = 'empty'          # 没有可启动的程序
+FORCED = 'forced'        # 命中"下次必中"
+RANDOM = 'random'        # 正常按权重抽中
+OVERDUE = 'overdue'      # 最近启动策略要求必须轮到的程序
+
+
+class WeightedSampler:
+    """基于树状数组的带权抽样器，按键（程序路径）管理权重"""
+
+    # 累计更新次数超过容量的倍数后整体重建，抑制浮点误差累积
+    _REBUILD_FACTOR = 4
+
+    def __init__(self, items=None):
+        self._keys = []
+        self._weights = []
+        self._tree = [0.0]  # 下标从1开始
+        self._slots = {}    # key -> 槽位下标（从0开始）
+        self._free = []     # 已移除、可复用的槽位
+        self._updates = 0
+        if items:
+            self.rebuild(items)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    @property
+    def total(self):
+        """当前所有权重之和"""
+        return self._prefix(len(self._weights))
+
+    def weight(self, key):
+        """获取某个键的权重，不存在时返回0"""
+        slot = self._slots.get(key)
+        return 0.0 if slot is None else self._weights[slot]
+
+    def keys(self):
+        return list(self._slots)
+
+    def clear(self):
+        self.rebuild(())
+
+    def rebuild(self, items):
+        """以 O(n) 批量重建，items 为 (key, weight) 序列"""
+        self._keys = []
+        self._weights = []
+        self._slots = {}
+        self._free = []
+        self._updates = 0
+        for key, weight in items:
+            weight = self._check_weight(weight)
+            slot = self._slots.get(key)
+            if slot is None:
+                self._slots[key] = len(self._keys)
+                self._keys.append(key)
+                self._weights.append(weight)
+            else:
+                self._weights[slot] = weight
+        size = len(self._weights)
+        tree = [0.0] * (size + 1)
+        for i in range(1, size + 1):
+            tree[i] += self._weights[i - 1]
+            j = i + (i & -i)
+            if j <= size:
+                tree[j] += tree[i]
+        self._tree = tree
+
+    def set_weight(self, key, weight):
+        """设置权重，键不存在时自动加入"""
+        weight = self._check_weight(weight)
+        slot = self._slots.get(key)
+        if slot is None:
+            self._insert(key, weight)
+            return
+        delta = weight - self._weights[slot]
+        self._weights[slot] = weight
+        if delta:
+            self._add(slot + 1, delta)
+            self._note_update()
+
+    def remove(self, key):
+        """移除一个键，槽位留给后续插入复用"""
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return
+        delta = -self._weights[slot]
+        self._weights[slot] = 0.0
+        self._keys[slot] = None
+        self._free.append(slot)
+        if delta:
+            self._add(slot + 1, delta)
+            self._note_update()
+
+    def draw(self, rng=random):
+        """按权重抽取一个键，总权重为0时返回None"""
+        total = self.total
+        if total <= 0:
+            return None
+        slot = self._find(rng.random() * total)
+        if slot is None:
+            # 浮点误差落到了权重为0的槽位，重建后再抽一次
+            self.rebuild(self.items())
+            total = self.total
+            if total <= 0:
+                return None
+            slot = self._find(rng.random() * total)
+            if slot is None:
+                return None
+        return self._keys[slot]
+
+    def items(self):
+        """按槽位顺序返回 (key, weight)"""
+        return [(key, self._weights[slot]) for key, slot in self._slots.items()]
+
+    def copy(self):
+        """复制当前状态（包括树状数组本身，不重建）"""
+        other = WeightedSampler()
+        other._keys = list(self._keys)
+        other._weights = list(self._weights)
+        other._tree = list(self._tree)
+        other._slots = dict(self._slots)
+        other._free = list(self._free)
+        other._updates = self._updates
+        return other
+
+    def arrays(self):
+        """返回 (按槽位排列的键, 权重, 树状数组) 的副本，用于批量验证抽样（见 launch_odds）
+
+        键列表中已移除的槽位为None；树状数组下标从1开始。
+        """
+        return list(self._keys), list(self._weights), list(self._tree)
+
+    # ---- 内部实现 ----
+
+    @staticmethod
+    def _check_weight(weight):
+        weight = float(weight)
+        if math.isnan(weight) or math.isinf(weight) or weight < 0:
+            raise ValueError(f"无效的权重: {weight}")
+        return weight
+
+    def _insert(self, key, weight):
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot] = key
+            self._slots[key] = slot
+            self._weights[slot] = weight
+            if weight:
+                self._add(slot + 1, weight)
+            return
+        slot = len(self._weights)
+        self._keys.append(key)
+        self._weights.append(weight)
+        self._slots[key] = slot
+        # 新节点覆盖区间 (i - lowbit(i), i]，由前缀和在 O(log n) 内求得
+        i = slot + 1
+        self._tree.append(weight + self._prefix(i - 1) - self._prefix(i - (i & -i)))
+
+    def _add(self, i, delta):
+        tree = self._tree
+        size = len(tree) - 1
+        while i <= size:
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, i):
+        tree = self._tree
+        total = 0.0
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _find(self, target):
+        """返回前缀和首次超过 target 的槽位"""
+        tree = self._tree
+        size = len(tree) - 1
+        pos = 0
+        step = 1 << (size.bit_length() - 1) if size else 0
+        while step:
+            nxt = pos + step
+            if nxt <= size and tree[nxt] <= target:
+                pos = nxt
+                target -= tree[nxt]
+            step >>= 1
+        if pos >= size or self._weights[pos] <= 0:
+            return None
+        return pos
+
+    def _note_update(self):
+        self._updates += 1
+        if self._updates > self._REBUILD_FACTOR * (len(self._weights) + 16):
+            self.rebuild(self.items())
+
+
+def draw_launch(sampler, next_program=None, no_launch_probability=0.1, rng=random, policy=None):
+    """按启动器规则抽取一次
+
+    先判断"你不许启动"的概率，再判断"下次必中"（仅当该程序当前权重大于0时生效），
+    然后是最近启动策略（见 recency.RecencyPolicy）中已到期的程序，
+    最后按权重随机抽取。返回 (状态, 路径)。
+    """
+    if rng.random() < no_launch_probability:
+        return NO_LAUNCH, None
+    if sampler.total <= 0:
+        return EMPTY, None
+    if next_program is not None and sampler.weight(next_program) > 0:
+        return FORCED, next_program
+    if policy is not None:
+        path = policy.overdue(lambda key: sampler.weight(key) > 0)
+        if path is not None:
+            return OVERDUE, path
+    return RANDOM, sampler.draw(rng)
@@ -0,0 +1,288 @@
+"""程序搜索
+
+在内存中为程序名称和路径建立倒排索引，随注册表的增删增量更新：
+- 长度不小于3的词用三元组索引：取词中最少见的三元组的倒排表作为候选，再逐个确认包含该词
+- 1-2 个字符的词按单词前缀索引（如 "vs" 匹配 "Visual Studio Code" 中的 "vs"… 开头的单词）
+
+倒排表是按编号递增的列表，移除程序只把编号标记为失效，失效编号过多时才清理倒排表。
+编号按添加顺序分配，与注册表的显示顺序一致，结果不需要再排序。
+程序改名（如配置被外部修改后同步）时保留编号，只在变化的三元组和前缀的倒排表中移动该编号。
+新加入（包括整体重新加载）的程序先放进待索引队列，由 build() 分批建立索引
+（界面在空闲时调用，不影响启动）；搜索时把队列中剩余的程序一次建完。
+iter_search() 逐个产生结果，每检查 _CHECKPOINT 个候选产生一次 None，
+调用方可以只取一页结果，或超过时间预算时暂停，不必一次算出全部结果。
+
+查询语法（各条件同时满足，不区分大小写）：
+    词                名称或路径包含该词（1-2 个字符时匹配单词开头）
+    group:名称        属于该分组（也可写作 g:名称）
+    is:enabled        已启用；is:disabled 未启用；is:missing 路径不可用
+    priority:N        优先级等于 N，也可以写 priority:>=N、>N、<=N、<N（可简写为 p:）
+"""
+import bisect
+import operator
+import re
+from collections import deque
+
+# 失效编号超过该数量且多于有效编号时清理倒排表
+_COMPACT_MIN = 1024
+# iter_search 每检查这么多个候选产生一次 None
+_CHECKPOINT = 256
+
+_WORD = re.compile(r'\w+')
+_PRIORITY = re.compile(r'(>=|<=|>|<|=)?(\d+)$')
+_COMPARE = {'>=': operator.ge, '<=': operator.le, '>': operator.gt, '<': operator.lt, '=': operator.eq}
+
+
+def _haystack(record):
+    return f"{record.name}\n{record.path}".lower()
+
+
+def _words(haystack):
+    """以空格开头、空格分隔的单词串，用于确认单词前缀"""
+    return ' ' + ' '.join(_WORD.findall(haystack))
+
+
+def _trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _prefixes(words):
+    keys = set()
+    for word in words.split():
+        keys.add(word[:1])
+        keys.add(word[:2])
+    return keys
+
+
+class QueryError(ValueError):
+    """查询语法错误"""
+
+
+class Query:
+    """解析后的查询条件"""
+
+    def __init__(self, terms=(), groups=(), enabled=None, missing=None, priority=None):
+        self.terms = list(terms)      # 小写的文本词
+        self.groups = list(groups)    # 小写的分组名
+        self.enabled = enabled        # None 表示不限
+        self.missing = missing
+        self.priority = priority      # (比较函数, 值) 或 None
+
+    def __bool__(self):
+        return bool(self.terms or self.groups or self.enabled is not None
+                    or self.missing is not None or self.priority is not None)
+
+    def matches_attributes(self, record):
+        if self.enabled is not None and record.enabled != self.enabled:
+            return False
+        if self.missing is not None and record.available == self.missing:
+            return False
+        if self.priority is not None and not self.priority[0](record.priority, self.priority[1]):
+            return False
+        if self.groups:
+            groups = {group.lower() for group in record.groups}
+            return all(group in groups for group in self.groups)
+        return True
+
+    def matches(self, record):
+        """不经过索引直接判断一个程序是否满足条件"""
+        if not self.matches_attributes(record):
+            return False
+        haystack = _haystack(record)
+        words = None
+        for term in self.terms:
+            if len(term) >= 3:
+                if term not in haystack:
+                    return False
+            else:
+                if words is None:
+                    words = _words(haystack)
+                if ' ' + term not in words:
+                    return False
+        return True
+
+
+def parse_query(text):
+    """解析查询文本，语法错误时抛出 QueryError"""
+    query = Query()
+    for token in text.split():
+        key, sep, value = token.partition(':')
+        key = key.lower()
+        if not sep or not value:
+            query.terms.append(token.lower())
+        elif key in ('group', 'g'):
+            query.groups.append(value.lower())
+        elif key == 'is':
+            value = value.lower()
+            if value in ('enabled', 'disabled'):
+                query.enabled = value == 'enabled'
+            elif value in ('missing', 'available'):
+                query.missing = value == 'missing'
+            else:
+                raise QueryError(f"未知的条件: {token}")
+        elif key in ('priority', 'p'):
+            match = _PRIORITY.match(value)
+            if match is None:
+                raise QueryError(f"优先级条件格式错误: {token}")
+            query.priority = (_COMPARE[match.group(1) or '='], int(match.group(2)))
+        else:
+            query.terms.append(token.lower())
+    return query
+
+
+class SearchIndex:
+    """程序名称和路径的倒排索引，订阅注册表的增删改信号增量更新"""
+
+    def __init__(self, registry):
+        self._registry = registry
+        self._backlog = deque(registry)  # 尚未建立索引的程序记录，按显示顺序
+        self._entries = []   # 编号 -> (记录, 小写文本, 单词串)，失效为None
+        self._ids = {}       # 路径 -> 编号
+        self._trigrams = {}  # 三元组 -> [编号]
+        self._prefixes = {}  # 1-2 字符的单词前缀 -> [编号]
+        self._dead = 0
+        registry.added.connect(self._on_added)
+        registry.removed.connect(self._on_removed)
+        registry.updated.connect(self._on_updated)
+        registry.reset.connect(self.invalidate)
+
+    def invalidate(self):
+        """注册表被整体替换，全部程序重新排队建立索引"""
+        self._backlog = deque(self._registry)
+        self._entries = []
+        self._ids = {}
+        self._trigrams = {}
+        self._prefixes = {}
+        self._dead = 0
+
+    @property
+    def complete(self):
+        """所有程序都已建立索引"""
+        return not self._backlog
+
+    def build(self, limit=None):
+        """为待索引队列中至多 limit 个程序建立索引，返回是否已全部完成"""
+        backlog = self._backlog
+        count = 0
+        while backlog and (limit is None or count < limit):
+            record = backlog.popleft()
+            # 排队后又被移除或替换的记录
+            if self._registry.get(record.path) is record:
+                self._add(record)
+                count += 1
+        return not backlog
+
+    def search(self, query):
+        """返回满足条件的程序记录，按显示顺序排列；query 可以是文本或 Query"""
+        return [record for record in self.iter_search(query) if record is not None]
+
+    def iter_search(self, query):
+        """按显示顺序逐个产生满足条件的程序记录，其间定期产生 None"""
+        if isinstance(query, str):
+            query = parse_query(query)
+        self.build()
+        terms = query.terms
+        check_attributes = query.enabled is not None or query.missing is not None \
+            or query.priority is not None or query.groups
+        candidates = self._candidates(terms)
+        if candidates is None:
+            candidates = range(len(self._entries))
+        entries = self._entries
+        for checked, entry_id in enumerate(candidates, 1):
+            if not checked % _CHECKPOINT:
+                yield None
+            entry = entries[entry_id]
+            if entry is None or (terms and not self._match_terms(terms, entry)):
+                continue
+            if not check_attributes or query.matches_attributes(entry[0]):
+                yield entry[0]
+
+    def _candidates(self, terms):
+        """所有词的倒排表中最短的一个；没有文本词时返回None"""
+        best = None
+        for term in terms:
+            if len(term) >= 3:
+                lists = [self._trigrams.get(key, ()) for key in _trigrams(term)]
+            else:
+                lists = [self._prefixes.get(term, ())]
+            for ids in lists:
+                if best is None or len(ids) < len(best):
+                    best = ids
+                    if not best:
+                        return best
+        return best
+
+    @staticmethod
+    def _match_terms(terms, entry):
+        for term in terms:
+            if len(term) >= 3:
+                if term not in entry[1]:
+                    return False
+            elif ' ' + term not in entry[2]:
+                return False
+        return True
+
+    def _add(self, record):
+        if record.path in self._ids:
+            return
+        entry_id = len(self._entries)
+        haystack = _haystack(record)
+        words = _words(haystack)
+        self._entries.append((record, haystack, words))
+        self._ids[record.path] = entry_id
+        for key in _trigrams(haystack):
+            self._trigrams.setdefault(key, []).append(entry_id)
+        for key in _prefixes(words):
+            self._prefixes.setdefault(key, []).append(entry_id)
+
+    def _on_added(self, first, records):
+        self._backlog.extend(records)
+
+    def _on_removed(self, row, record):
+        entry_id = self._ids.pop(record.path, None)
+        if entry_id is None:
+            return
+        self._entries[entry_id] = None
+        self._dead += 1
+        if self._dead > _COMPACT_MIN and self._dead > len(self._ids):
+            self._compact()
+
+    def _on_updated(self, row, record):
+        entry_id = self._ids.get(record.path)
+        if entry_id is None:
+            return
+        _, old_haystack, old_words = self._entries[entry_id]
+        haystack = _haystack(record)
+        if haystack == old_haystack:
+            return
+        words = _words(haystack)
+        self._entries[entry_id] = (record, haystack, words)
+        self._move(self._trigrams, entry_id, _trigrams(old_haystack), _trigrams(haystack))
+        self._move(self._prefixes, entry_id, _prefixes(old_words), _prefixes(words))
+
+    @staticmethod
+    def _move(table, entry_id, old_keys, new_keys):
+        """把编号从只属于旧文本的倒排表移到只属于新文本的倒排表，保持编号递增"""
+        for key in old_keys - new_keys:
+            ids = table.get(key)
+            if ids is None:
+                continue
+            i = bisect.bisect_left(ids, entry_id)
+            if i < len(ids) and ids[i] == entry_id:
+                del ids[i]
+                if not ids:
+                    del table[key]
+        for key in new_keys - old_keys:
+            bisect.insort(table.setdefault(key, []), entry_id)
+
+    def _compact(self):
+        """从倒排表中去掉失效的编号（编号本身不变）"""
+        entries = self._entries
+        for table in (self._trigrams, self._prefixes):
+            for key in list(table):
+                ids = [i for i in table[key] if entries[i] is not None]
+                if ids:
+                    table[key] = ids
+                else:
+                    del table[key]
+        self._dead = 0
@@ -0,0 +1,311 @@
+"""设置菜单
+
+菜单只创建一次并缓存；各子菜单在 aboutToShow 时才按需构建，
+并且只在注册表发生变化后才会重建。程序较多时，
+"下次必中"和"调整优先级"改用可搜索的内嵌控件，不再为每个程序创建子菜单。
+"""
+from functools import partial
+
+from PyQt5.QtWidgets import (
+    QMenu, QAction, QWidgetAction, QWidget, QVBoxLayout, QHBoxLayout,
+    QLineEdit, QListView, QPushButton, QSpinBox, QAbstractItemView
+)
+from PyQt5.QtCore import Qt, QSortFilterProxyModel, pyqtSignal
+
+from program_list import PathRole, PriorityRole
+import perf
+import theme
+
+
+class ProgramFilterModel(QSortFilterProxyModel):
+    """按路径关键字过滤程序，可选只保留已启用的程序"""
+
+    def __init__(self, enabled_only=False, parent=None):
+        super().__init__(parent)
+        self._enabled_only = enabled_only
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.setFilterRole(PathRole)
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._enabled_only:
+            index = self.sourceModel().index(source_row, 0, source_parent)
+            if index.data(Qt.CheckStateRole) != Qt.Checked:
+                return False
+        return super().filterAcceptsRow(source_row, source_parent)
+
+
+class ProgramPicker(QWidget):
+    """可搜索的程序选择控件，嵌入菜单中使用"""
+    picked = pyqtSignal(str, int)  # 路径, 优先级（不带优先级时为0）
+
+    def __init__(self, model, button_text, with_priority=False, enabled_only=False, parent=None):
+        super().__init__(parent)
+        self._proxy = ProgramFilterModel(enabled_only, self)
+        self._proxy.setSourceModel(model)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(6, 6, 6, 6)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索程序名称或路径…")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.textChanged.connect(self._proxy.setFilterFixedString)
+
+        self.results = QListView()
+        self.results.setModel(self._proxy)
+        self.results.setUniformItemSizes(True)
+        self.results.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.results.setFixedSize(320, 160)
+        self.results.selectionModel().currentChanged.connect(self._on_current_changed)
+        self.results.doubleClicked.connect(self._emit_picked)
+
+        bottom_layout = QHBoxLayout()
+        self.priority_spin = None
+        if with_priority:
+            self.priority_spin = QSpinBox()
+            self.priority_spin.setRange(1, 10)
+            bottom_layout.addWidget(self.priority_spin)
+        self.apply_btn = QPushButton(button_text)
+        self.apply_btn.setEnabled(False)
+        self.apply_btn.clicked.connect(self._emit_picked)
+        bottom_layout.addWidget(self.apply_btn, 1)
+
+        layout.addWidget(self.search_edit)
+        layout.addWidget(self.results)
+        layout.addLayout(bottom_layout)
+
+    def _on_current_changed(self, current, previous):
+        self.apply_btn.setEnabled(current.isValid())
+        if current.isValid() and self.priority_spin is not None:
+            self.priority_spin.setValue(int(current.data(PriorityRole)))
+
+    def _emit_picked(self, *args):
+        index = self.results.currentIndex()
+        if not index.isValid():
+            return
+        priority = self.priority_spin.value() if self.priority_spin is not None else 0
+        self.picked.emit(index.data(PathRole), priority)
+
+
+class SettingsMenu(QMenu):
+    """缓存的设置菜单，子菜单懒加载，注册表变化后才失效"""
+
+    # 程序数量超过该值时改用可搜索控件
+    SUBMENU_LIMIT = 30
+
+    def __init__(self, launcher, parent=None):
+        super().__init__(parent)
+        self._launcher = launcher
+        self._registry = launcher.registry
+        self._dirty = set()
+        # 可搜索控件的代理模型会自动跟随注册表变化，创建后无需重建
+        self._pickers = {}
+
+        add_program_action = QAction("添加程序", self)
+        add_program_action.triggered.connect(launcher.add_program)
+        self.addAction(add_program_action)
+
+        import_folder_action = QAction("导入文件夹...", self)
+        import_folder_action.triggered.connect(launcher.import_folder)
+        self.addAction(import_folder_action)
+
+        # 应用优先级子菜单
+        priority_menu = self.addMenu("应用优先级")
+
+        self.next_program_menu = priority_menu.addMenu("下次必中")
+        self.next_program_menu.aboutToShow.connect(self._build_next_program_menu)
+        priority_menu.addSeparator()
+        self.adjust_priority_menu = priority_menu.addMenu("调整优先级")
+        self.adjust_priority_menu.aboutToShow.connect(self._build_adjust_priority_menu)
+        priority_menu.addSeparator()
+        reset_priorities_action = QAction("重置优先级", self)
+        reset_priorities_action.triggered.connect(launcher.reset_priorities)
+        priority_menu.addAction(reset_priorities_action)
+
+        # 抽取策略子菜单：勾选状态在每次展开时按当前设置更新
+        policy_menu = self.addMenu("抽取策略")
+        self.no_repeat_action = policy_menu.addAction(f"不连续重复（最近 {launcher.NO_REPEAT_WINDOW} 次）")
+        self.no_repeat_action.setCheckable(True)
+        self.no_repeat_action.triggered.connect(
+            lambda checked: launcher.set_sampling_policy(no_repeat=launcher.NO_REPEAT_WINDOW if checked else 0)
+        )
+        self.decay_action = policy_menu.addAction("启动后降低权重")
+        self.decay_action.setCheckable(True)
+        self.decay_action.triggered.connect(
+            lambda checked: launcher.set_sampling_policy(decay=launcher.LAUNCH_DECAY if checked else None)
+        )
+        self.guarantee_action = policy_menu.addAction("保证每个程序都能轮到...")
+        self.guarantee_action.setCheckable(True)
+        self.guarantee_action.triggered.connect(launcher.set_launch_guarantee)
+        policy_menu.addSeparator()
+        self.seed_action = policy_menu.addAction("随机种子...")
+        self.seed_action.triggered.connect(launcher.set_random_seed)
+        odds_action = policy_menu.addAction("概率预览...")
+        odds_action.triggered.connect(launcher.show_odds_panel)
+        policy_menu.aboutToShow.connect(self._update_policy_menu)
+
+        # 主题子菜单：切换时整个界面只重新 polish 一次
+        self.theme_menu = self.addMenu("主题")
+        self.theme_actions = {}
+        for name, label in theme.THEME_NAMES.items():
+            action = self.theme_menu.addAction(label)
+            action.setCheckable(True)
+            action.triggered.connect(partial(self._on_theme_picked, name))
+            self.theme_actions[name] = action
+        self.theme_menu.aboutToShow.connect(self._update_theme_menu)
+
+        # 启动预读：提前把下一次随机启动的程序读入系统缓存
+        self.prefetch_menu = self.addMenu("启动预读")
+        self.prefetch_actions = {}
+        for top_k, label in ((None, "关闭"), (0, "预读下一个程序"),
+                             (launcher.PREFETCH_TOP_K, f"同时预读最可能的 {launcher.PREFETCH_TOP_K} 个备选程序")):
+            action = self.prefetch_menu.addAction(label)
+            action.setCheckable(True)
+            action.triggered.connect(partial(self._on_prefetch_picked, top_k))
+            self.prefetch_actions[top_k] = action
+        self.prefetch_menu.aboutToShow.connect(self._update_prefetch_menu)
+
+        check_paths_action = QAction("检查程序路径", self)
+        check_paths_action.triggered.connect(launcher.check_program_paths)
+        self.addAction(check_paths_action)
+
+        perf_panel_action = QAction("性能面板", self)
+        perf_panel_action.triggered.connect(launcher.show_perf_panel)
+        self.addAction(perf_panel_action)
+
+        self.addSeparator()
+        exit_action = QAction("退出应用", self)
+        exit_action.triggered.connect(launcher.close)
+        self.addAction(exit_action)
+
+        self.invalidate()
+        for signal in (self._registry.added, self._registry.removed,
+                       self._registry.updated, self._registry.reset):
+            signal.connect(self.invalidate)
+
+    def invalidate(self, *args):
+        """标记程序相关的子菜单需要在下次显示前重建"""
+        self._dirty.update(('next', 'adjust'))
+
+    def _use_picker(self):
+        return len(self._registry) > self.SUBMENU_LIMIT
+
+    def _build_next_program_menu(self):
+        if 'next' not in self._dirty:
+            return
+        self._dirty.discard('next')
+        with perf.span('settings_menu.build_next'):
+            self._fill_next_program_menu()
+
+    def _fill_next_program_menu(self):
+        menu = self.next_program_menu
+        use_picker = self._use_picker()
+        if use_picker and 'next' in self._pickers:
+            return
+        self._pickers.pop('next', None)
+        menu.clear()
+
+        if use_picker:
+            picker = ProgramPicker(self._launcher.all_programs_model, "设为下次必中", enabled_only=True)
+            picker.picked.connect(self._on_next_program_picked)
+            self._pickers['next'] = picker
+            self._add_widget(menu, picker)
+            return
+
+        # 获取当前启用的程序列表
+        enabled_programs = [p for p in self._registry if p.enabled]
+        if not enabled_programs:
+            self._add_placeholder(menu)
+            return
+        for program in enabled_programs:
+            program_action = QAction(program.name, menu)
+            program_action.triggered.connect(partial(self._launcher.set_next_program, program.path))
+            menu.addAction(program_action)
+
+    def _build_adjust_priority_menu(self):
+        if 'adjust' not in self._dirty:
+            return
+        self._dirty.discard('adjust')
+        with perf.span('settings_menu.build_adjust'):
+            self._fill_adjust_priority_menu()
+
+    def _fill_adjust_priority_menu(self):
+        menu = self.adjust_priority_menu
+        use_picker = self._use_picker()
+        if use_picker and 'adjust' in self._pickers:
+            return
+        self._pickers.pop('adjust', None)
+        menu.clear()
+
+        if not len(self._registry):
+            self._add_placeholder(menu)
+            return
+
+        if use_picker:
+            picker = ProgramPicker(self._launcher.all_programs_model, "设置优先级", with_priority=True)
+            picker.picked.connect(self._on_priority_picked)
+            self._pickers['adjust'] = picker
+            self._add_widget(menu, picker)
+            return
+
+        for program in self._registry:
+            program_menu = menu.addMenu(f"{program.name} (当前: {program.priority})")
+            # 每个程序的10个优先级选项也在展开时才创建
+            program_menu.aboutToShow.connect(partial(self._build_program_priority_menu, program_menu, program.path))
+
+    def _build_program_priority_menu(self, program_menu, path):
+        if program_menu.actions():
+            return
+        for p in range(1, 11):
+            priority_action = QAction(f"设置为 {p}", program_menu)
+            # 使用functools.partial确保正确捕获每个循环迭代的变量值
+            priority_action.triggered.connect(partial(self._launcher.set_program_priority, path, p))
+            program_menu.addAction(priority_action)
+
+    def _update_policy_menu(self):
+        settings = self._registry.settings.get('sampling_policy') or {}
+        self.no_repeat_action.setChecked(bool(settings.get('no_repeat')))
+        self.decay_action.setChecked(settings.get('decay') is not None)
+        guarantee = settings.get('guarantee', 0)
+        self.guarantee_action.setChecked(bool(guarantee))
+        self.guarantee_action.setText(
+            f"保证每个程序都能轮到（每 {guarantee} 次）" if guarantee else "保证每个程序都能轮到..."
+        )
+        seed = self._registry.settings.get('random_seed')
+        self.seed_action.setText(f"随机种子（{seed}）..." if seed is not None else "随机种子...")
+
+    def _update_theme_menu(self):
+        for name, action in self.theme_actions.items():
+            action.setChecked(name == theme.current())
+
+    def _on_theme_picked(self, name, checked=False):
+        self._launcher.set_theme(name)
+
+    def _update_prefetch_menu(self):
+        prefetch = self._registry.settings.get('prefetch')
+        current = None if prefetch is None else prefetch.get('top_k', 0)
+        for top_k, action in self.prefetch_actions.items():
+            action.setChecked(top_k == current)
+
+    def _on_prefetch_picked(self, top_k, checked=False):
+        self._launcher.set_prefetch(top_k)
+
+    def _on_next_program_picked(self, path, priority):
+        self.close()
+        self._launcher.set_next_program(path)
+
+    def _on_priority_picked(self, path, priority):
+        self.close()
+        self._launcher.set_program_priority(path, priority)
+
+    @staticmethod
+    def _add_widget(menu, widget):
+        action = QWidgetAction(menu)
+        action.setDefaultWidget(widget)
+        menu.addAction(action)
+
+    @staticmethod
+    def _add_placeholder(menu):
+        no_programs_action = QAction("无可用程序", menu)
+        no_programs_action.setEnabled(False)
+        menu.addAction(no_programs_action)
@@ -0,0 +1,46 @@
+"""启动耗时统计
+
+按顺序记录启动的各个阶段（导入、建立界面、首帧、加载配置、填充列表、托盘与样式），
+使用 --profile-startup 启动时在可交互后打印明细。后台线程中的阶段用 record() 单独记录，
+不影响界面线程阶段的计时。
+"""
+import sys
+import time
+
+
+class StartupProfile:
+    """启动阶段计时"""
+
+    def __init__(self, origin=None, enabled=False):
+        self.origin = origin if origin is not None else time.perf_counter()
+        self.enabled = enabled
+        self.stages = []  # [(名称, 开始偏移, 耗时, 是否后台)]
+        self._last = self.origin
+        self._reported = False
+
+    def mark(self, name):
+        """界面线程阶段：记录从上一个标记到现在的耗时"""
+        now = time.perf_counter()
+        self.stages.append((name, self._last - self.origin, now - self._last, False))
+        self._last = now
+
+    def record(self, name, start, end):
+        """后台阶段：start、end 为 time.perf_counter() 的值"""
+        self.stages.append((name, start - self.origin, end - start, True))
+
+    def elapsed(self):
+        return time.perf_counter() - self.origin
+
+    def format(self):
+        lines = ["启动耗时（毫秒）:", f"  {'阶段':<20}{'开始':>10}{'耗时':>10}"]
+        for name, start, duration, background in self.stages:
+            suffix = "  [后台]" if background else ""
+            lines.append(f"  {name:<20}{start * 1000:>10.1f}{duration * 1000:>10.1f}{suffix}")
+        lines.append(f"  {'合计（到可交互）':<20}{'':>10}{(self._last - self.origin) * 1000:>10.1f}")
+        return '\n'.join(lines)
+
+    def report(self, file=None):
+        """启用时打印一次明细"""
+        if self.enabled and not self._reported:
+            self._reported = True
+            print(self.format(), file=file or sys.stderr)
@@ -0,0 +1,763 @@
+"""配置存储
+
+存储后端（StorageBackend）负责持久化，ConfigWriter 在后台线程中驱动后端写入。
+
+JsonBackend（默认）由两部分组成：
+- 快照文件 ~/.random_app_launcher.json：压缩后的完整状态，原子写入
+- 日志文件 ~/.random_app_launcher.json.journal：快照之后的操作，每行一条，只追加
+
+每条日志带有递增的序号 seq，快照记录它包含的最后一个序号。加载时回放序号大于
+快照序号的日志；压缩在写入线程中完成：先原子替换快照，再清空日志。
+两步之间崩溃时，旧日志会因序号不大于快照序号而被跳过，状态始终一致。
+修改一个字段只需追加一行，写入量与修改量成正比，而与程序数量无关。
+
+SqliteBackend 把程序保存在 ~/.random_app_launcher.db 中（WAL 模式，按路径、
+启用状态和优先级建立索引），支持分页加载；第一次启用时自动迁移现有的 JSON 配置。
+通过环境变量 RANDOM_APP_LAUNCHER_STORAGE=json|sqlite 选择后端，
+未设置时若数据库文件已存在则使用 SQLite，否则使用 JSON。
+
+配置文件可能被其他程序（同步工具、另一台机器）改写。ConfigWriter 在每次读写后
+记录配置文件的签名（mtime、大小、inode），签名变化而本进程没有写入时即为外部修改。
+reload() 让后端重新读取，已写出的内容以文件为准，尚未写出的操作回放在读到的状态之上。
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+import perf
+
+CONFIG_PATH = os.path.join(os.path.expanduser("~"), ".random_app_launcher.json")
+DB_PATH = os.path.join(os.path.expanduser("~"), ".random_app_launcher.db")
+JOURNAL_SUFFIX = '.journal'
+SNAPSHOT_VERSION = 2
+STORAGE_ENV = 'RANDOM_APP_LAUNCHER_STORAGE'
+
+# 程序字典中有独立列的字段，其余字段保存在 extra 列的 JSON 中
+_PROGRAM_COLUMNS = ('name', 'path', 'enabled', 'priority')
+
+
+def _fsync_dir(directory):
+    """重命名后同步目录项（Windows 不支持打开目录，直接跳过）"""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path, data):
+    """原子地写入文件：写临时文件、fsync、再重命名覆盖"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_dir(directory)
+
+
+def atomic_write_json(path, data):
+    # 不使用缩进以减少文件大小和写入时间
+    atomic_write_bytes(path, json.dumps(data, ensure_ascii=False).encode('utf-8'))
+
+
+def file_signature(paths):
+    """文件的 (mtime, 大小, inode) 元组，不存在的文件为None"""
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            signature.append(None)
+        else:
+            signature.append((st.st_mtime_ns, st.st_size, st.st_ino))
+    return tuple(signature)
+
+
+def empty_state():
+    return {'programs': [], 'next_program': None, 'settings': {}, 'seq': 0}
+
+
+def read_snapshot(path=CONFIG_PATH):
+    """读取快照，兼容旧版的纯列表格式（旧格式没有序号，seq 为 None）"""
+    if not os.path.exists(path):
+        return empty_state()
+    with open(path, 'rb') as f:
+        data = json.loads(f.read().decode('utf-8'))
+    if isinstance(data, list):
+        state = {'programs': data, 'next_program': None, 'settings': {}, 'seq': None}
+    else:
+        state = {
+            'programs': data.get('programs', []),
+            'next_program': data.get('next_program'),
+            'settings': data.get('settings', {}),
+            'seq': data.get('seq', 0),
+        }
+    for program in state['programs']:
+        if 'priority' not in program:
+            program['priority'] = 1
+    return state
+
+
+def apply_operation(programs, state, op):
+    """把一条操作应用到 {path: program} 有序字典和状态上"""
+    kind = op['op']
+    if kind == 'add':
+        program = dict(op['program'])
+        programs.setdefault(program['path'], program)
+    elif kind == 'add_many':
+        for program in op['programs']:
+            programs.setdefault(program['path'], dict(program))
+    elif kind == 'remove':
+        programs.pop(op['path'], None)
+        if state['next_program'] == op['path']:
+            state['next_program'] = None
+    elif kind == 'set_priority':
+        if op['path'] in programs:
+            programs[op['path']]['priority'] = op['priority']
+    elif kind == 'set_enabled':
+        if op['path'] in programs:
+            programs[op['path']]['enabled'] = op['enabled']
+    elif kind == 'set_groups':
+        if op['path'] in programs:
+            if op['groups']:
+                programs[op['path']]['groups'] = list(op['groups'])
+            else:
+                programs[op['path']].pop('groups', None)
+    elif kind == 'set_next':
+        state['next_program'] = op['path']
+    elif kind == 'set_setting':
+        if op['value'] is None:
+            state['settings'].pop(op['key'], None)
+        else:
+            state['settings'][op['key']] = op['value']
+    else:
+        raise ValueError(f"未知的日志操作: {kind}")
+
+
+def load_state(path=CONFIG_PATH, journal_path=None):
+    """加载快照并回放日志
+
+    返回的状态字典包含 programs、next_program、settings、seq（已包含的最后一条日志序号）
+    以及 journal_bytes（日志中可用部分的长度，之后的内容是崩溃留下的半行）。
+    """
+    journal_path = journal_path or path + JOURNAL_SUFFIX
+    state = read_snapshot(path)
+    base_seq = state['seq']
+    state['journal_bytes'] = 0
+
+    if not os.path.exists(journal_path):
+        state['seq'] = base_seq or 0
+        return state
+    if base_seq is None and os.path.getmtime(journal_path) < os.path.getmtime(path):
+        # 旧格式快照由其他工具在日志之后重写，日志已过期
+        state['seq'] = 0
+        return state
+
+    base_seq = base_seq or 0
+    programs = {p['path']: p for p in state['programs']}
+    seq = base_seq
+    valid_bytes = 0
+    with open(journal_path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break  # 写到一半的最后一行
+            try:
+                op = json.loads(line.decode('utf-8'))
+            except ValueError:
+                break
+            valid_bytes += len(line)
+            if op['seq'] <= base_seq:
+                continue
+            apply_operation(programs, state, op)
+            seq = op['seq']
+    state['programs'] = list(programs.values())
+    state['seq'] = seq
+    state['journal_bytes'] = valid_bytes
+    return state
+
+
+class StorageBackend:
+    """存储后端接口
+
+    写入方法（apply/write_snapshot/compact）只在写入线程中调用；
+    读取方法可以在任意线程调用，由实现自行保证线程安全。
+    """
+
+    def load(self):
+        """加载完整状态：{'programs': [...], 'next_program': path或None, 'settings': {...}}"""
+        raise NotImplementedError
+
+    def load_meta(self):
+        """加载分页前需要的信息：{'next_program': ..., 'settings': ..., 'count': 程序数量}"""
+        state = self.load()
+        return {'next_program': state['next_program'], 'settings': state['settings'],
+                'count': len(state['programs'])}
+
+    def load_page(self, offset, limit):
+        """按显示顺序加载一页程序"""
+        return self.load()['programs'][offset:offset + limit]
+
+    def reload(self):
+        """配置被其他程序修改后重新读取完整状态"""
+        return self.load()
+
+    def watch_paths(self):
+        """保存配置的文件，用于监视外部修改"""
+        return []
+
+    def apply(self, ops):
+        """持久化一批注册表操作"""
+        raise NotImplementedError
+
+    def write_snapshot(self, state):
+        """用完整状态替换存储内容"""
+        raise NotImplementedError
+
+    def needs_compaction(self):
+        return False
+
+    def compact(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class JsonBackend(StorageBackend):
+    """JSON 快照 + 追加日志"""
+
+    def __init__(self, path=CONFIG_PATH, journal_path=None, compact_threshold=256 * 1024):
+        self.path = path
+        self.journal_path = journal_path or path + JOURNAL_SUFFIX
+        self.compact_threshold = compact_threshold
+        self._seq = 0
+        self._journal_bytes = 0
+        self._opened = False
+        self._page_cache = None
+
+    def _open(self):
+        """第一次加载时确定日志序号，返回加载到的状态；之后返回None"""
+        if self._opened:
+            return None
+        state = load_state(self.path, self.journal_path)
+        self._seq = state['seq']
+        # 截掉崩溃留下的半行或过期日志，之后的追加才能正确解析
+        if os.path.exists(self.journal_path) and \
+                os.path.getsize(self.journal_path) != state['journal_bytes']:
+            with open(self.journal_path, 'r+b') as f:
+                f.truncate(state['journal_bytes'])
+        self._journal_bytes = state['journal_bytes']
+        self._opened = True
+        return state
+
+    def load(self):
+        state = self._open()
+        return state if state is not None else load_state(self.path, self.journal_path)
+
+    def reload(self):
+        # 重新确定日志序号；外部重写的快照使日志过期时会截断日志
+        self._opened = False
+        self._page_cache = None
+        return self._open()
+
+    def watch_paths(self):
+        return [self.path, self.journal_path]
+
+    def load_meta(self):
+        # JSON 必须整体解析，分页时复用这次加载的结果
+        state = self.load()
+        self._page_cache = state['programs']
+        return {'next_program': state['next_program'], 'settings': state['settings'],
+                'count': len(state['programs'])}
+
+    def load_page(self, offset, limit):
+        programs = self._page_cache
+        if programs is None:
+            programs = self.load()['programs']
+        page = programs[offset:offset + limit]
+        if offset + limit >= len(programs):
+            self._page_cache = None
+        return page
+
+    def apply(self, ops):
+        self._open()
+        lines = []
+        for op in ops:
+            self._seq += 1
+            record = dict(op)
+            record['seq'] = self._seq
+            lines.append(json.dumps(record, ensure_ascii=False))
+        data = ('\n'.join(lines) + '\n').encode('utf-8')
+        try:
+            with open(self.journal_path, 'ab') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except BaseException:
+            # 去掉可能写了一半的行并退回序号，重试时从同一位置继续追加
+            self._seq -= len(ops)
+            try:
+                with open(self.journal_path, 'r+b') as f:
+                    f.truncate(self._journal_bytes)
+            except OSError:
+                pass
+            raise
+        self._journal_bytes += len(data)
+
+    def write_snapshot(self, state):
+        self._open()
+        atomic_write_json(self.path, {
+            'version': SNAPSHOT_VERSION,
+            'seq': self._seq,
+            'next_program': state.get('next_program'),
+            'settings': state.get('settings', {}),
+            'programs': state['programs'],
+        })
+        # 快照已包含所有日志，清空日志；若在此之前崩溃，旧日志会按序号被跳过
+        with open(self.journal_path, 'wb') as f:
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_bytes = 0
+
+    def needs_compaction(self):
+        return self._journal_bytes > self.compact_threshold
+
+    def compact(self):
+        """把快照和日志合并为新快照"""
+        self.write_snapshot(load_state(self.path, self.journal_path))
+
+
+class SqliteBackend(StorageBackend):
+    """SQLite 存储，适合程序数量很多的情况"""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS programs (
+            path TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            enabled INTEGER NOT NULL DEFAULT 1,
+            priority NUMERIC NOT NULL DEFAULT 1,
+            position INTEGER NOT NULL,
+            extra TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_programs_enabled ON programs(enabled);
+        CREATE INDEX IF NOT EXISTS idx_programs_priority ON programs(priority);
+        CREATE INDEX IF NOT EXISTS idx_programs_position ON programs(position);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    def __init__(self, path=DB_PATH, json_path=CONFIG_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        # 读写共用一个连接，由锁串行化，因此允许跨线程使用
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._lock:
+            self._conn.executescript(self._SCHEMA)
+            if self._get_meta('schema_version') is None:
+                self._migrate_from_json(json_path)
+
+    def _migrate_from_json(self, json_path):
+        """首次使用数据库时导入现有的 JSON 配置"""
+        state = load_state(json_path) if json_path and os.path.exists(json_path) else empty_state()
+        self.write_snapshot(state)
+        with self._transaction() as cur:
+            self._set_meta(cur, 'schema_version', '1')
+            if json_path and os.path.exists(json_path):
+                self._set_meta(cur, 'migrated_from', json_path)
+
+    def _transaction(self):
+        return _SqliteTransaction(self._conn, self._lock)
+
+    def _get_meta(self, key):
+        row = self._conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return None if row is None else row[0]
+
+    @staticmethod
+    def _set_meta(cur, key, value):
+        cur.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    @staticmethod
+    def _program_row(program, position):
+        extra = {k: v for k, v in program.items() if k not in _PROGRAM_COLUMNS}
+        return (
+            program['path'],
+            program.get('name') or os.path.basename(program['path']),
+            1 if program.get('enabled', True) else 0,
+            program.get('priority', 1),
+            position,
+            json.dumps(extra, ensure_ascii=False) if extra else None,
+        )
+
+    @staticmethod
+    def _program_dict(row):
+        path, name, enabled, priority, extra = row
+        program = {'name': name, 'path': path, 'enabled': bool(enabled), 'priority': priority}
+        if extra:
+            program.update(json.loads(extra))
+        return program
+
+    def _select(self, suffix='', params=()):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT path, name, enabled, priority, extra FROM programs ORDER BY position' + suffix,
+                params
+            ).fetchall()
+        return [self._program_dict(row) for row in rows]
+
+    def _get_settings(self):
+        value = self._get_meta('settings')
+        return json.loads(value) if value else {}
+
+    def load(self):
+        with self._lock:
+            return {'programs': self._select(), 'next_program': self._get_meta('next_program'),
+                    'settings': self._get_settings()}
+
+    def load_meta(self):
+        with self._lock:
+            count = self._conn.execute('SELECT COUNT(*) FROM programs').fetchone()[0]
+            return {'next_program': self._get_meta('next_program'), 'settings': self._get_settings(),
+                    'count': count}
+
+    def load_page(self, offset, limit):
+        return self._select(' LIMIT ? OFFSET ?', (limit, offset))
+
+    def watch_paths(self):
+        # 其他连接的提交先写入 WAL 文件，检查点后才写回数据库文件
+        return [self.path, self.path + '-wal']
+
+    def apply(self, ops):
+        with self._transaction() as cur:
+            for op in ops:
+                kind = op['op']
+                if kind in ('add', 'add_many'):
+                    position = cur.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM programs').fetchone()[0]
+                    programs = op['programs'] if kind == 'add_many' else [op['program']]
+                    cur.executemany('INSERT OR IGNORE INTO programs VALUES (?, ?, ?, ?, ?, ?)',
+                                    (self._program_row(p, position + i) for i, p in enumerate(programs)))
+                elif kind == 'remove':
+                    cur.execute('DELETE FROM programs WHERE path = ?', (op['path'],))
+                    cur.execute("DELETE FROM meta WHERE key = 'next_program' AND value = ?", (op['path'],))
+                elif kind == 'set_priority':
+                    cur.execute('UPDATE programs SET priority = ? WHERE path = ?', (op['priority'], op['path']))
+                elif kind == 'set_enabled':
+                    cur.execute('UPDATE programs SET enabled = ? WHERE path = ?',
+                                (1 if op['enabled'] else 0, op['path']))
+                elif kind == 'set_groups':
+                    row = cur.execute('SELECT extra FROM programs WHERE path = ?', (op['path'],)).fetchone()
+                    if row is not None:
+                        extra = json.loads(row[0]) if row[0] else {}
+                        if op['groups']:
+                            extra['groups'] = list(op['groups'])
+                        else:
+                            extra.pop('groups', None)
+                        cur.execute('UPDATE programs SET extra = ? WHERE path = ?',
+                                    (json.dumps(extra, ensure_ascii=False) if extra else None, op['path']))
+                elif kind == 'set_next':
+                    if op['path'] is None:
+                        cur.execute("DELETE FROM meta WHERE key = 'next_program'")
+                    else:
+                        self._set_meta(cur, 'next_program', op['path'])
+                elif kind == 'set_setting':
+                    settings = self._get_settings()
+                    if op['value'] is None:
+                        settings.pop(op['key'], None)
+                    else:
+                        settings[op['key']] = op['value']
+                    self._set_meta(cur, 'settings', json.dumps(settings, ensure_ascii=False))
+                else:
+                    raise ValueError(f"未知的日志操作: {kind}")
+
+    def write_snapshot(self, state):
+        with self._transaction() as cur:
+            cur.execute('DELETE FROM programs')
+            cur.executemany('INSERT OR IGNORE INTO programs VALUES (?, ?, ?, ?, ?, ?)',
+                            (self._program_row(p, i) for i, p in enumerate(state['programs'])))
+            cur.execute("DELETE FROM meta WHERE key = 'next_program'")
+            if state.get('next_program') is not None:
+                self._set_meta(cur, 'next_program', state['next_program'])
+            self._set_meta(cur, 'settings', json.dumps(state.get('settings', {}), ensure_ascii=False))
+
+    def compact(self):
+        with self._lock:
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class _SqliteTransaction:
+    """持有后端锁的 BEGIN/COMMIT 事务，异常时回滚"""
+
+    def __init__(self, conn, lock):
+        self._conn = conn
+        self._lock = lock
+
+    def __enter__(self):
+        self._lock.acquire()
+        try:
+            self._conn.execute('BEGIN IMMEDIATE')
+        except BaseException:
+            self._lock.release()
+            raise
+        return self._conn.cursor()
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self._conn.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self._lock.release()
+        return False
+
+
+def open_backend(kind=None):
+    """按名称或环境变量创建存储后端"""
+    kind = kind or os.environ.get(STORAGE_ENV)
+    if not kind:
+        kind = 'sqlite' if os.path.exists(DB_PATH) else 'json'
+    if kind == 'json':
+        return JsonBackend()
+    if kind == 'sqlite':
+        return SqliteBackend()
+    raise ValueError(f"未知的存储后端: {kind}")
+
+
+class ConfigWriter:
+    """后台配置写入器
+
+    append() 把操作放入队列；防抖窗口内没有新操作后，由后台线程一次性交给后端
+    持久化，后端需要时在同一线程内压缩。submit() 用于整体替换（如导入、迁移），
+    会取代之前尚未写出的操作。写入失败时没有写出的内容放回队列最前面，
+    按 RETRY_DELAY 起逐次加倍的间隔重试；连续失败只在第一次调用 on_error(exception)
+    （在后台线程中调用），last_error 保留到重试成功为止。
+    每次读写后记录配置文件的签名，changed_externally() 据此区分本进程和其他程序的写入。
+    """
+
+    RETRY_DELAY = 1.0
+    MAX_RETRY_DELAY = 30.0
+
+    def __init__(self, backend=None, debounce=0.2, max_delay=3.0, on_error=None):
+        self.backend = backend if backend is not None else JsonBackend()
+        self.debounce = debounce
+        self.max_delay = max_delay  # 持续修改时最多推迟这么久也要写一次
+        self.on_error = on_error
+        self.last_error = None  # 最近一次写入失败的异常，重试成功后清空
+        self._failures = 0       # 连续失败的次数
+        self._cond = threading.Condition()
+        self._pending_ops = []
+        self._pending_snapshot = None
+        self._compact_requested = False
+        self._first_submit = None
+        self._deadline = None
+        self._writing = False
+        self._closed = False
+        self._signature = None  # 本进程最后一次读写后配置文件的签名
+        self._changed_before_write = False  # 写入前发现文件已被其他程序修改
+        self._thread = threading.Thread(target=self._run, name='ConfigWriter', daemon=True)
+        self._thread.start()
+
+    def load(self):
+        """加载完整配置；需要时在后台安排一次压缩"""
+        state = self.backend.load()
+        self._record_signature()
+        self._request_compaction_if_needed()
+        return state
+
+    def load_meta(self):
+        """开始分页加载，返回 next_program 和程序数量"""
+        meta = self.backend.load_meta()
+        self._record_signature()
+        self._request_compaction_if_needed()
+        return meta
+
+    def load_page(self, offset, limit):
+        return self.backend.load_page(offset, limit)
+
+    def reload(self):
+        """重新读取被其他程序修改的配置，返回完整状态
+
+        尚未写出的操作保留在队列中照常写入，并回放在返回的状态之上，本进程的修改不会丢失。
+        """
+        with self._cond:
+            # 在锁内读取，期间写入线程不会开始新的写入
+            while self._writing:
+                self._cond.wait()
+            state = self.backend.reload()
+            self._signature = file_signature(self.backend.watch_paths())
+            self._changed_before_write = False
+            if self._pending_snapshot is not None:
+                state = dict(self._pending_snapshot, settings=dict(self._pending_snapshot.get('settings', {})))
+            ops = list(self._pending_ops)
+        if ops:
+            programs = {p['path']: dict(p) for p in state['programs']}
+            for op in ops:
+                apply_operation(programs, state, op)
+            state['programs'] = list(programs.values())
+        return state
+
+    def changed_externally(self):
+        """配置文件是否在本进程最后一次读写之后被其他程序修改；正在写入时返回None"""
+        with self._cond:
+            if self._has_work() or self._writing:
+                return None
+            return self._changed_before_write or file_signature(self.backend.watch_paths()) != self._signature
+
+    def _record_signature(self):
+        with self._cond:
+            self._signature = file_signature(self.backend.watch_paths())
+
+    def _request_compaction_if_needed(self):
+        if self.backend.needs_compaction():
+            with self._cond:
+                self._compact_requested = True
+                self._schedule(time.monotonic())
+
+    def append(self, op):
+        """记录一条注册表操作"""
+        with self._cond:
+            self._check_open()
+            self._pending_ops.append(op)
+            self._schedule(time.monotonic())
+
+    def submit(self, state):
+        """提交完整状态，写为新快照（调用方需保证之后不会再修改它）"""
+        with self._cond:
+            self._check_open()
+            self._pending_ops = []
+            self._pending_snapshot = state
+            self._schedule(time.monotonic())
+
+    def flush(self, timeout=None):
+        """立即写出所有待写内容并等待完成，返回是否全部写出
+
+        超时或写入失败（内容留在队列中等待重试，见 last_error）时返回False。
+        """
+        end = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            self._deadline = time.monotonic()
+            self._cond.notify_all()
+            failures = self._failures
+            while self._has_work() or self._writing:
+                if self._failures > failures and not self._writing:
+                    return False
+                remaining = None if end is None else end - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout=None):
+        """写出剩余内容后停止后台线程并关闭后端"""
+        done = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        if not self._thread.is_alive():
+            self.backend.close()
+        return done
+
+    @property
+    def has_pending(self):
+        with self._cond:
+            return self._has_work() or self._writing
+
+    def _check_open(self):
+        if self._closed:
+            raise RuntimeError("ConfigWriter 已关闭")
+
+    def _has_work(self):
+        return bool(self._pending_ops) or self._pending_snapshot is not None or self._compact_requested
+
+    def _schedule(self, now):
+        if self._first_submit is None:
+            self._first_submit = now
+        self._deadline = min(now + self.debounce, self._first_submit + self.max_delay)
+        self._cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (
+                        not self._has_work() or time.monotonic() < self._deadline):
+                    if not self._has_work():
+                        self._cond.wait()
+                    else:
+                        self._cond.wait(max(0.0, self._deadline - time.monotonic()))
+                if not self._has_work():
+                    return  # 已关闭且没有待写内容
+                snapshot = self._pending_snapshot
+                ops = self._pending_ops
+                compact = self._compact_requested
+                self._pending_snapshot = None
+                self._pending_ops = []
+                self._compact_requested = False
+                self._first_submit = None
+                self._writing = True
+            # 写出的部分随即清空，失败时只把剩下的放回队列
+            try:
+                # 写入后的签名会包含外部修改，先在写入前比较
+                if file_signature(self.backend.watch_paths()) != self._signature:
+                    self._changed_before_write = True
+                with perf.span('config.write'):
+                    if snapshot is not None:
+                        self.backend.write_snapshot(snapshot)
+                        snapshot = None
+                    if ops:
+                        self.backend.apply(ops)
+                        perf.count('config.ops', len(ops))
+                        ops = []
+                if compact or self.backend.needs_compaction():
+                    with perf.span('config.compact'):
+                        self.backend.compact()
+                self._record_signature()
+            except Exception as e:
+                perf.count('config.write_errors')
+                first = self.last_error is None
+                self.last_error = e
+                if first and self.on_error is not None:
+                    self.on_error(e)
+                with self._cond:
+                    self._requeue(snapshot, ops)
+                    self._writing = False
+                    self._cond.notify_all()
+                    if self._closed:
+                        return  # 已关闭，不再重试
+                continue
+            with self._cond:
+                self._failures = 0
+                self.last_error = None
+                self._writing = False
+                self._cond.notify_all()
+
+    def _requeue(self, snapshot, ops):
+        """把没有写出的内容放回队列最前面，按连续失败次数推迟重试"""
+        self._failures += 1
+        # 写入期间 submit() 的新快照已包含这些修改，不再放回
+        if self._pending_snapshot is None:
+            self._pending_snapshot = snapshot
+            self._pending_ops = ops + self._pending_ops
+        # 失败的也可能是压缩，重试时一并再做
+        self._compact_requested = True
+        now = time.monotonic()
+        self._first_submit = now
+        self._deadline = now + min(self.MAX_RETRY_DELAY, self.RETRY_DELAY * 2 ** (self._failures - 1))
@@ -0,0 +1,197 @@
+"""界面主题
+
+所有样式集中在一份应用级样式表中，控件只设置 objectName 或动态属性 variant
+（primary / accent / danger）选择样式，不再各自调用 setStyleSheet。
+样式表按主题编译一次后缓存；切换主题只调用一次 QApplication.setStyleSheet，
+Qt 对整个控件树重新 polish 一遍。列表委托自绘用的颜色通过 color() 取当前主题的值。
+"""
+from string import Template
+
+from PyQt5.QtGui import QColor, QPalette
+
+DEFAULT_THEME = 'light'
+
+THEME_NAMES = {
+    'light': "浅色",
+    'dark': "深色",
+}
+
+THEMES = {
+    'light': {
+        'window': '#f0f0f0',
+        'window_text': '#323232',
+        'surface': 'white',
+        'border': '#ddd',
+        'title': '#333',
+        'primary': '#4CAF50', 'primary_hover': '#45a049', 'primary_pressed': '#3d8b40',
+        'info': '#2196F3', 'info_hover': '#1976D2', 'info_pressed': '#1565C0',
+        'accent': '#FF9800', 'accent_hover': '#F57C00', 'accent_pressed': '#E65100',
+        'danger': '#f44336', 'danger_hover': '#d32f2f', 'danger_pressed': '#c62828',
+        'button_text': 'white',
+        # 列表委托
+        'row': '#f5f5f5',
+        'row_selected': '#e3f2fd',
+        'name': '#333',
+        'name_unavailable': '#999',
+        'path': '#666',
+        'path_unavailable': '#d32f2f',
+        'stats': '#888',
+        'highlight_error': '#ffcdd2',
+    },
+    'dark': {
+        'window': '#202124',
+        'window_text': '#e8eaed',
+        'surface': '#2b2c30',
+        'border': '#44464b',
+        'title': '#e8eaed',
+        'primary': '#388E3C', 'primary_hover': '#43A047', 'primary_pressed': '#2E7D32',
+        'info': '#1976D2', 'info_hover': '#1E88E5', 'info_pressed': '#1565C0',
+        'accent': '#EF6C00', 'accent_hover': '#F57C00', 'accent_pressed': '#E65100',
+        'danger': '#c62828', 'danger_hover': '#d32f2f', 'danger_pressed': '#b71c1c',
+        'button_text': 'white',
+        'row': '#323338',
+        'row_selected': '#1e3a5f',
+        'name': '#e8eaed',
+        'name_unavailable': '#80868b',
+        'path': '#9aa0a6',
+        'path_unavailable': '#ef5350',
+        'stats': '#80868b',
+        'highlight_error': '#5c2b2b',
+    },
+}
+
+_STYLESHEET = Template("""
+QMainWindow {
+    background-color: $window;
+}
+QLabel {
+    font-family: 'Microsoft YaHei', sans-serif;
+}
+QLabel#titleLabel {
+    font-size: 24px;
+    font-weight: bold;
+    color: $title;
+}
+QPushButton#settingsButton {
+    background-color: $info;
+    color: $button_text;
+    border-radius: 15px;
+    font-size: 16px;
+    font-weight: bold;
+    border: none;
+}
+QPushButton#settingsButton:hover {
+    background-color: $info_hover;
+}
+QPushButton#settingsButton:pressed {
+    background-color: $info_pressed;
+}
+QPushButton[variant="primary"], QPushButton[variant="danger"] {
+    color: $button_text;
+    border-radius: 8px;
+    font-size: 14px;
+    font-weight: bold;
+    padding: 8px 16px;
+    border: none;
+}
+QPushButton[variant="primary"] {
+    background-color: $primary;
+}
+QPushButton[variant="primary"]:hover {
+    background-color: $primary_hover;
+}
+QPushButton[variant="primary"]:pressed {
+    background-color: $primary_pressed;
+}
+QPushButton[variant="danger"] {
+    background-color: $danger;
+}
+QPushButton[variant="danger"]:hover {
+    background-color: $danger_hover;
+}
+QPushButton[variant="danger"]:pressed {
+    background-color: $danger_pressed;
+}
+QPushButton[variant="accent"] {
+    background-color: $accent;
+    color: $button_text;
+    border-radius: 10px;
+    font-size: 16px;
+    font-weight: bold;
+    padding: 12px 24px;
+    border: none;
+}
+QPushButton[variant="accent"]:hover {
+    background-color: $accent_hover;
+}
+QPushButton[variant="accent"]:pressed {
+    background-color: $accent_pressed;
+}
+QGroupBox#programsGroup {
+    border: 2px solid $border;
+    border-radius: 8px;
+    margin-top: 10px;
+    padding: 10px;
+}
+QGroupBox#programsGroup::title {
+    subcontrol-origin: margin;
+    left: 10px;
+    padding: 0 5px 0 5px;
+    font-weight: bold;
+    color: $title;
+}
+QListView#programsList {
+    background-color: $surface;
+    border-radius: 4px;
+    border: 1px solid $border;
+}
+""")
+
+_current = DEFAULT_THEME
+_stylesheets = {}  # 主题名 -> 编译后的样式表
+_colors = {}       # 主题名 -> {颜色名: QColor}
+
+
+def current():
+    return _current
+
+
+def stylesheet(name):
+    """主题的应用级样式表（编译后缓存）"""
+    text = _stylesheets.get(name)
+    if text is None:
+        text = _stylesheets[name] = _STYLESHEET.substitute(THEMES[name])
+    return text
+
+
+def color(key):
+    """当前主题中的颜色，供自绘使用"""
+    colors = _colors.get(_current)
+    if colors is None:
+        colors = _colors[_current] = {k: QColor(v) for k, v in THEMES[_current].items()}
+    return colors[key]
+
+
+def palette(name):
+    tokens = THEMES[name]
+    result = QPalette()
+    result.setColor(QPalette.Window, QColor(tokens['window']))
+    result.setColor(QPalette.WindowText, QColor(tokens['window_text']))
+    if name != DEFAULT_THEME:
+        result.setColor(QPalette.Base, QColor(tokens['surface']))
+        result.setColor(QPalette.AlternateBase, QColor(tokens['row']))
+        result.setColor(QPalette.Text, QColor(tokens['window_text']))
+        result.setColor(QPalette.Button, QColor(tokens['surface']))
+        result.setColor(QPalette.ButtonText, QColor(tokens['window_text']))
+    return result
+
+
+def apply_theme(app, name):
+    """把主题应用到整个程序，未知的主题名使用默认主题；返回实际使用的主题名"""
+    global _current
+    if name not in THEMES:
+        name = DEFAULT_THEME
+    _current = name
+    app.setPalette(palette(name))
+    app.setStyleSheet(stylesheet(name))
+    return name